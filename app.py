@@ -1,16 +1,40 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
-from utils.ai_engine import get_answer
-from utils.tts import speak
+from flask import Flask, Response, abort, render_template, request, jsonify, redirect, send_file, url_for, session, flash, stream_with_context
+from utils.ai_engine import find_answer, qa_batcher, semantic, normalize, KB, FALLBACK_MESSAGE
+from utils.ai_engine import BANKING_CONTEXT, EXAMPLE_QUESTIONS
+from utils import model_manager
+from utils.model_manager import qa_model
+from utils.tts import speak, split_for_tts, start_backends, tts_stats
 from utils.stt import listen
-from deep_translator import GoogleTranslator
-import os, time, uuid, sqlite3
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.recognition import RecognitionPool, RecognizerBusy, AudioRejected, STT_MAX_BYTES
+from utils.response_cache import ResponseCache
+from utils.audio_store import AudioStore, audio_path, etag_for
+from utils.audio_jobs import AudioJobs
+from utils.single_flight import SingleFlight, SINGLE_FLIGHT_LOCK_DIR
+from utils import prerender
+from utils import kb_store
+from utils.db import Database
+from utils.password_hashing import PasswordHasher, HashPoolBusy
+from utils.translation import TranslationService, TranslationTimeout
+from utils.query_log import QueryLog, RequestTrace
+from utils import metrics
+from utils.logging_config import setup_logging
+import json, logging, os, sqlite3
 
 
 APP_ROOT = os.path.dirname(__file__)
-DB_PATH = os.path.join(APP_ROOT, "users.db")
+DB_PATH = os.environ.get("USERS_DB_PATH", os.path.join(APP_ROOT, "users.db"))
 SECRET_KEY = os.environ.get("FLASK_SECRET_KEY", "replace_with_a_real_secret_key")
 REQUIRE_LOGIN = True  
+# render translations + audio for every KB entry on a background thread at startup
+PRERENDER_AT_STARTUP = os.environ.get("PRERENDER_AT_STARTUP", "0") == "1"
+# /ask/stream: seconds to wait for each sentence's audio before skipping it
+STREAM_AUDIO_WAIT = float(os.environ.get("STREAM_AUDIO_WAIT", "30"))
+# /audio/<name>: how long browsers and proxies may keep an audio file (seconds)
+AUDIO_MAX_AGE = int(os.environ.get("AUDIO_MAX_AGE", str(365 * 24 * 3600)))
+
+# leveled logging, written by a background thread (see utils/logging_config.py)
+setup_logging()
+logger = logging.getLogger(__name__)
 # ----------------------
 # App init
 # ----------------------
@@ -20,31 +44,65 @@ app.secret_key = SECRET_KEY
 # ensure audio folder exists
 os.makedirs(os.path.join(app.root_path, "static", "audio"), exist_ok=True)
 
+# TTS output stored by hash of (lang, text); janitor keeps it under a byte budget
+audio_store = AudioStore(os.path.join(app.root_path, "static", "audio"))
+audio_store.start_janitor()
+
+# KB entries live in SQLite (see utils/kb_store.py), seeded from BANKING_CONTEXT
+# on first run; edits are picked up by every worker without a restart
+knowledge_store = kb_store.open_store(KB, BANKING_CONTEXT, EXAMPLE_QUESTIONS)
+
+# start loading the QA model (lazy / background / eager, see utils/model_manager.py)
+# and the semantic tier's encoder, unless SEMANTIC_ENCODER=off
+model_manager.start()
+if semantic.enabled:
+    semantic.encoder.start_background_load()
+
+# pre-start local TTS workers, if any language uses one (see utils/tts_backends.py)
+start_backends()
+
+# answer + translation + audio URL per (normalized query, language, KB version)
+response_cache = ResponseCache()
+
+# cached, segment-batched translation (see utils/translation.py)
+translator = TranslationService()
+
+# identical /ask queries and TTS renders in flight at the same time are done
+# once, also across worker processes (see utils/single_flight.py). A worker that
+# waited for another one looks for its result in a shared cache: the audio store
+# for TTS, the response cache's SQLite tier for answers, so without
+# RESPONSE_CACHE_DB answers are coalesced within each worker only
+answer_flight = SingleFlight("ask", lock_dir=SINGLE_FLIGHT_LOCK_DIR if response_cache.db_path else "")
+tts_flight = SingleFlight("tts")
+
+# translations + MP3s rendered ahead of time for every KB entry (python -m utils.prerender)
+prerendered = prerender.PrerenderedAnswers()
+prerendered.load()
+if PRERENDER_AT_STARTUP:
+    prerender.build_in_background(prerendered)
+
 # ----------------------
 # Database helpers
 # ----------------------
-def get_db_connection():
-    conn = sqlite3.connect(DB_PATH,  timeout=10)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def init_db():
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    conn.commit()
-    conn.close()
+# a small pool of WAL-mode connections shared by the request threads (see utils/db.py)
+db = Database(DB_PATH)
 
 # create DB/table at startup
-init_db()
+db.init_schema()
+
+# password KDFs run on their own bounded pool (see utils/password_hashing.py)
+hasher = PasswordHasher()
+
+# browser-recorded voice queries are recognized on a bounded pool (see utils/recognition.py)
+recognizer_pool = RecognitionPool()
+
+# query / tier / stage timings, written to data/queries.db in the background
+query_log = QueryLog()
+
+def finish_trace(trace):
+    """A request is done: add its total to the latency histograms and log it."""
+    metrics.observe_request(trace)
+    query_log.record(trace)
 
 # ----------------------
 # Auth routes
@@ -64,19 +122,17 @@ def signup():
             flash("Passwords do not match.", "danger")
             return redirect(url_for("signup"))
 
-        password_hash = generate_password_hash(password)
         try:
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
-                        (username, email, password_hash))
-            conn.commit()
-            conn.close()
+            password_hash = hasher.hash_password(password)
+            db.create_user(username, email, password_hash)
             flash("Account created successfully. Please login.", "success")
             return redirect(url_for("login"))
         except sqlite3.IntegrityError:
             flash("Username or email already exists. Choose another.", "danger")
             return redirect(url_for("signup"))
+        except HashPoolBusy:
+            flash("The server is busy right now. Please try again in a moment.", "danger")
+            return redirect(url_for("signup"))
         except Exception as e:
             flash("Error creating account: " + str(e), "danger")
             return redirect(url_for("signup"))
@@ -89,13 +145,15 @@ def login():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
 
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM users WHERE username = ?", (username,))
-        user = cur.fetchone()
-        conn.close()
+        user = db.get_user_by_username(username)
+
+        try:
+            valid = bool(user) and hasher.verify_password(user["password_hash"], password)
+        except HashPoolBusy:
+            flash("The server is busy right now. Please try again in a moment.", "danger")
+            return redirect(url_for("login"))
 
-        if user and check_password_hash(user["password_hash"], password):
+        if valid:
             session["user_id"] = user["id"]
             session["username"] = user["username"]
             flash("Logged in successfully.", "success")
@@ -116,33 +174,92 @@ def logout():
 # Chat / TTS helpers (kept your logic)
 # ----------------------
 def generate_tts_audio(response_text, lang):
-    """Generate a unique MP3 file and return its /static/ path."""
+    """Return the /static/ path of the MP3 for (text, lang); synthesizes it only once."""
     try:
-        audio_dir = os.path.join(app.root_path, "static", "audio")
-        os.makedirs(audio_dir, exist_ok=True)
-
-        filename = f"response_{int(time.time())}_{uuid.uuid4().hex[:6]}.mp3"
-        audio_path = os.path.join(audio_dir, filename)
-
-        print(f"🎧 Generating TTS in language: {lang}")
-        # speak signature expected: speak(text, lang_code=..., output_path=...)
-        # (your tts.py should match this signature)
-        success = speak(response_text, lang_code=lang, output_path=audio_path)
-
-        # small sleep to ensure file is flushed to disk
-        time.sleep(0.4)
-
-        if not success or not os.path.exists(audio_path):
-            print("❌ TTS failed or file not found.")
+        def synthesize(audio_path):
+            logger.debug(f"🎧 Generating TTS in language: {lang}")
+            # speak signature expected: speak(text, lang_code=..., output_path=...)
+            # (your tts.py should match this signature)
+            return speak(response_text, lang_code=lang, output_path=audio_path)
+
+        # another worker rendering the same file holds the lock; get_or_create
+        # then finds its MP3 instead of synthesizing it again
+        audio_url, _ = tts_flight.do(audio_store.key_for(response_text, lang),
+                                     lambda: audio_store.get_or_create(response_text, lang, synthesize))
+        if not audio_url:
+            logger.warning("❌ TTS failed or file not found.")
             return None
 
-        print(f"✅ Audio file ready at {audio_path}")
-        return f"/static/audio/{filename}"
+        logger.debug(f"✅ Audio file ready at {audio_url}")
+        return audio_url
 
     except Exception as e:
-        print("TTS generation error:", e)
+        logger.error("TTS generation error: %s", e)
         return None
 
+# MP3s are rendered off the request thread; /ask returns a job id to poll
+audio_jobs = AudioJobs(audio_store, generate_tts_audio)
+
+def request_audio(text, lang, queue=True):
+    """
+    Return (audio_url, audio_job): the URL if the MP3 already exists, else a
+    job id (or no job at all with queue=False).
+    """
+    audio_url = audio_store.lookup(text, lang)
+    if audio_url or not queue:
+        return audio_url, None
+    return None, audio_jobs.submit(text, lang)
+
+# ----------------------
+# Health / readiness
+# ----------------------
+@app.route("/health")
+def health():
+    """Always 200 once the app is up; reports whether the QA model has loaded yet."""
+    return jsonify({
+        "status": "ok",
+        "qa_model": qa_model.status(),
+        "qa_batcher": qa_batcher.stats(),
+        "semantic": semantic.stats(),
+        "kb": knowledge_store.stats() if knowledge_store else {"version": KB.version, "entries": len(KB.snapshot)},
+        "response_cache": response_cache.stats(),
+        "coalescing": {"ask": answer_flight.stats(), "tts": tts_flight.stats()},
+        "audio_store": audio_store.stats(),
+        "audio_jobs": audio_jobs.stats(),
+        "tts": tts_stats(),
+        "prerendered": prerendered.stats(),
+        "password_hashing": hasher.stats(),
+        "speech_recognition": recognizer_pool.stats(),
+        "translation": translator.stats(),
+        "query_log": query_log.stats(),
+        "latency": metrics.summary(),
+        "degraded": metrics.degradations(),
+    })
+
+# component counters exported next to the latency histograms
+for _name, _stats in (
+    ("qa_batcher", qa_batcher.stats),
+    ("semantic", semantic.stats),
+    ("response_cache", response_cache.stats),
+    ("coalescing_ask", answer_flight.stats),
+    ("coalescing_tts", tts_flight.stats),
+    ("audio_store", audio_store.stats),
+    ("audio_jobs", audio_jobs.stats),
+    ("tts", tts_stats),
+    ("password_hashing", hasher.stats),
+    ("speech_recognition", recognizer_pool.stats),
+    ("translation", translator.stats),
+    ("query_log", query_log.stats),
+):
+    metrics.register_stats(_name, _stats)
+if knowledge_store:
+    metrics.register_stats("kb", knowledge_store.stats)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Per-stage / per-language latency histograms in the Prometheus text format."""
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ----------------------
 # Protected index (chat)
 # ----------------------
@@ -152,6 +269,137 @@ def index():
         return redirect(url_for("login"))
     return render_template("index.html")
 
+# ----------------------
+# Answer + translate + TTS, through the response cache
+# ----------------------
+def cached_response(query, language, queue_audio=True, trace=None):
+    """Return (cache key, response): the response is None unless it was cached."""
+    key = ResponseCache.make_key(normalize(query), language, KB.version)
+    cached = response_cache.get(key)
+    if cached is None:
+        return key, None
+    if trace is not None:
+        trace.set_answer(cached.get("key"), cached.get("tier"), cached.get("score"), "cache")
+    rendered = prerendered.get(cached["key"], language, cached["answer"]) if cached.get("key") else None
+    if rendered is not None:
+        return key, rendered + (None,)
+    # the MP3 may have been evicted since; it is queued again if so
+    return key, (cached["response"],) + request_audio(cached["response"], language, queue_audio)
+
+def prerendered_response(key, answer, language):
+    """KB hit rendered ahead of time: no translator or TTS call at all. None otherwise."""
+    rendered = prerendered.get(answer.key, language, answer.text) if answer.key else None
+    if rendered is None:
+        return None
+    translated_text, audio_url = rendered
+    if answer.tier != "degraded":
+        response_cache.put(key, {
+            "key": answer.key, "tier": answer.tier, "score": answer.score,
+            "answer": answer.text, "response": translated_text, "audio": audio_url,
+        })
+    return translated_text, audio_url, None
+
+def translate_answer(response_text, language):
+    """Translate the English answer to the selected language (if required); English past the deadline or when busy."""
+    if language == "en":
+        return response_text
+    try:
+        return translator.translate(response_text, target=language)
+    except TranslationTimeout as e:
+        logger.warning("Serving the English answer: %s", e)
+        metrics.degraded("translate", e.reason)
+        return response_text
+
+def translate_query(query, language):
+    """A voice query in English for the lookup; the original words past the deadline or when busy."""
+    if language == "en":
+        return query
+    try:
+        return translator.translate(query, target="en")
+    except TranslationTimeout as e:
+        logger.warning("Looking up the untranslated query: %s", e)
+        metrics.degraded("translate_query", e.reason)
+        return query
+
+def cacheable(answer, language, translated_text):
+    """
+    Don't pin the "model still loading" fallback, an answer degraded by a
+    saturated QA stage or an untranslated one (translation deadline) in the cache.
+    """
+    if answer.text == FALLBACK_MESSAGE or answer.tier == "degraded":
+        return False
+    return language == "en" or translated_text != answer.text
+
+def finish_response(key, answer, language, translated_text, queue_audio=True):
+    """Queue TTS for the translated text (if not stored yet) and cache the response."""
+    audio_url, audio_job = request_audio(translated_text, language, queue_audio)
+
+    if cacheable(answer, language, translated_text):
+        response_cache.put(key, {
+            "key": answer.key,
+            "tier": answer.tier,
+            "score": answer.score,
+            "answer": answer.text,
+            "response": translated_text,
+            "audio": audio_store.url_for(audio_store.filename_for(translated_text, language)),
+        })
+    return translated_text, audio_url, audio_job
+
+def recheck_response(query, language, trace, queue_audio=True):
+    """After waiting on another worker's lock: its response, if a shared cache has it."""
+    _, response = cached_response(query, language, queue_audio, trace=trace)
+    return (response, None) if response is not None else None
+
+def coalesced(trace, answer):
+    """A follower got the leader's response: record what the leader answered with."""
+    if answer is not None:
+        trace.set_answer(answer.key, answer.tier, answer.score, "coalesced")
+    else:
+        trace.source = "coalesced"
+
+def build_response(query, language, trace=None):
+    """
+    Return (translated_text, audio_url, audio_job) for `query`, reusing cached
+    responses. Exactly one of audio_url / audio_job is set: the job id is
+    returned when the MP3 still has to be rendered. `trace` (a RequestTrace)
+    collects the matched tier and per-stage timings for the query log.
+    """
+    trace = trace if trace is not None else RequestTrace("internal", query, language)
+    trace.lookup = normalize(query)
+    with trace.stage("cache"):
+        key, response = cached_response(query, language, trace=trace)
+    if response is not None:
+        return response
+
+    # the same query arriving again while it is being answered waits for that
+    # answer instead of running the lookup, translation and TTS once more
+    (response, answer), shared = answer_flight.do(
+        key, lambda: compute_response(key, query, language, trace),
+        recheck=lambda: recheck_response(query, language, trace))
+    if shared:
+        coalesced(trace, answer)
+    return response
+
+def compute_response(key, query, language, trace):
+    """build_response after a cache miss; returns (response, answer)."""
+    # Step 1: Get English response (AI logic lives in utils.ai_engine.get_answer)
+    with trace.stage("answer"):
+        answer = find_answer(query)
+    with trace.stage("prerendered"):
+        response = prerendered_response(key, answer, language)
+    if response is not None:
+        trace.set_answer(answer.key, answer.tier, answer.score, "prerendered")
+        return response, answer
+    trace.set_answer(answer.key, answer.tier, answer.score, "live")
+
+    # Step 2: Translate to selected language (if required)
+    with trace.stage("translate"):
+        translated_text = translate_answer(answer.text, language)
+
+    # Step 3: Generate TTS in the same language (in the background if not stored yet)
+    with trace.stage("audio"):
+        return finish_response(key, answer, language, translated_text), answer
+
 # ----------------------
 # Ask & Speak endpoints (unchanged behaviour, integrated with translator)
 # ----------------------
@@ -163,77 +411,243 @@ def ask():
     if not query:
         return jsonify({"response": "Please enter a question.", "audio": None})
 
+    metrics.set_language(language)
+    trace = RequestTrace("ask", query, language)
     try:
-        # Step 1: Get English response (AI logic lives in utils.ai_engine.get_answer)
-        response_text = get_answer(query)
-
-        # Step 2: Translate to selected language (if required)
-        translated_text = (
-            GoogleTranslator(source="auto", target=language).translate(response_text)
-            if language != "en"
-            else response_text
-        )
-
-        # Step 3: Generate TTS in the same language
-        audio_url = generate_tts_audio(translated_text, language)
-
-        return jsonify({"response": translated_text, "audio": audio_url})
+        translated_text, audio_url, audio_job = build_response(query, language, trace)
+        return jsonify({"response": translated_text, "audio": audio_url, "audio_job": audio_job})
 
     except Exception as e:
-        print("Error in /ask:", e)
+        logger.error("Error in /ask: %s", e)
+        trace.error = str(e)
         return jsonify({"response": f"Error: {e}", "audio": None})
-
-@app.route("/speak", methods=["GET"])
+    finally:
+        finish_trace(trace)
+
+def read_limited(stream, limit):
+    """Read `stream` to the end, but no more than limit + 1 bytes (enough to tell it was too big)."""
+    chunks, size = [], 0
+    while size <= limit:
+        chunk = stream.read(min(64 * 1024, limit + 1 - size))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks)
+
+def read_uploaded_audio():
+    """(bytes, content type) of the clip: a multipart "audio" file or the raw request body."""
+    upload = request.files.get("audio")
+    if upload is not None:
+        return read_limited(upload.stream, STT_MAX_BYTES), upload.mimetype
+    return read_limited(request.stream, STT_MAX_BYTES), request.mimetype
+
+@app.route("/speak", methods=["GET", "POST"])
 def speak_to_text():
+    """
+    Voice query. POST: a clip recorded in the browser, as a multipart "audio"
+    file or as the raw (possibly chunked) request body. GET: the old
+    server-side microphone capture, for running the app on a desktop.
+    """
+    language = request.values.get("language", "en")
+    trace = RequestTrace("speak", lang=language)
     try:
-        language = request.args.get("language", "en")
-        print(f"🎙️ Listening for {language} input...")
+        metrics.set_language(language)
 
         # Step 1: Capture voice
-        query = listen()
+        with trace.stage("listen"):
+            if request.method == "POST":
+                audio, content_type = read_uploaded_audio()
+                query = recognizer_pool.transcribe(audio, content_type, language)
+            else:
+                logger.debug(f"🎙️ Listening for {language} input...")
+                query = listen()
+        trace.query = query
 
         if not query or "Error" in query:
+            trace.error = "speech not recognized"
             return jsonify({
                 "query": query,
                 "response": "Sorry, I couldn’t understand your speech.",
                 "audio": None
             })
 
-        print(f"🗣️ You said ({language}): {query}")
+        logger.debug(f"🗣️ You said ({language}): {query}")
 
         # Step 2: Translate voice query to English for AI processing (if user used hi/kn)
         if language != "en":
-            translated_query = GoogleTranslator(source="auto", target="en").translate(query)
-            print(f"🌐 Translated to English: {translated_query}")
+            with trace.stage("translate_query"):
+                translated_query = translate_query(query, language)
+            logger.debug(f"🌐 Translated to English: {translated_query}")
         else:
             translated_query = query
 
-        # Step 3: Get AI answer in English
-        response_text = get_answer(translated_query)
+        # Steps 3-5: English answer, translated back, spoken (cached per query + language)
+        translated_response, audio_data_url, audio_job = build_response(translated_query, language, trace)
 
-        # Step 4: Translate AI response back to user's selected language
-        if language != "en":
-            translated_response = GoogleTranslator(source="auto", target=language).translate(response_text)
-        else:
-            translated_response = response_text
-
-        # Step 5: Generate speech in selected language
-        audio_data_url = generate_tts_audio(translated_response, language)
-
-        print(f"✅ Responding in {language}")
+        logger.debug(f"✅ Responding in {language}")
         return jsonify({
             "query": query,
             "response": translated_response,
-            "audio": audio_data_url
+            "audio": audio_data_url,
+            "audio_job": audio_job
         })
 
+    except AudioRejected as e:
+        trace.error = str(e)
+        return jsonify({
+            "query": None,
+            "response": "Sorry, I couldn’t understand your speech.",
+            "audio": None
+        }), 400
+    except RecognizerBusy as e:
+        trace.error = str(e)
+        return jsonify({
+            "query": None,
+            "response": "The server is busy right now. Please try again in a moment.",
+            "audio": None
+        }), 503
     except Exception as e:
-        print("🎤 Voice processing error:", e)
+        logger.error("🎤 Voice processing error: %s", e)
+        trace.error = str(e)
         return jsonify({
             "query": None,
             "response": f"Error: {e}",
             "audio": None
         })
+    finally:
+        finish_trace(trace)
+
+# ----------------------
+# Streaming answers (server-sent events)
+# ----------------------
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_response(query, language, trace):
+    """
+    Yield the answer as server-sent events, each as soon as it is ready:
+
+        answer       the English answer (not sent for cached responses); it
+                     comes right before the translation, since the lookup and
+                     translation run as one coalesced step
+        translation  the answer in `language`
+        audio        {"index", "url"} per audio segment, in playback order
+        done         {"segments": n}
+
+    When the whole answer's MP3 isn't stored yet, the translated text is
+    split into sentences and each one is synthesized as its own job, so the
+    first sentence can play while the rest are still being rendered.
+    """
+    trace.lookup = normalize(query)
+    with trace.stage("cache"):
+        key, response = cached_response(query, language, queue_audio=False, trace=trace)
+    if response is None:
+        # identical questions in flight wait for one lookup + translation, as
+        # in build_response; a flight of its own, since no whole-answer audio is queued
+        (response, answer), shared = answer_flight.do(
+            f"stream|{key}", lambda: compute_stream_response(key, query, language, trace),
+            recheck=lambda: recheck_response(query, language, trace, queue_audio=False))
+        if shared:
+            coalesced(trace, answer)
+        if answer is not None:
+            yield sse_event("answer", {"text": answer.text})
+
+    translated_text, audio_url, _ = response
+    yield sse_event("translation", {"text": translated_text})
+
+    # "first_audio" is time to the first audio event, from the start of the request
+    if audio_url:
+        trace.stages["first_audio"] = trace.total_ms()
+        yield sse_event("audio", {"index": 0, "url": audio_url})
+        yield sse_event("done", {"segments": 1})
+        return
+
+    # all segments are queued up front; the worker pool renders them in order
+    jobs = [audio_jobs.submit(segment, language) for segment in split_for_tts(translated_text)]
+    sent = 0
+    for job_id in jobs:
+        status = audio_jobs.status(job_id, wait=STREAM_AUDIO_WAIT)
+        if status and status["audio"]:
+            if not sent:
+                trace.stages["first_audio"] = trace.total_ms()
+            yield sse_event("audio", {"index": sent, "url": status["audio"]})
+            sent += 1
+    yield sse_event("done", {"segments": sent})
+
+def compute_stream_response(key, query, language, trace):
+    """stream_response after a cache miss, without queuing audio; returns (response, answer)."""
+    with trace.stage("answer"):
+        answer = find_answer(query)
+    with trace.stage("prerendered"):
+        response = prerendered_response(key, answer, language)
+    trace.set_answer(answer.key, answer.tier, answer.score, "prerendered" if response else "live")
+    if response is None:
+        with trace.stage("translate"):
+            translated_text = translate_answer(answer.text, language)
+        response = finish_response(key, answer, language, translated_text, queue_audio=False)
+    return response, answer
+
+@app.route("/ask/stream")
+def ask_stream():
+    """/ask as an event stream: GET /ask/stream?query=...&language=..."""
+    query = request.args.get("query", "")
+    language = request.args.get("language", "en")
+
+    def events():
+        if not query:
+            yield sse_event("translation", {"text": "Please enter a question."})
+            yield sse_event("done", {"segments": 0})
+            return
+        metrics.set_language(language)
+        trace = RequestTrace("ask/stream", query, language)
+        try:
+            yield from stream_response(query, language, trace)
+        except Exception as e:
+            logger.error("Error in /ask/stream: %s", e)
+            trace.error = str(e)
+            yield sse_event("error", {"text": f"Error: {e}"})
+        finally:
+            finish_trace(trace)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ----------------------
+# Background audio jobs
+# ----------------------
+@app.route("/audio/status/<job_id>")
+def audio_status(job_id):
+    """Long-poll an audio job: waits up to ?wait= seconds (max 30) for the MP3."""
+    wait = min(request.args.get("wait", 0, type=float), 30.0)
+    status = audio_jobs.status(job_id, wait=wait)
+    if status is None:
+        return jsonify({"status": "unknown", "audio": None}), 404
+    return jsonify(status)
+
+# ----------------------
+# Audio files: immutable URLs, content ETags, Range requests
+# ----------------------
+def send_audio(directory, name):
+    """
+    A stored MP3 / Ogg file. Its name is a hash of (lang, text), so the URL
+    never changes meaning: browsers and proxies may keep it for a year, and
+    revalidation (If-None-Match) and seeking (Range) are answered by send_file.
+    """
+    path = audio_path(directory, name)
+    if path is None:
+        abort(404)
+    response = send_file(path, conditional=True, etag=etag_for(path), max_age=AUDIO_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={AUDIO_MAX_AGE}, immutable"
+    return response
+
+@app.route("/audio/<name>")
+def audio_file(name):
+    return send_audio(audio_store.directory, name)
+
+@app.route("/audio/kb/<name>")
+def prerendered_audio_file(name):
+    return send_audio(prerendered.audio_dir, name)
 
 # ----------------------
 # Run
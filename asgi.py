@@ -0,0 +1,216 @@
+"""
+ASGI entry point: async /ask and /speak, everything else served by the Flask app.
+
+    uvicorn asgi:app --workers 2
+
+The Flask app ties up a sync worker for the whole /ask chain. Here a worker
+keeps serving other requests while one waits: blocking network calls
+(translation, the server-side microphone) and disk lookups (response cache,
+pre-rendered answers) run on an I/O thread pool and are awaited, uploaded
+voice clips are awaited on the recognition pool, the CPU-bound lookup (fuzzy
+matching, the roberta QA fallback) runs on a small CPU pool, and audio keeps
+rendering on the background job pool while the text response goes out. Cache, KB, translator and audio
+store are the same objects the Flask app uses.
+
+    ASYNC_CPU_WORKERS   threads for find_answer (default: CPU count)
+    ASYNC_IO_WORKERS    threads for blocking network and disk calls (default 64)
+"""
+import asyncio
+import contextvars
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+import app as flask_app
+from utils import metrics
+from utils.ai_engine import find_answer
+from utils.query_log import RequestTrace
+from utils.recognition import STT_MAX_BYTES, AudioRejected, RecognizerBusy
+from utils.stt import listen
+
+ASYNC_CPU_WORKERS = int(os.environ.get("ASYNC_CPU_WORKERS", str(os.cpu_count() or 2)))
+ASYNC_IO_WORKERS = int(os.environ.get("ASYNC_IO_WORKERS", "64"))
+
+logger = logging.getLogger(__name__)
+
+cpu_pool = ThreadPoolExecutor(max_workers=ASYNC_CPU_WORKERS, thread_name_prefix="cpu")
+io_pool = ThreadPoolExecutor(max_workers=ASYNC_IO_WORKERS, thread_name_prefix="io")
+
+
+async def run_in(pool, fn, *args):
+    # in the request's context, so stage timings get the request's language
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(pool, ctx.run, fn, *args)
+
+
+async def build_response(query, language, trace):
+    """Async twin of app.build_response: same stages, blocking ones off the event loop."""
+    trace.lookup = flask_app.normalize(query)
+    with trace.stage("cache"):
+        # the cache may be SQLite-backed (RESPONSE_CACHE_DB) and the hit's MP3 is stat'ed
+        key, response = await run_in(io_pool, flask_app.cached_response, query, language, True, trace)
+    if response is not None:
+        return response
+
+    # same single flight as the Flask app: followers await the leader's
+    # future; the leader takes the cross-process lock on an I/O thread
+    flight = flask_app.answer_flight
+    future, leader = flight.begin(key)
+    if not leader:
+        try:
+            response, answer = await asyncio.wait_for(asyncio.wrap_future(future), flight.timeout)
+        except asyncio.TimeoutError:
+            flight.count("timeouts")
+            response, answer = await compute_response(key, query, language, trace)
+            return response
+        flask_app.coalesced(trace, answer)
+        return response
+    try:
+        lock = flight.process_lock(key)
+        waited = await run_in(io_pool, lock.acquire)
+        try:
+            result = None
+            if waited:
+                flight.count("lock_waits")
+                result = await run_in(io_pool, flask_app.recheck_response, query, language, trace)
+                if result is not None:
+                    flight.count("recheck_hits")
+            if result is None:
+                result = await compute_response(key, query, language, trace)
+        finally:
+            lock.release()
+    except BaseException as e:
+        flight.finish(key, future, error=e)
+        raise
+    flight.finish(key, future, result)
+    return result[0]
+
+
+async def compute_response(key, query, language, trace):
+    """Async twin of app.compute_response; returns (response, answer)."""
+    # Step 1: English answer (CPU-bound)
+    with trace.stage("answer"):
+        answer = await run_in(cpu_pool, find_answer, query)
+    with trace.stage("prerendered"):
+        response = await run_in(io_pool, flask_app.prerendered_response, key, answer, language)
+    if response is not None:
+        trace.set_answer(answer.key, answer.tier, answer.score, "prerendered")
+        return response, answer
+    trace.set_answer(answer.key, answer.tier, answer.score, "live")
+
+    # Step 2: translation (network-bound)
+    with trace.stage("translate"):
+        translated_text = await run_in(io_pool, flask_app.translate_answer, answer.text, language)
+
+    # Step 3: TTS is queued on the audio job pool, not awaited
+    with trace.stage("audio"):
+        return flask_app.finish_response(key, answer, language, translated_text), answer
+
+
+async def ask(request):
+    form = await request.form()
+    query = form.get("query", "")
+    language = form.get("language", "en")
+
+    if not query:
+        return JSONResponse({"response": "Please enter a question.", "audio": None})
+
+    metrics.set_language(language)
+    trace = RequestTrace("ask", query, language)
+    try:
+        translated_text, audio_url, audio_job = await build_response(query, language, trace)
+        return JSONResponse({"response": translated_text, "audio": audio_url, "audio_job": audio_job})
+    except Exception as e:
+        logger.error("Error in /ask: %s", e)
+        trace.error = str(e)
+        return JSONResponse({"response": f"Error: {e}", "audio": None})
+    finally:
+        flask_app.finish_trace(trace)
+
+
+async def read_uploaded_audio(request):
+    """(bytes, content type, form) of the clip: a multipart "audio" file or the raw (streamed) body."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        form = await request.form()
+        upload = form.get("audio")
+        data = await upload.read(STT_MAX_BYTES + 1) if upload is not None else b""
+        return data, getattr(upload, "content_type", None), form
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > STT_MAX_BYTES:
+            break
+    return b"".join(chunks), content_type, {}
+
+
+async def speak(request):
+    language = request.query_params.get("language", "en")
+    trace = RequestTrace("speak", lang=language)
+    try:
+        if request.method == "POST":
+            audio, content_type, form = await read_uploaded_audio(request)
+            language = form.get("language", language)
+            trace.lang = language
+        metrics.set_language(language)
+        with trace.stage("listen"):
+            if request.method == "POST":
+                # the pool's own threads do the work; nothing blocks the event loop
+                future = flask_app.recognizer_pool.submit(audio, content_type, language)
+                try:
+                    query = await asyncio.wait_for(asyncio.wrap_future(future), flask_app.recognizer_pool.timeout)
+                except asyncio.TimeoutError:
+                    raise RecognizerBusy("speech recognition timed out") from None
+            else:
+                query = await run_in(io_pool, listen)
+        trace.query = query
+
+        if not query or "Error" in query:
+            trace.error = "speech not recognized"
+            return JSONResponse({
+                "query": query,
+                "response": "Sorry, I couldn’t understand your speech.",
+                "audio": None
+            })
+
+        if language != "en":
+            with trace.stage("translate_query"):
+                translated_query = await run_in(io_pool, flask_app.translate_query, query, language)
+        else:
+            translated_query = query
+
+        translated_response, audio_url, audio_job = await build_response(translated_query, language, trace)
+        return JSONResponse({
+            "query": query,
+            "response": translated_response,
+            "audio": audio_url,
+            "audio_job": audio_job
+        })
+    except AudioRejected as e:
+        trace.error = str(e)
+        return JSONResponse({"query": None, "response": "Sorry, I couldn’t understand your speech.",
+                             "audio": None}, status_code=400)
+    except RecognizerBusy as e:
+        trace.error = str(e)
+        return JSONResponse({"query": None, "response": "The server is busy right now. Please try again in a moment.",
+                             "audio": None}, status_code=503)
+    except Exception as e:
+        logger.error("🎤 Voice processing error: %s", e)
+        trace.error = str(e)
+        return JSONResponse({"query": None, "response": f"Error: {e}", "audio": None})
+    finally:
+        flask_app.finish_trace(trace)
+
+
+app = Starlette(routes=[
+    Route("/ask", ask, methods=["POST"]),
+    Route("/speak", speak, methods=["GET", "POST"]),
+    # login, pages, static files, /health, /audio/status: the Flask app
+    Mount("/", app=WSGIMiddleware(flask_app.app)),
+])
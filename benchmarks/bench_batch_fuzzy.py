@@ -0,0 +1,109 @@
+"""
+Batch lookup: find_answer in a loop vs find_answers (rapidfuzz cdist).
+
+Generates misspelled / reworded queries for the real KB and for KBs padded
+with synthetic keys, answers them both ways and checks every answer agrees.
+The QA tier is switched off so only the exact, fuzzy and semantic stages are
+timed; the per-query loop runs on a sample at the larger sizes and is
+extrapolated.
+
+Both paths compute one WRatio per (query, key), so the batch is no faster in
+kind: on a single core it measured 1.8x at the 21-key KB (0.5 s for 20,000
+queries) but only 1.3-1.4x at 500-2,000 keys, where 100,000 queries still
+take minutes (~225 s at 2,000 keys). cdist runs on every core, so the batch
+time divides by the core count; the loop's does not.
+
+Run from the project root:
+    python -m benchmarks.bench_batch_fuzzy [--queries 100000] [--sizes 0,500,2000]
+"""
+import argparse
+import os
+import random
+import time
+
+from utils import ai_engine
+from utils.ai_engine import BANKING_CONTEXT, EXAMPLE_QUESTIONS, FALLBACK_MESSAGE, KB, Answer, find_answer, find_answers
+
+FILLER = (
+    "agri bond branch cheque clearing crop dairy deposit district gold kisan "
+    "ledger micro mudra nominee overdraft pension rural scheme self help "
+    "subsidy tractor village wage"
+).split()
+PREFIXES = ("", "what is ", "tell me about ", "how does ", "explain ", "info on ")
+NOISE = ("please", "sir", "now", "my", "bank", "today", "quickly")
+LOOP_SAMPLE = 2000
+
+
+def padded_kb(size, rng):
+    kb = dict(BANKING_CONTEXT)
+    i = 0
+    while len(kb) < len(BANKING_CONTEXT) + size:
+        kb[f"{' '.join(rng.sample(FILLER, rng.randint(2, 3)))} {i}"] = f"Topic {i}.\nFiller entry {i}."
+        i += 1
+    return kb
+
+
+def typo(word, rng):
+    if len(word) < 4:
+        return word
+    i = rng.randrange(len(word) - 1)
+    kind = rng.random()
+    if kind < 0.4:
+        return word[:i] + word[i + 1:]
+    if kind < 0.8:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice("aeiou") + word[i:]
+
+
+def make_queries(keys, n, rng):
+    queries = []
+    for _ in range(n):
+        words = [typo(w, rng) for w in rng.choice(keys).split()]
+        if rng.random() < 0.3:
+            words.append(rng.choice(NOISE))
+        if rng.random() < 0.1:
+            words = [rng.choice(NOISE) for _ in range(3)]
+        queries.append(rng.choice(PREFIXES) + " ".join(words))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--sizes", default="0,500,2000", help="synthetic keys added to the KB")
+    args = parser.parse_args()
+
+    # misses get the fallback instead of the QA model
+    ai_engine._read_answer = lambda query, kb: Answer(FALLBACK_MESSAGE, None, "fallback", None)
+    rng = random.Random(7)
+
+    print(f"{os.cpu_count()} core(s)")
+    print(f"{'keys':>7} {'queries':>8} {'loop s':>9} {'batch s':>8} {'speedup':>8}  agree  tiers")
+    for extra in (int(s) for s in args.sizes.split(",")):
+        KB.update(padded_kb(extra, rng), EXAMPLE_QUESTIONS)
+        # semantic index built up front so both paths see it from the first query
+        ai_engine.semantic.rebuild(KB.snapshot)
+        keys = KB.snapshot.choices
+        queries = make_queries(keys, args.queries, rng)
+
+        start = time.perf_counter()
+        batch = find_answers(queries)
+        batch_s = time.perf_counter() - start
+
+        sample = queries if len(keys) * len(queries) <= 2_000_000 else queries[:LOOP_SAMPLE]
+        start = time.perf_counter()
+        loop = [find_answer(q) for q in sample]
+        loop_s = (time.perf_counter() - start) * len(queries) / len(sample)
+
+        agree = loop == batch[:len(loop)]
+        tiers = {}
+        for a in batch:
+            tiers[a.tier] = tiers.get(a.tier, 0) + 1
+        estimated = "~" if len(sample) < len(queries) else " "
+        print(f"{len(keys):>7} {len(queries):>8} {estimated}{loop_s:>8.2f} {batch_s:>8.2f} "
+              f"{loop_s / batch_s:>7.1f}x  {agree}  {tiers}")
+    KB.update(BANKING_CONTEXT, EXAMPLE_QUESTIONS)
+
+
+if __name__ == "__main__":
+    main()
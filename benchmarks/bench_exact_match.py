@@ -0,0 +1,94 @@
+"""
+Microbenchmark: exact-match stage of get_answer.
+
+Compares the old per-key regex loop with utils.kb_index.KeywordIndex on
+synthetic KBs of 20, 2k and 50k keys, and checks both pick the same key.
+
+Run from the project root:
+    python -m benchmarks.bench_exact_match
+"""
+import random
+import re
+import time
+
+from utils.kb_index import KeywordIndex
+
+WORDS = (
+    "account atm balance bank card cash cheque credit debit deposit digital emi "
+    "fixed fraud gold home insurance interest kyc limit loan microfinance mobile "
+    "net otp payment pension pin recurring savings scheme score security tax "
+    "transfer upi vehicle wallet"
+).split()
+
+SIZES = (20, 2000, 50000)
+N_QUERIES = 200
+
+
+def normalize(text):
+    # same as utils.ai_engine.normalize (not imported to avoid loading the QA model)
+    return re.sub(r'\s+', ' ', (text or "").strip().lower())
+
+
+def legacy_match(keys, q):
+    """The pre-index loop from get_answer."""
+    exact_matches = []
+    for key in keys:
+        key_norm = normalize(key)
+        pattern = r'\b' + re.escape(key_norm) + r'\b'
+        if re.search(pattern, q):
+            exact_matches.append(key)
+    if exact_matches:
+        return max(exact_matches, key=lambda k: len(k))
+    return None
+
+
+def make_keys(n, rng):
+    keys = {}
+    suffix = 0
+    while len(keys) < n:
+        words = rng.sample(WORDS, rng.randint(1, 3))
+        if len(keys) >= len(WORDS) ** 2:
+            suffix += 1
+            words.append(f"t{suffix}")
+        keys[" ".join(words)] = None
+    return list(keys)
+
+
+def make_queries(keys, rng):
+    queries = []
+    for _ in range(N_QUERIES):
+        words = rng.sample(WORDS, 4)
+        if rng.random() < 0.5:
+            words.insert(2, rng.choice(keys))
+        queries.append(normalize("what is " + " ".join(words) + "?"))
+    return queries
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries), results
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'keys':>7} {'build ms':>9} {'legacy us/q':>12} {'index us/q':>11} {'speedup':>8}  agree")
+    for size in SIZES:
+        keys = make_keys(size, rng)
+        queries = make_queries(keys, rng)
+        # the legacy loop is too slow to run the full query set at 50k keys
+        legacy_queries = queries if size < 10000 else queries[:20]
+
+        start = time.perf_counter()
+        index = KeywordIndex(keys, normalize)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        legacy_t, legacy_res = timed(lambda q: legacy_match(keys, q), legacy_queries)
+        index_t, index_res = timed(index.longest_match, queries)
+        agree = legacy_res == index_res[:len(legacy_res)]
+        print(f"{size:>7} {build_ms:>9.1f} {legacy_t * 1e6:>12.1f} {index_t * 1e6:>11.1f} "
+              f"{legacy_t / index_t:>7.0f}x  {agree}")
+
+
+if __name__ == "__main__":
+    main()
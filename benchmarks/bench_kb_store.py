@@ -0,0 +1,101 @@
+"""
+Knowledge store at scale: import, hot reload, retrieval and per-worker memory.
+
+Builds a temporary store with N synthetic entries (on top of BANKING_CONTEXT)
+and reports:
+  * bulk import time and the time to re-sync after a one-entry edit
+    (KnowledgeBase.update rebuilds and swaps the snapshot);
+  * top-3 passage lookup latency, FTS5 vs the in-memory BM25 index;
+  * Python heap held by one snapshot with each retriever (tracemalloc),
+    i.e. what every worker process pays for its copy.
+
+Run from the project root:
+    python -m benchmarks.bench_kb_store [--entries 20000]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from utils.ai_engine import BANKING_CONTEXT
+from utils.kb_store import KnowledgeStore
+from utils.knowledge_base import KBSnapshot, KnowledgeBase
+
+WORDS = (
+    "account agriculture balance branch cash cheque crop dairy deposit district "
+    "farmer fee gold insurance interest kisan ledger loan micro mobile nominee "
+    "overdraft pension premium rural savings scheme subsidy tractor village wage"
+).split()
+QUERIES = ["how do farmers get crop insurance", "gold loan interest", "pension scheme for village",
+           "open savings account branch", "tractor loan subsidy", "nominee for deposit"]
+
+
+def synthetic_entries(n, rng):
+    # banking words plus a long tail of made-up ones, Zipf-weighted like real text
+    vocab = WORDS + [f"w{i}" for i in range(20000)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+    for i in range(n):
+        title = " ".join(rng.sample(WORDS, 3))
+        paragraphs = [" ".join(rng.choices(vocab, cum_weights=cum_weights, k=25)) + "." for _ in range(4)]
+        body = f"{title.title()} {i}.\n\n" + "\n\n".join(paragraphs)
+        yield f"{title} {i}", body, [f"what is {title}"]
+
+
+def heap_of(build):
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def lookup_us(retriever, repeats=50):
+    times = []
+    for _ in range(repeats):
+        for q in QUERIES:
+            start = time.perf_counter()
+            retriever.top_passages(q, 3)
+            times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=20000)
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = KnowledgeStore(os.path.join(tmp, "kb.db"))
+        store.init_schema()
+        start = time.perf_counter()
+        store.seed(BANKING_CONTEXT)
+        store.put_many(synthetic_entries(args.entries, rng))
+        print(f"import {args.entries} entries: {time.perf_counter() - start:.1f}s  {store.stats()}")
+
+        kb = KnowledgeBase(BANKING_CONTEXT)
+        start = time.perf_counter()
+        store.sync(kb)
+        print(f"initial sync (snapshot build + swap): {time.perf_counter() - start:.2f}s")
+
+        key = next(iter(kb.snapshot.kb))
+        store.put(key, kb.snapshot.kb[key] + "\n\nEdited.")
+        start = time.perf_counter()
+        store.sync(kb)
+        print(f"one-entry edit -> swapped snapshot: {time.perf_counter() - start:.2f}s")
+
+        content, questions, _ = store.load()
+        fts_snapshot, fts_bytes = heap_of(lambda: KBSnapshot(content, questions=questions,
+                                                              retriever=store.retriever()))
+        mem_snapshot, mem_bytes = heap_of(lambda: KBSnapshot(content, questions=questions))
+        print(f"\n{'retriever':<10} {'lookup us':>10} {'snapshot heap MB':>17}")
+        print(f"{'in-memory':<10} {lookup_us(mem_snapshot.retriever):>10.0f} {mem_bytes / 2**20:>17.1f}")
+        print(f"{'fts5':<10} {lookup_us(fts_snapshot.retriever):>10.0f} {fts_bytes / 2**20:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Startup time and RSS of the app for each QA_MODEL_MODE.
+
+Each mode runs in a fresh interpreter that imports `app` (what a Flask
+worker does at boot), then waits until the QA model is usable. Reports:
+    import s    time until the app can serve requests (/login, KB answers)
+    import MB   RSS at that point
+    ready s     time until the QA model is loaded
+    ready MB    RSS once the model is loaded
+
+Run from the project root:
+    python -m benchmarks.bench_model_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+MODES = ("eager", "lazy", "background")
+
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+import app
+out = {"import_s": time.perf_counter() - t0, "import_mb": rss_mb()}
+# a lazy worker only starts loading when the first query misses the KB
+app.qa_model.get(timeout=900)
+out["ready_s"] = time.perf_counter() - t0
+out["ready_mb"] = rss_mb()
+out["state"] = app.qa_model.state
+print(json.dumps(out))
+"""
+
+
+def run_mode(mode):
+    env = dict(os.environ, QA_MODEL_MODE=mode)
+    proc = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{mode} probe failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'mode':<11} {'import s':>9} {'import MB':>10} {'ready s':>8} {'ready MB':>9}  state")
+    for mode in MODES:
+        r = run_mode(mode)
+        print(f"{mode:<11} {r['import_s']:>9.2f} {r['import_mb']:>10.0f} "
+              f"{r['ready_s']:>8.2f} {r['ready_mb']:>9.0f}  {r['state']}")
+
+
+if __name__ == "__main__":
+    main()
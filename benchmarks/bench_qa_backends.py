@@ -0,0 +1,143 @@
+"""
+QA reader backends: accuracy vs latency vs memory.
+
+Each backend (utils/qa_backends.py) is loaded in its own subprocess, so the
+resident memory reported is that backend's alone. It then answers a fixed
+question set over the BM25 passages the app would give it:
+
+    load s     time to load (includes the one-off ONNX export / quantization
+               on the first run; run twice to see the cached load)
+    rss MB     peak resident memory of the process after answering
+    p50 / p95  single-question latency
+    batch/s    questions per second through the pipeline in batches of 8
+    EM / F1    exact match / token F1 against the reference answers
+    agree      share of answers identical to the fp32 torch answer
+
+Needs transformers + torch; the onnx backends also need optimum[onnxruntime].
+Run from the project root:
+    python -m benchmarks.bench_qa_backends [--backends torch,torch-int8,onnx,onnx-int8] [--repeat 3]
+"""
+import argparse
+import json
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+# (question, reference answer) over the built-in KB
+QUESTIONS = [
+    ("How long is a home loan repaid?", "20 years"),
+    ("What score improves approval chances?", "above 750"),
+    ("What should I never share?", "OTP"),
+    ("What is the cost of borrowing money?", "Interest"),
+    ("How much is deposited in the fixed deposit example?", "₹50,000"),
+    ("Which schemes support financial inclusion?", "Jan Dhan, PM Kisan, and Mudra"),
+    ("What do I need to set before sending money with UPI?", "UPI PIN"),
+    ("What is an example of a microfinance loan?", "buying a sewing machine"),
+    ("How often is savings interest compounded?", "quarterly"),
+    ("How much is saved monthly in the recurring deposit example?", "₹1,000"),
+    ("What does a current account usually not earn?", "interest"),
+    ("What lets you borrow money up to a preset limit?", "A credit card"),
+    ("What should you verify before confirming UPI payments?", "merchant name"),
+    ("What interest rate does the fixed deposit example earn?", "6.5%"),
+    ("What do secured loans usually have?", "lower interest rates"),
+    ("What does insurance protect against?", "losses"),
+]
+BATCH = 8
+
+
+def normalize_answer(text):
+    text = re.sub(r"[^\w₹%.,]+", " ", text.lower())
+    text = re.sub(r"\b(a|an|the)\b", " ", text)
+    return " ".join(text.replace(",", "").rstrip(".").split())
+
+
+def f1(prediction, reference):
+    pred, ref = normalize_answer(prediction).split(), normalize_answer(reference).split()
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if not common:
+        return 0.0
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def worker(backend, repeat):
+    """Load one backend, answer QUESTIONS, print a JSON result line."""
+    from utils.ai_engine import KB, QA_TOP_K
+    from utils.model_manager import QA_MODEL_NAME
+    from utils.qa_backends import load_qa_pipeline
+
+    start = time.perf_counter()
+    qa = load_qa_pipeline(QA_MODEL_NAME, backend)
+    load_seconds = time.perf_counter() - start
+
+    contexts = [" ".join(KB.snapshot.retriever.top_passages(q, QA_TOP_K)) for q, _ in QUESTIONS]
+    qa(question=QUESTIONS[0][0], context=contexts[0])  # warm-up
+
+    times, answers = [], []
+    for _ in range(repeat):
+        answers = []
+        for (question, _), context in zip(QUESTIONS, contexts):
+            t0 = time.perf_counter()
+            answers.append(qa(question=question, context=context)["answer"].strip())
+            times.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for i in range(0, len(QUESTIONS), BATCH):
+            qa(question=[q for q, _ in QUESTIONS[i:i + BATCH]], context=contexts[i:i + BATCH], batch_size=BATCH)
+    batch_rate = repeat * len(QUESTIONS) / (time.perf_counter() - t0)
+
+    times.sort()
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_seconds,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": statistics.median(times) * 1000,
+        "p95_ms": times[int(0.95 * (len(times) - 1))] * 1000,
+        "batch_rate": batch_rate,
+        "answers": answers,
+    }, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="torch,torch-int8,onnx,onnx-int8")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.worker, args.repeat)
+        return
+
+    results = []
+    for backend in args.backends.split(","):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_qa_backends", "--worker", backend, "--repeat", str(args.repeat)],
+            capture_output=True, text=True,
+        )
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode or not lines:
+            tail = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"{backend}: failed ({tail})")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    baseline = next((r["answers"] for r in results if r["backend"] == "torch"), None)
+    print(f"{'backend':<11} {'load s':>7} {'rss MB':>7} {'p50 ms':>7} {'p95 ms':>7} {'batch/s':>8} "
+          f"{'EM':>5} {'F1':>5} {'agree':>6}")
+    for r in results:
+        refs = [ref for _, ref in QUESTIONS]
+        em = sum(normalize_answer(a) == normalize_answer(ref) for a, ref in zip(r["answers"], refs)) / len(refs)
+        mean_f1 = sum(f1(a, ref) for a, ref in zip(r["answers"], refs)) / len(refs)
+        agree = (f"{sum(a == b for a, b in zip(r['answers'], baseline)) / len(refs):>6.0%}"
+                 if baseline else f"{'-':>6}")
+        print(f"{r['backend']:<11} {r['load_s']:>7.1f} {r['rss_mb']:>7.0f} {r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} "
+              f"{r['batch_rate']:>8.1f} {em:>5.0%} {mean_f1:>5.2f} {agree}")
+
+
+if __name__ == "__main__":
+    main()
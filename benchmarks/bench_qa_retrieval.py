@@ -0,0 +1,102 @@
+"""
+QA fallback latency: whole flattened KB vs BM25 retrieve-then-read.
+
+The real KB is padded with synthetic filler entries to 20 / 1k / 10k
+entries. For each size both paths answer a fixed question set; the
+reference answer is the old full-context answer on the real KB, and
+"agree" is the share of questions where a path returns that answer.
+
+The full-context path is only run up to --max-full entries, because it
+needs one forward pass per tokenizer window of the whole KB.
+
+Needs transformers + torch. Run from the project root:
+    python -m benchmarks.bench_qa_retrieval [--sizes 20,1000,10000] [--max-full 1000]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from utils.ai_engine import BANKING_CONTEXT, QA_TOP_K
+from utils.knowledge_base import KBSnapshot
+from utils.model_manager import qa_model
+
+QUESTIONS = [
+    "How long is a home loan repaid?",
+    "What score improves approval chances?",
+    "What should I never share?",
+    "What is the cost of borrowing money?",
+    "How much is deposited in the fixed deposit example?",
+    "Which schemes support financial inclusion?",
+    "What do I need to set before sending money with UPI?",
+    "What is microfinance loan example?",
+    "How often is savings interest compounded?",
+    "What should I keep for disputes?",
+]
+
+FILLER_WORDS = (
+    "orchard river lantern meadow copper harbor quartz willow canyon ember "
+    "glacier summit prairie falcon thistle marble lagoon cedar beacon tundra"
+).split()
+
+
+def padded_kb(size, rng):
+    kb = dict(BANKING_CONTEXT)
+    i = 0
+    while len(kb) < size:
+        words = [rng.choice(FILLER_WORDS) for _ in range(40)]
+        kb[f"filler {i}"] = (
+            f"Filler Topic {i}.\n{' '.join(words[:20])}.\n\n"
+            f"How to use / How it works:\n{' '.join(words[20:])}.\n"
+        )
+        i += 1
+    return kb
+
+
+def run(qa, questions, context_for):
+    answers, times = [], []
+    for q in questions:
+        start = time.perf_counter()
+        context = context_for(q)
+        answers.append(qa(question=q, context=context)["answer"].strip() if context else "")
+        times.append(time.perf_counter() - start)
+    return answers, times
+
+
+def fmt(times):
+    return f"{statistics.median(times) * 1000:8.1f} {max(times) * 1000:8.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="20,1000,10000")
+    parser.add_argument("--max-full", type=int, default=1000)
+    args = parser.parse_args()
+
+    qa = qa_model.load()
+    if qa is None:
+        sys.exit(f"QA model failed to load: {qa_model.status()['error']}")
+
+    # the old get_answer ran the reader over the whole flattened KB
+    base_context = KBSnapshot(BANKING_CONTEXT).context_text
+    reference, _ = run(qa, QUESTIONS, lambda q: base_context)
+    rng = random.Random(7)
+
+    print(f"{'entries':>7} {'path':<10} {'p50 ms':>8} {'max ms':>8} {'agree':>6}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        snapshot = KBSnapshot(padded_kb(size, rng))
+        if size <= args.max_full:
+            context = snapshot.context_text
+            answers, times = run(qa, QUESTIONS, lambda q: context)
+            agree = sum(a == r for a, r in zip(answers, reference)) / len(QUESTIONS)
+            print(f"{size:>7} {'full':<10} {fmt(times)} {agree:>6.0%}")
+        else:
+            print(f"{size:>7} {'full':<10} {'skipped':>17}")
+        answers, times = run(qa, QUESTIONS, lambda q: " ".join(snapshot.retriever.top_passages(q, QA_TOP_K)))
+        agree = sum(a == r for a, r in zip(answers, reference)) / len(QUESTIONS)
+        print(f"{size:>7} {'retrieval':<10} {fmt(times)} {agree:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Cost of logging one request: queued + batched writer vs a commit per request.
+
+Records N synthetic traces through QueryLog (what the request thread pays is
+the record() call; the writer drains in the background) and compares it with
+inserting and committing each row inline, as a naive logger would, with
+SQLite's default rollback journal and synchronous=FULL.
+
+Run from the project root:
+    python -m benchmarks.bench_query_log [--records 20000]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from utils.query_log import _INSERT, _SCHEMA, QueryLog, RequestTrace
+
+
+def make_trace(i):
+    trace = RequestTrace("ask", f"what is upi {i % 50}", "hi")
+    trace.lookup = trace.query
+    trace.set_answer("upi", "exact", 100.0, "live")
+    trace.stages = {"cache": 0.02, "answer": 0.4, "translate": 80.0, "audio": 0.3}
+    return trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+    traces = [make_trace(i) for i in range(args.records)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = QueryLog(os.path.join(tmp, "queued.db"))
+        start = time.perf_counter()
+        for trace in traces:
+            log.record(trace)
+        record_s = time.perf_counter() - start
+        log.flush()
+        total_s = time.perf_counter() - start
+        stats = log.stats()
+        print(f"queued   record() {record_s / len(traces) * 1e6:8.1f} us/request   "
+              f"all written after {total_s:.2f}s in {stats['batches']} batches "
+              f"({stats['written']} rows, {stats['dropped']} dropped)")
+
+        conn = sqlite3.connect(os.path.join(tmp, "inline.db"))
+        conn.execute("PRAGMA synchronous=FULL")
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        inline = traces[:min(len(traces), 2000)]
+        start = time.perf_counter()
+        for trace in inline:
+            with conn:
+                conn.execute(_INSERT, trace.row())
+        inline_s = time.perf_counter() - start
+        print(f"inline   insert + commit {inline_s / len(inline) * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
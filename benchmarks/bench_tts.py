@@ -0,0 +1,96 @@
+"""
+TTS backends: synthesis time per character and tail latency.
+
+Each backend (utils/tts_backends.py) synthesizes the same sentences per
+language: the KB answers split the way /ask/stream splits them (English),
+plus fixed Hindi and Kannada sentences. Local backends are started (and
+their workers warmed up) before timing, so the numbers are steady-state
+calls, not process start-up.
+
+    ms/char   mean of (call time / characters)
+    p50, p99  per-call latency
+    failed    calls that raised (e.g. no network for gtts)
+
+Run from the project root:
+    python -m benchmarks.bench_tts [--backends espeak,gtts] [--langs en,hi,kn] [--limit 40] [--concurrency 1]
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ai_engine import KB
+from utils.tts import split_for_tts
+from utils.tts_backends import get_backend
+
+SAMPLES = {
+    "hi": [
+        "ऋण वह धन है जो आप बैंक से उधार लेते हैं और ब्याज के साथ चुकाते हैं।",
+        "यूपीआई से आप अपने फोन से तुरंत पैसे भेज सकते हैं।",
+        "अपना पिन या ओटीपी कभी किसी के साथ साझा न करें।",
+        "सावधि जमा में आप एक निश्चित अवधि के लिए पैसा जमा करते हैं।",
+    ],
+    "kn": [
+        "ಸಾಲವು ನೀವು ಬ್ಯಾಂಕಿನಿಂದ ಪಡೆದು ಬಡ್ಡಿಯೊಂದಿಗೆ ಹಿಂತಿರುಗಿಸುವ ಹಣ.",
+        "ಯುಪಿಐ ಮೂಲಕ ನಿಮ್ಮ ಫೋನ್‌ನಿಂದ ತಕ್ಷಣ ಹಣ ಕಳುಹಿಸಬಹುದು.",
+        "ನಿಮ್ಮ ಪಿನ್ ಅಥವಾ ಒಟಿಪಿಯನ್ನು ಯಾರೊಂದಿಗೂ ಹಂಚಿಕೊಳ್ಳಬೇಡಿ.",
+        "ನಿಶ್ಚಿತ ಠೇವಣಿಯಲ್ಲಿ ಹಣವನ್ನು ನಿಗದಿತ ಅವಧಿಗೆ ಇಡುತ್ತೀರಿ.",
+    ],
+}
+
+
+def sentences(lang, limit):
+    if lang == "en":
+        texts = [s for answer in KB.snapshot.formatted.values() for s in split_for_tts(answer)]
+    else:
+        texts = SAMPLES[lang]
+    # repeat the samples up to `limit` calls
+    return [texts[i % len(texts)] for i in range(limit)]
+
+
+def run(backend, lang, texts, concurrency):
+    def one(text):
+        start = time.perf_counter()
+        try:
+            backend.synthesize(text, lang)
+        except Exception as e:
+            return None, len(text), str(e)
+        return time.perf_counter() - start, len(text), None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, texts))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="espeak,gtts")
+    parser.add_argument("--langs", default="en,hi,kn")
+    parser.add_argument("--limit", type=int, default=40, help="calls per backend and language")
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'lang':<5} {'calls':>5} {'ms/char':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>6}")
+    for name in args.backends.split(","):
+        backend = get_backend(name)
+        try:
+            start = time.perf_counter()
+            backend.start()
+            print(f"{name:<8} started in {time.perf_counter() - start:.2f} s")
+        except Exception as e:
+            print(f"{name:<8} unavailable: {e}")
+            continue
+        for lang in args.langs.split(","):
+            results = run(backend, lang, sentences(lang, args.limit), args.concurrency)
+            ok = sorted(t for t, _, err in results if err is None)
+            failed = [err for _, _, err in results if err is not None]
+            if not ok:
+                print(f"{name:<8} {lang:<5} {len(results):>5} {'-':>8} {'-':>8} {'-':>8} {len(failed):>6}  ({failed[0][:60]})")
+                continue
+            per_char = statistics.mean(t / n for t, n, err in results if err is None) * 1000
+            p99 = ok[min(len(ok) - 1, int(round(0.99 * (len(ok) - 1))))]
+            print(f"{name:<8} {lang:<5} {len(results):>5} {per_char:>8.2f} {statistics.median(ok) * 1000:>8.1f} "
+                  f"{p99 * 1000:>8.1f} {len(failed):>6}")
+
+
+if __name__ == "__main__":
+    main()
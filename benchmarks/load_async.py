@@ -0,0 +1,92 @@
+"""
+Load test: /ask requests/sec per worker, sync Flask vs the ASGI mode.
+
+Translator and TTS are mocked: the translator is the local stand-in with a
+fixed delay per request and no cache, TTS sleeps instead of calling gTTS.
+Every request uses a new query string so the response cache never hits.
+
+    sync    one Flask worker thread handling requests one after another
+            (a gunicorn sync worker)
+    async   the ASGI app (asgi.py) in one event loop with --concurrency
+            requests in flight
+
+Needs httpx. Run from the project root:
+    python -m benchmarks.load_async [--requests 200] [--concurrency 50] [--delay 0.15]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+os.environ["USERS_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "users.db")
+
+import httpx  # noqa: E402
+
+import app as webapp  # noqa: E402
+import asgi  # noqa: E402
+from utils.audio_jobs import AudioJobs  # noqa: E402
+from utils.audio_store import AudioStore  # noqa: E402
+from utils.translation import LocalBackend, TranslationService  # noqa: E402
+
+TOPICS = ["upi", "debit card", "credit card", "loan", "fixed deposit", "atm", "insurance", "net banking"]
+
+
+def mock_backends(delay):
+    webapp.translator = TranslationService(LocalBackend(delay=delay), db_path=None, memory_size=0)
+
+    def fake_speak(text, lang_code="en", output_path=None):
+        time.sleep(delay)
+        with open(output_path, "wb") as f:
+            f.write(b"ID3")
+        return True
+
+    webapp.speak = fake_speak
+    webapp.audio_store = AudioStore(tempfile.mkdtemp())
+    webapp.audio_jobs = AudioJobs(webapp.audio_store, webapp.generate_tts_audio)
+
+
+def form(i):
+    return {"query": f"what is {TOPICS[i % len(TOPICS)]} #{i}", "language": "hi"}
+
+
+def run_sync(n):
+    client = webapp.app.test_client()
+    start = time.perf_counter()
+    for i in range(n):
+        client.post("/ask", data=form(i))
+    return n / (time.perf_counter() - start)
+
+
+async def run_async(n, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with sem:
+                r = await client.post("/ask", data=form(i))
+                r.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.15, help="mock translator / TTS latency (s)")
+    args = parser.parse_args()
+
+    mock_backends(args.delay)
+    sync_rps = run_sync(max(10, args.requests // 10))
+    async_rps = asyncio.run(run_async(args.requests, args.concurrency))
+    print(f"mock translator/TTS delay {args.delay * 1000:.0f} ms")
+    print(f"  sync worker   {sync_rps:8.1f} req/s")
+    print(f"  ASGI worker   {async_rps:8.1f} req/s  (concurrency {args.concurrency})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Load test: login / signup latency with many concurrent clients.
+
+Runs the real /login and /signup views through Flask's test client from
+--clients threads against a throwaway users database, and reports p50 /
+p99 per endpoint. --legacy swaps in the old behaviour, a new connection per
+request with the default rollback journal, for comparison.
+
+Password hashing is not what this measures, so seeded users and signups
+use a cheap pbkdf2 hash unless --real-hash is given.
+
+Run from the project root:
+    python -m benchmarks.load_auth [--clients 200] [--requests 20] [--legacy]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+os.environ["USERS_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "users.db")
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+
+import app as webapp  # noqa: E402  (env must be set first)
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+SEED_USERS = 500
+
+
+class LegacyDatabase:
+    """What app.py did before utils/db.py: connect, query, close, per request."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_user_by_username(self, username):
+        conn = self._connect()
+        user = conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
+        conn.close()
+        return user
+
+    def create_user(self, username, email, password_hash):
+        conn = self._connect()
+        conn.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                     (username, email, password_hash))
+        conn.commit()
+        conn.close()
+
+
+def seed(method):
+    pw_hash = generate_password_hash("secret", method=method)
+    conn = sqlite3.connect(webapp.DB_PATH)
+    conn.executemany("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                     [(f"user{i}", f"user{i}@example.com", pw_hash) for i in range(SEED_USERS)])
+    conn.commit()
+    conn.close()
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--real-hash", action="store_true")
+    args = parser.parse_args()
+
+    if not args.real_hash:
+        webapp.hasher.method = "pbkdf2:sha256:1000"
+    if args.legacy:
+        webapp.db.close()
+        conn = sqlite3.connect(webapp.DB_PATH)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        webapp.db = LegacyDatabase(webapp.DB_PATH)
+    seed("scrypt" if args.real_hash else "pbkdf2:sha256:1000")
+
+    timings = {"login": [], "signup": []}
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.clients)
+
+    def client(cid):
+        c = webapp.app.test_client()
+        local = {"login": [], "signup": []}
+        barrier.wait()
+        for n in range(args.requests):
+            if n % 5 == 4:  # one signup per four logins
+                name = f"new{cid}_{n}"
+                form = {"username": name, "email": f"{name}@example.com", "password": "pw", "confirm": "pw"}
+                start = time.perf_counter()
+                c.post("/signup", data=form)
+                local["signup"].append(time.perf_counter() - start)
+            else:
+                start = time.perf_counter()
+                c.post("/login", data={"username": f"user{(cid * 7 + n) % SEED_USERS}", "password": "secret"})
+                local["login"].append(time.perf_counter() - start)
+        with lock:
+            for k, v in local.items():
+                timings[k].extend(v)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    begin = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+
+    mode = "legacy (connect per request, rollback journal)" if args.legacy else "utils.db (pooled WAL connections)"
+    total = sum(len(v) for v in timings.values())
+    print(f"{mode}: {args.clients} clients, {total} requests, {total / elapsed:.0f} req/s")
+    for name, values in timings.items():
+        print(f"  {name:<7} p50 {statistics.median(values) * 1000:7.1f} ms   p99 {pct(values, 0.99):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
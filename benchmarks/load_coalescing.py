@@ -0,0 +1,139 @@
+"""
+Load test: a burst of identical /ask requests is answered and voiced once.
+
+--requests simultaneous requests (threads released together by a barrier)
+send the same question to the Flask app: to /ask, to /ask/stream (the chat
+UI's route) or alternating between both (--endpoint). Translator and TTS are mocked as
+in load_async, with a fixed delay, so the burst arrives while the first
+request is still being answered. With --processes > 1 the burst is split
+over that many forked workers sharing one audio directory, lock directory,
+translation cache and response cache database, like gunicorn workers on one
+host.
+
+The run fails (exit status 1) unless every audio text was synthesized
+exactly once for the whole burst: /ask renders the whole answer as one
+file, /ask/stream one file per sentence. Also printed per worker:
+single-flight leaders / followers, the coalescing ratio (followers / all
+coalesced calls) and translator calls.
+
+Run from the project root:
+    python -m benchmarks.load_coalescing [--requests 500] [--processes 1] [--delay 0.5] [--endpoint both]
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+SHARED = tempfile.mkdtemp()
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+os.environ["USERS_DB_PATH"] = os.path.join(SHARED, "users.db")
+os.environ["SINGLE_FLIGHT_LOCK_DIR"] = os.path.join(SHARED, "locks")
+os.environ["RESPONSE_CACHE_DB"] = os.path.join(SHARED, "responses.db")
+
+import app as webapp  # noqa: E402
+from utils.audio_jobs import AudioJobs  # noqa: E402
+from utils.audio_store import AudioStore  # noqa: E402
+from utils.translation import LocalBackend, TranslationService  # noqa: E402
+
+QUERY = {"query": "What is UPI?", "language": "hi"}
+SYNTH_LOG = os.path.join(SHARED, "synthesized.log")
+
+
+def mock_backends(delay):
+    backend = LocalBackend(delay=delay)
+    webapp.translator = TranslationService(backend, db_path=os.path.join(SHARED, "translations.db"))
+
+    def fake_speak(text, lang_code="en", output_path=None):
+        # one line per synthesis, appended by whichever worker did it
+        with open(SYNTH_LOG, "a") as log:
+            log.write(f"{os.getpid()} {lang_code} {hashlib.sha1(text.encode('utf-8')).hexdigest()}\n")
+        time.sleep(delay)
+        with open(output_path, "wb") as f:
+            f.write(b"ID3")
+        return True
+
+    webapp.speak = fake_speak
+    webapp.audio_store = AudioStore(os.path.join(SHARED, "audio"))
+    webapp.audio_jobs = AudioJobs(webapp.audio_store, webapp.generate_tts_audio)
+    return backend
+
+
+def burst(n, endpoint, start_at=None):
+    """Send QUERY n times at once; returns (status codes, audio job ids)."""
+    client = webapp.app.test_client()
+    barrier = threading.Barrier(n)
+
+    def one(i):
+        barrier.wait()
+        if endpoint == "stream" or (endpoint == "both" and i % 2):
+            # reading the whole stream waits for its sentence audio jobs
+            r = client.get("/ask/stream", query_string=QUERY)
+            r.get_data()
+            return r.status_code, None
+        r = client.post("/ask", data=QUERY)
+        body = r.get_json(silent=True) or {}
+        return r.status_code, body.get("audio_job")
+
+    if start_at:
+        time.sleep(max(0.0, start_at - time.time()))
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(one, range(n)))
+
+
+def worker(n, delay, endpoint, start_at, results):
+    backend = mock_backends(delay)
+    responses = burst(n, endpoint, start_at)
+    # let the queued audio job finish before counting syntheses
+    for job_id in {job for _, job in responses if job}:
+        webapp.audio_jobs.status(job_id, wait=60)
+    results.put((os.getpid(), sum(1 for s, _ in responses if s == 200), len(responses),
+                 webapp.answer_flight.stats(), webapp.tts_flight.stats(), backend.requests))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=0.5, help="mock translator / TTS latency (s)")
+    parser.add_argument("--endpoint", choices=("ask", "stream", "both"), default="both")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    per_worker = args.requests // args.processes
+    start_at = time.time() + 1.0  # the workers release their bursts together
+    procs = [ctx.Process(target=worker, args=(per_worker, args.delay, args.endpoint, start_at, results))
+             for _ in range(args.processes)]
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{per_worker * args.processes} identical requests ({args.endpoint}) over {args.processes} worker(s), "
+          f"mock translator/TTS {args.delay * 1000:.0f} ms, {elapsed:.1f} s")
+    print(f"  {'pid':>7} {'ok':>5} {'leaders':>8} {'followers':>10} {'ratio':>6} {'lock waits':>11} "
+          f"{'rechecks':>9} {'translations':>13}")
+    for pid, ok, n, ask, tts, translations in rows:
+        print(f"  {pid:>7} {ok:>5} {ask['leaders']:>8} {ask['followers']:>10} {ask['coalescing_ratio']:>6.2f} "
+              f"{ask['lock_waits'] + tts['lock_waits']:>11} {ask['recheck_hits']:>9} {translations:>13}")
+
+    with open(SYNTH_LOG) if os.path.exists(SYNTH_LOG) else open(os.devnull) as log:
+        per_text = Counter(line.split()[-1] for line in log)
+    print(f"  TTS syntheses: {sum(per_text.values())} for {len(per_text)} distinct texts")
+    if not per_text or max(per_text.values()) != 1:
+        print("FAIL: expected exactly one TTS synthesis per audio text for the burst")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Load test: chat latency during a login storm.
+
+--chat-clients threads keep asking a KB question on /ask while
+--login-clients threads hammer /login with real password hashes. The test
+runs three phases and reports /ask p50 / p99 for each:
+
+    quiet    chat traffic only
+    pool     login storm, hashing on the bounded pool (utils/password_hashing.py)
+    inline   login storm, hashing inline on the request threads (old behaviour)
+
+TTS is skipped so /ask measures only the app itself.
+
+Run from the project root:
+    python -m benchmarks.load_login_storm [--seconds 10] [--login-clients 64]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+os.environ["USERS_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "users.db")
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+
+import app as webapp  # noqa: E402  (env must be set first)
+from werkzeug.security import generate_password_hash, check_password_hash  # noqa: E402
+
+
+class InlineHasher:
+    """Old behaviour: hash on the calling request thread."""
+
+    method = "scrypt"
+
+    def hash_password(self, password):
+        return generate_password_hash(password, self.method)
+
+    def verify_password(self, password_hash, password):
+        return check_password_hash(password_hash, password)
+
+
+def phase(seconds, chat_clients, login_clients):
+    stop = time.perf_counter() + seconds
+    chat_times = []
+    logins = [0, 0]  # ok, busy / failed
+    lock = threading.Lock()
+
+    def chat():
+        c = webapp.app.test_client()
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            c.post("/ask", data={"query": "what is a debit card", "language": "en"})
+            local.append(time.perf_counter() - start)
+        with lock:
+            chat_times.extend(local)
+
+    def login():
+        c = webapp.app.test_client()
+        while time.perf_counter() < stop:
+            r = c.post("/login", data={"username": "storm", "password": "secret"})
+            ok = r.headers.get("Location", "").endswith("/")
+            with lock:
+                logins[0 if ok else 1] += 1
+            if not ok:
+                time.sleep(0.1)  # a real client backs off before retrying
+
+    threads = [threading.Thread(target=chat) for _ in range(chat_clients)]
+    threads += [threading.Thread(target=login) for _ in range(login_clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    chat_times.sort()
+    return {
+        "chat_n": len(chat_times),
+        "p50": statistics.median(chat_times) * 1000,
+        "p99": chat_times[min(len(chat_times) - 1, int(len(chat_times) * 0.99))] * 1000,
+        "logins_ok": logins[0],
+        "logins_rejected": logins[1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--chat-clients", type=int, default=8)
+    parser.add_argument("--login-clients", type=int, default=64)
+    args = parser.parse_args()
+
+    # text path only: skip TTS jobs so gTTS / network don't enter the numbers
+    webapp.request_audio = lambda text, lang: (None, None)
+    conn = sqlite3.connect(webapp.DB_PATH)
+    conn.execute("INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                 ("storm", "storm@example.com", generate_password_hash("secret", webapp.hasher.method)))
+    conn.commit()
+    conn.close()
+
+    pool_hasher = webapp.hasher
+    print(f"{'phase':<8} {'/ask n':>7} {'p50 ms':>8} {'p99 ms':>8} {'logins ok':>10} {'rejected':>9}")
+    for name, hasher, login_clients in (("quiet", pool_hasher, 0),
+                                         ("pool", pool_hasher, args.login_clients),
+                                         ("inline", InlineHasher(), args.login_clients)):
+        webapp.hasher = hasher
+        r = phase(args.seconds, args.chat_clients, login_clients)
+        print(f"{name:<8} {r['chat_n']:>7} {r['p50']:>8.1f} {r['p99']:>8.1f} "
+              f"{r['logins_ok']:>10} {r['logins_rejected']:>9}")
+    print("pool stats:", pool_hasher.stats())
+
+
+if __name__ == "__main__":
+    main()
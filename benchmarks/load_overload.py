@@ -0,0 +1,93 @@
+"""
+Load test: /ask latency when off-KB questions arrive faster than QA can answer.
+
+Questions that miss every KB tier go to the QA reader, the most expensive
+stage. Requests arrive open-loop at --rate per second for --seconds (each a
+distinct off-KB question, so neither cache helps) against a stand-in reader
+(benchmarks.load_qa_batching.FakePipeline, about 100 questions/s at batch
+size 8), in two configurations:
+
+    unbounded   no admission limit and no deadline: every question queues
+                behind the model, as before
+    bounded     QA_MAX_PENDING / QA_DEADLINE_MS (defaults 32 / 2000 ms):
+                past either limit the request degrades to the best fuzzy KB
+                match or the static fallback
+
+Latency is measured from each request's scheduled arrival, so time spent
+waiting for a client thread counts too. Translator and TTS are mocked as in
+load_async.
+
+Run from the project root:
+    python -m benchmarks.load_overload [--rate 200] [--seconds 10] [--max-pending 32] [--deadline-ms 2000]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+os.environ["USERS_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "users.db")
+
+import app as webapp  # noqa: E402
+from benchmarks.load_async import mock_backends  # noqa: E402
+from benchmarks.load_qa_batching import FakePipeline  # noqa: E402
+from utils import ai_engine, metrics  # noqa: E402
+from utils.qa_batcher import QABatcher  # noqa: E402
+
+# each reaches the QA tier (no exact, fuzzy or semantic hit)
+OFF_KB = ["What should I never share?", "What should I keep for disputes?", "What should I do if my phone is stolen?",
+          "How much cash can I carry?", "What is the penalty for late payment?"]
+
+
+def run(rate, seconds, language):
+    client = webapp.app.test_client()
+    n = int(rate * seconds)
+    begin = time.perf_counter() + 0.5
+
+    def one(i):
+        scheduled = begin + i / rate
+        time.sleep(max(0.0, scheduled - time.perf_counter()))
+        client.post("/ask", data={"query": f"{OFF_KB[i % len(OFF_KB)]} #{i}", "language": language})
+        return time.perf_counter() - scheduled
+
+    # enough threads that arrivals never wait for a free client
+    with ThreadPoolExecutor(max_workers=min(n, 1024)) as pool:
+        latencies = sorted(pool.map(one, range(n)))
+    return latencies, time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rate", type=float, default=200, help="arrivals per second")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--deadline-ms", type=float, default=2000)
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    mock_backends(0.05)
+    pipe = FakePipeline()
+    # the reader is "loaded"; every batcher below runs the stand-in
+    ai_engine.qa_model.get = lambda timeout=None: pipe
+
+    print(f"{args.rate:g} off-KB questions/s for {args.seconds:g} s, stand-in reader ~100 questions/s")
+    print(f"  {'mode':<10} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'answered by QA':>15} {'degraded':>9}")
+    for mode, max_pending, deadline_ms in (("unbounded", 10 ** 6, 10 ** 9),
+                                           ("bounded", args.max_pending, args.deadline_ms)):
+        ai_engine.qa_batcher = QABatcher(lambda: pipe, max_pending=max_pending, deadline_ms=deadline_ms)
+        before = Counter(metrics.degradations())
+        latencies, elapsed = run(args.rate, args.seconds, args.language)
+        degraded = Counter(metrics.degradations())
+        degraded.subtract(before)
+        stats = ai_engine.qa_batcher.stats()
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"  {mode:<10} {len(latencies) / elapsed:>7.1f} {statistics.median(latencies) * 1000:>8.0f} "
+              f"{p99 * 1000:>8.0f} {latencies[-1] * 1000:>8.0f} {stats['items']:>15} {sum(degraded.values()):>9}"
+              f"  {dict(+degraded) or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Load test: QA fallback throughput with and without micro-batching.
+
+N client threads send questions straight to a QABatcher for a fixed time,
+first with max batch size 1 (one forward pass per request, the old
+behaviour) and then with the configured batch size and wait window.
+Reports requests/sec, latency percentiles and the batcher metrics.
+
+--fake swaps the roberta pipeline for a stand-in whose cost is a fixed
+per-call overhead plus a per-item cost, to exercise the scheduler without
+transformers installed. Real numbers need the real model.
+
+Run from the project root:
+    python -m benchmarks.load_qa_batching [--clients 16] [--seconds 20] [--fake]
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from utils.ai_engine import KB, QA_TOP_K
+from utils.model_manager import qa_model
+from utils.qa_batcher import QABatcher, QA_BATCH_MAX_SIZE, QA_BATCH_MAX_WAIT_MS
+
+QUESTIONS = [
+    "How long is a home loan repaid?",
+    "What score improves approval chances?",
+    "What should I never share?",
+    "What is the cost of borrowing money?",
+    "Which schemes support financial inclusion?",
+    "What should I keep for disputes?",
+]
+
+
+class FakePipeline:
+    """
+    Stand-in reader: 40 ms per forward pass + 5 ms per question. Passes are
+    serialized, like concurrent torch calls competing for the same cores.
+    """
+
+    def __init__(self):
+        self._cpu = threading.Lock()
+
+    def __call__(self, question, context, batch_size=1):
+        many = isinstance(question, list)
+        n = len(question) if many else 1
+        with self._cpu:
+            time.sleep(0.040 + 0.005 * n)
+        out = [{"answer": context[:20], "score": 1.0}] * n
+        return out if many else out[0]
+
+
+def run(batcher, clients, seconds):
+    contexts = {q: " ".join(KB.snapshot.retriever.top_passages(q, QA_TOP_K)) for q in QUESTIONS}
+    latencies = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client(i):
+        n = i
+        local = []
+        while time.perf_counter() < stop:
+            q = QUESTIONS[n % len(QUESTIONS)]
+            start = time.perf_counter()
+            batcher(question=q, context=contexts[q])
+            local.append(time.perf_counter() - start)
+            n += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    begin = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - begin
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--batch-size", type=int, default=max(QA_BATCH_MAX_SIZE, 2))
+    parser.add_argument("--wait-ms", type=float, default=QA_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--fake", action="store_true", help="use a stand-in reader instead of roberta")
+    args = parser.parse_args()
+
+    if args.fake:
+        pipe = FakePipeline()
+    else:
+        pipe = qa_model.load()
+        if pipe is None:
+            sys.exit(f"QA model failed to load: {qa_model.status()['error']} (try --fake)")
+
+    print(f"{'mode':<22} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8}  mean batch")
+    for label, size in (("unbatched", 1), (f"batch {args.batch_size} / {args.wait_ms:g} ms", args.batch_size)):
+        batcher = QABatcher(lambda: pipe, max_batch_size=size, max_wait_ms=args.wait_ms)
+        r = run(batcher, args.clients, args.seconds)
+        stats = batcher.stats()
+        print(f"{label:<22} {r['rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}  "
+              f"{stats['mean_batch_size']} (max queue {stats['max_queue_depth']})")
+
+
+if __name__ == "__main__":
+    main()
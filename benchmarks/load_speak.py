@@ -0,0 +1,125 @@
+"""
+Load test: concurrent voice queries per worker with browser-uploaded clips.
+
+The old /speak recorded from the server's microphone, so a worker handled one
+voice query at a time and spent 1 s calibrating plus up to 12 s listening
+on each. Now each request uploads a WAV clip, which is decoded with pydub
+and transcribed on the bounded recognition pool. The recognizer is the local
+stub with a fixed delay (standing in for the Google round trip); translator
+and TTS are mocked as in load_async.
+
+    flask   --concurrency threads posting to the Flask app (a threaded worker)
+    asgi    the ASGI app in one event loop with --concurrency requests in flight
+
+Requests beyond --queue get 503 right away; they are counted as "busy".
+
+Needs httpx for the ASGI run. Run from the project root:
+    python -m benchmarks.load_speak [--requests 400] [--concurrency 100] [--delay 0.5] [--workers 32]
+"""
+import argparse
+import asyncio
+import io
+import logging
+import math
+import os
+import statistics
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+os.environ["USERS_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "users.db")
+
+import httpx  # noqa: E402
+
+import app as webapp  # noqa: E402
+import asgi  # noqa: E402
+from benchmarks.load_async import mock_backends  # noqa: E402
+from utils.recognition import LocalRecognizer, RecognitionPool  # noqa: E402
+
+
+def wav_clip(seconds=3.0, rate=44100):
+    """A stereo 44.1 kHz tone, so decoding has to resample and downmix."""
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        sample = int(8000 * math.sin(2 * math.pi * 440 * i / rate)).to_bytes(2, "little", signed=True)
+        frames += sample * 2
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def summarize(name, latencies, statuses, elapsed):
+    ok = [t for t, s in zip(latencies, statuses) if s == 200]
+    busy = sum(1 for s in statuses if s == 503)
+    ok.sort()
+    p95 = ok[int(0.95 * (len(ok) - 1))] if ok else 0.0
+    print(f"  {name:<6} {len(ok) / elapsed:8.1f} voice queries/s   "
+          f"p50 {statistics.median(ok) * 1000 if ok else 0:7.0f} ms   p95 {p95 * 1000:7.0f} ms   "
+          f"ok {len(ok)}  busy {busy}  other {len(statuses) - len(ok) - busy}")
+
+
+def run_flask(n, concurrency, clip):
+    client = webapp.app.test_client()
+
+    def one(i):
+        start = time.perf_counter()
+        r = client.post("/speak", data={"language": "hi", "audio": (io.BytesIO(clip), "speech.wav", "audio/wav")},
+                        content_type="multipart/form-data")
+        return time.perf_counter() - start, r.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n)))
+    elapsed = time.perf_counter() - start
+    summarize("flask", [t for t, _ in results], [s for _, s in results], elapsed)
+
+
+async def run_asgi(n, concurrency, clip):
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def one(i):
+            async with sem:
+                start = time.perf_counter()
+                r = await client.post("/speak?language=hi", content=clip, headers={"content-type": "audio/wav"})
+                return time.perf_counter() - start, r.status_code
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    summarize("asgi", [t for t, _ in results], [s for _, s in results], elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.5, help="stub recognizer latency per clip (s)")
+    parser.add_argument("--workers", type=int, default=32, help="recognition pool threads")
+    parser.add_argument("--queue", type=int, default=128, help="recognition pool admission limit")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mock_backends(0.05)
+    clip = wav_clip()
+    print(f"{len(clip) // 1024} KB WAV clip, stub recognizer {args.delay * 1000:.0f} ms, "
+          f"{args.workers} recognition threads, queue {args.queue}, concurrency {args.concurrency}")
+    for runner in ("flask", "asgi"):
+        webapp.recognizer_pool = RecognitionPool(LocalRecognizer(delay=args.delay), workers=args.workers,
+                                                 max_queue=args.queue)
+        if runner == "flask":
+            run_flask(args.requests, args.concurrency, clip)
+        else:
+            asyncio.run(run_asgi(args.requests, args.concurrency, clip))
+    print("  (old server-microphone /speak: one voice query at a time per worker, "
+          "1 s calibration + up to 12 s listening each)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Which tier answers what, and how fast: fallback rate and latency per tier.
+
+Runs a labelled set of paraphrased banking questions (plus off-topic ones
+that should fall back) through find_answer twice, with the semantic tier
+off and on, and prints per tier: share of queries, accuracy against the
+expected KB key, and p50 / p95 latency. Queries the KB can't answer reach
+the QA stage only if the model is installed and loaded (--qa waits for it).
+
+Run from the project root:
+    python -m benchmarks.report_tiers [--encoder hashing] [--qa]
+"""
+import argparse
+import os
+import statistics
+import time
+
+LABELLED = [
+    ("how can I borrow money to buy a house", "types of loans"),
+    ("i want money for my daughter's college fees", "types of loans"),
+    ("can i pledge my gold to get money", "types of loans"),
+    ("i need to borrow some money from bank", "loan"),
+    ("what paperwork do i need to get a loan", "apply a loan"),
+    ("how to get my loan approved", "apply a loan"),
+    ("the bank rejected my loan, why", "credit score"),
+    ("how does the bank know if i repay on time", "credit score"),
+    ("i want to take out cash late at night", "atm"),
+    ("machine that gives cash", "atm"),
+    ("pay at a shop from my account balance", "debit card"),
+    ("buy things now and pay next month", "credit card"),
+    ("keep my savings locked for one year with better interest", "fixed deposit"),
+    ("put aside a little every month", "recurring deposit"),
+    ("account for my kirana shop", "current account"),
+    ("where to keep my money and earn some interest", "savings account"),
+    ("send money to my brother using my phone", "upi"),
+    ("scan a qr code to pay", "upi"),
+    ("bank website to transfer funds", "net banking"),
+    ("bank app on my smartphone", "mobile banking"),
+    ("how much extra do i pay on borrowed money", "interest"),
+    ("cover for my crops if the rain fails", "insurance"),
+    ("my family needs protection if i die", "insurance"),
+    ("pension yojana from the government", "government schemes"),
+    ("someone asked my otp on the phone", "banking security"),
+    ("how to stay safe from bank fraud", "banking security"),
+    ("small loan for our women's group", "microfinance"),
+    ("teach me to manage money and budget", "financial literacy"),
+    ("paying without cash", "digital payments"),
+    ("what's the weather tomorrow", None),
+    ("who won the cricket match", None),
+    ("recipe for paneer butter masala", None),
+    ("tell me a joke", None),
+    ("how tall is mount everest", None),
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run(find_answer, repeats):
+    per_tier = {}
+    for query, expected in LABELLED:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            answer = find_answer(query)
+            times.append((time.perf_counter() - start) * 1000)
+        row = per_tier.setdefault(answer.tier, {"n": 0, "correct": 0, "ms": []})
+        row["n"] += 1
+        row["correct"] += answer.key == expected
+        row["ms"].append(statistics.median(times))
+    return per_tier
+
+
+def report(title, per_tier):
+    total = sum(r["n"] for r in per_tier.values())
+    correct = sum(r["correct"] for r in per_tier.values())
+    fallback = per_tier.get("fallback", {"n": 0})["n"]
+    print(f"\n{title}: accuracy {correct}/{total}, fallback rate {fallback / total:.0%}")
+    print(f"  {'tier':<9} {'queries':>8} {'share':>6} {'correct':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for tier, r in sorted(per_tier.items(), key=lambda kv: -kv[1]["n"]):
+        print(f"  {tier:<9} {r['n']:>8} {r['n'] / total:>6.0%} {r['correct']:>8} "
+              f"{percentile(r['ms'], 50):>8.3f} {percentile(r['ms'], 95):>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--encoder", default=None, help="SEMANTIC_ENCODER to use (default: env / auto)")
+    parser.add_argument("--qa", action="store_true", help="wait for the QA model to load first")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    if args.encoder:
+        os.environ["SEMANTIC_ENCODER"] = args.encoder
+
+    from utils.ai_engine import KB, find_answer, semantic
+    from utils.model_manager import qa_model
+    if args.qa:
+        qa_model.load()
+
+    semantic.enabled = False
+    report("semantic tier off", run(find_answer, args.repeats))
+
+    semantic.enabled = True
+    semantic.rebuild(KB.snapshot)
+    report(f"semantic tier on ({semantic.encoder.get().name} encoder)", run(find_answer, args.repeats))
+    print(f"\nindex: {semantic.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Stand-in for utils.espeak_worker that needs no libespeak-ng: same protocol,
+"audio" is the text. "crash" exits the process, "hang" never answers.
+"""
+import json
+import os
+import sys
+import time
+
+from utils.espeak_worker import _reply
+
+
+def main():
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    _reply(out)
+    for line in sys.stdin.buffer:
+        text = json.loads(line)["text"]
+        if text == "crash":
+            os._exit(1)
+        if text == "hang":
+            time.sleep(60)
+        _reply(out, text.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+The async /ask handler keeps its blocking cache and pre-rendered lookups off
+the event loop.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+os.environ.setdefault("TRANSLATOR_BACKEND", "local")
+os.environ.setdefault("STT_BACKEND", "local")
+os.environ.setdefault("USERS_DB_PATH", os.path.join(_tmp, "users.db"))
+os.environ.setdefault("KB_DB_PATH", os.path.join(_tmp, "kb.db"))
+os.environ.setdefault("RESPONSE_CACHE_DB", os.path.join(_tmp, "responses.db"))
+os.environ.setdefault("TRANSLATION_CACHE_DB", os.path.join(_tmp, "translations.db"))
+os.environ.setdefault("QUERY_LOG_DB", "")
+
+import app as flask_app  # noqa: E402
+import asgi  # noqa: E402
+from utils.query_log import RequestTrace  # noqa: E402
+
+
+class OffLoopTest(unittest.TestCase):
+    def test_lookups_run_on_io_threads(self):
+        threads = {}
+
+        def recording(name, fn):
+            def call(*args, **kwargs):
+                threads[name] = threading.current_thread().name
+                return fn(*args, **kwargs)
+            return call
+
+        with mock.patch.object(flask_app, "cached_response",
+                               recording("cache", flask_app.cached_response)), \
+                mock.patch.object(flask_app, "prerendered_response",
+                                  recording("prerendered", flask_app.prerendered_response)), \
+                mock.patch.object(flask_app, "finish_response", return_value=("answer", None, None)):
+            trace = RequestTrace("test", "what is upi off the loop", "en")
+            asyncio.run(asgi.build_response(trace.query, "en", trace))
+
+        self.assertEqual(set(threads), {"cache", "prerendered"})
+        for name, thread in threads.items():
+            self.assertTrue(thread.startswith("io"), f"{name} ran on {thread}")
+
+
+if __name__ == "__main__":
+    unittest.main()
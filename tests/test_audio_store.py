@@ -0,0 +1,48 @@
+"""
+AudioStore eviction: a budget evicts down to the low-water mark, no budget never evicts.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+from utils.audio_store import AudioStore
+
+
+def synthesize(path):
+    with open(path, "wb") as f:
+        f.write(b"x" * 1000)
+    return True
+
+
+class AudioStoreBudgetTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def fill(self, store, n):
+        for i in range(n):
+            self.assertIsNotNone(store.get_or_create(f"answer {i}", "en", synthesize))
+
+    def test_no_budget_never_evicts(self):
+        for unbounded in (None, float("inf")):
+            store = AudioStore(os.path.join(self.directory, str(unbounded)), max_bytes=unbounded)
+            self.fill(store, 50)
+            self.assertEqual(store.enforce_budget(), 0)
+            stats = store.stats()
+            self.assertIsNone(stats["max_bytes"])
+            self.assertEqual(stats["evicted_files"], 0)
+            self.assertEqual(len(os.listdir(store.directory)), 50)
+
+    def test_budget_evicts_to_low_water(self):
+        store = AudioStore(self.directory, max_bytes=10_000, low_water=0.5)
+        self.fill(store, 11)
+        # over 10 kB after the 11th file: down to 5 kB, newest kept
+        self.assertEqual(len(os.listdir(self.directory)), 5)
+        self.assertIsNotNone(store.lookup("answer 10", "en"))
+        self.assertEqual(store.stats()["bytes"], 5000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Seeding the knowledge store follows edits to the built-in KB.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.kb_store import KnowledgeStore
+
+KB = {"upi": "UPI moves money between bank accounts instantly.",
+      "atm": "An ATM dispenses cash from your account."}
+
+
+class SeedTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = KnowledgeStore(os.path.join(self.root, "kb.db"))
+        self.store.init_schema()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def entries(self):
+        return self.store.load()[0]
+
+    def test_new_store_gets_every_entry_once(self):
+        self.assertEqual(self.store.seed(KB), 2)
+        self.assertEqual(self.store.seed(KB), 0)
+        self.assertEqual(self.entries(), KB)
+
+    def test_source_edit_is_reseeded_and_store_edits_elsewhere_kept(self):
+        self.store.seed(KB)
+        self.store.put("atm", "Edited in the store.")
+        edited = dict(KB, upi="UPI is a real-time payment system.")
+        with self.assertLogs("utils.kb_store", "WARNING") as logs:
+            self.assertEqual(self.store.seed(edited), 1)
+        self.assertIn("upi", logs.output[0])
+        self.assertEqual(self.entries(), {"upi": edited["upi"], "atm": "Edited in the store."})
+
+    def test_removed_entry_is_reported_not_deleted(self):
+        self.store.seed(KB)
+        with self.assertLogs("utils.kb_store", "WARNING") as logs:
+            self.assertEqual(self.store.seed({"upi": KB["upi"]}), 0)
+        self.assertIn("atm", logs.output[0])
+        self.assertIn("atm", self.entries())
+
+    def test_store_seeded_before_tracking_takes_source_as_baseline(self):
+        self.store.put_many((key, body, ()) for key, body in KB.items())
+        self.assertEqual(self.store.seed(dict(KB, upi="Changed.")), 0)
+        self.assertEqual(self.store.seed(dict(KB, upi="Changed again.")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Pre-rendering the KB writes a manifest and one audio file per (entry, language).
+
+Runs build() with stand-in translate / synthesize functions, so no network
+is needed. Run from the project root:
+    python -m unittest discover tests
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+
+from utils import prerender  # noqa: E402
+from utils.ai_engine import KB  # noqa: E402
+
+
+def translate(text, lang):
+    return f"[{lang}] {text}"
+
+
+def synthesize(text, lang, output_path):
+    with open(output_path, "wb") as f:
+        f.write(b"ID3" + text.encode("utf-8")[:64])
+    return True
+
+
+class BuildTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.root, "prerendered.json")
+        self.audio_dir = os.path.join(self.root, "kb")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def build(self, **kwargs):
+        return prerender.build(KB.snapshot, translate, synthesize, manifest_path=self.manifest_path,
+                               audio_dir=self.audio_dir, **kwargs)
+
+    def test_build_writes_manifest_and_audio(self):
+        snapshot = KB.snapshot
+        pairs = len(snapshot.formatted) * len(prerender.SUPPORTED_LANGUAGES)
+        self.assertEqual(self.build(), {"rendered": pairs, "reused": 0, "failed": 0})
+
+        manifest = prerender.read_manifest(self.manifest_path)
+        self.assertEqual(manifest["kb_version"], snapshot.version)
+        self.assertEqual(set(manifest["entries"]), set(snapshot.formatted))
+        for key, entry in manifest["entries"].items():
+            self.assertEqual(entry["hash"], snapshot.entry_hashes[key])
+            self.assertEqual(entry["langs"]["en"]["text"], snapshot.formatted[key])
+            self.assertEqual(entry["langs"]["hi"]["text"], translate(snapshot.formatted[key], "hi"))
+        files = {f for f in os.listdir(self.audio_dir) if not f.endswith(".part")}
+        self.assertEqual(len(files), len({(r["text"], lang) for e in manifest["entries"].values()
+                                          for lang, r in e["langs"].items()}))
+
+        # the runtime view serves every pair
+        answers = prerender.PrerenderedAnswers(self.manifest_path, self.audio_dir)
+        self.assertEqual(answers.load(), pairs)
+        key = next(iter(snapshot.formatted))
+        text, audio = answers.get(key, "kn", snapshot.formatted[key])
+        self.assertEqual(text, translate(snapshot.formatted[key], "kn"))
+        self.assertTrue(audio.startswith(prerender.PRERENDER_AUDIO_URL + "/"))
+
+    def test_rebuild_reuses_unchanged_entries(self):
+        self.build()
+        counts = self.build()
+        self.assertEqual(counts["rendered"], 0)
+        self.assertEqual(counts["reused"], len(KB.snapshot.formatted) * len(prerender.SUPPORTED_LANGUAGES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+QABatcher admission control counts every turned-away question exactly once.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import threading
+import time
+import unittest
+
+from utils.qa_batcher import QABatcher, QABusy
+
+
+class SlowPipeline:
+    """Stand-in reader: 50 ms per batch, whatever its size."""
+
+    def __call__(self, question, context, batch_size=1):
+        time.sleep(0.05)
+        if isinstance(question, list):
+            return [{"answer": q, "score": 1.0} for q in question]
+        return {"answer": question, "score": 1.0}
+
+
+class AdmissionTest(unittest.TestCase):
+    def test_each_question_is_answered_or_rejected_once(self):
+        pipe = SlowPipeline()
+        batcher = QABatcher(lambda: pipe, max_batch_size=2, max_wait_ms=1, max_pending=40, deadline_ms=120)
+        outcomes = []
+        lock = threading.Lock()
+
+        def ask(i):
+            try:
+                batcher(f"question {i}", "context")
+                outcome = "answered"
+            except QABusy as e:
+                outcome = e.reason
+            with lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(60)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        time.sleep(0.2)  # let the worker drain what the callers gave up on
+
+        stats = batcher.stats()
+        self.assertEqual(len(outcomes), 60)
+        self.assertGreater(outcomes.count("deadline"), 0)
+        self.assertEqual(stats["rejected"].get("deadline", 0), outcomes.count("deadline"))
+        self.assertEqual(stats["rejected"].get("queue_full", 0), outcomes.count("queue_full"))
+        self.assertEqual(set(stats["rejected"]) - {"deadline", "queue_full"}, set())
+        self.assertEqual(stats["pending"], 0)
+        # every slot came back
+        self.assertEqual(batcher._slots._value, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+RecognitionPool frees the slot of a clip cancelled while queued, without errors.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import io
+import unittest
+import wave
+
+from utils.recognition import LocalRecognizer, RecognitionPool
+
+
+def wav_clip(seconds=0.5, rate=16000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0\0" * int(seconds * rate))
+    return buf.getvalue()
+
+
+class CancelTest(unittest.TestCase):
+    def test_cancelled_queued_clip(self):
+        pool = RecognitionPool(LocalRecognizer(delay=0.3), workers=1, max_queue=4, timeout=5)
+        running = pool.submit(wav_clip(), "audio/wav")
+        queued = pool.submit(wav_clip(), "audio/wav")
+        with self.assertNoLogs("concurrent.futures", "ERROR"):
+            self.assertTrue(queued.cancel())
+        self.assertEqual(running.result(5), "what is upi")
+        stats = pool.stats()
+        self.assertEqual((stats["completed"], stats["cancelled"], stats["in_flight"]), (1, 1, 0))
+        self.assertEqual(pool._slots._value, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+A semantic index that fails to build skips the tier instead of failing the lookup,
+and SEMANTIC_ENCODER=off never loads an encoder.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import os
+import unittest
+
+os.environ.setdefault("QA_MODEL_MODE", "lazy")
+
+from utils import ai_engine  # noqa: E402
+from utils.semantic_index import SemanticMatcher, load_encoder  # noqa: E402
+
+
+class FailedBuildTest(unittest.TestCase):
+    def setUp(self):
+        self._semantic = ai_engine.semantic
+        # a cache dir that can't be created makes the first build fail
+        ai_engine.semantic = SemanticMatcher(encoder="hashing", cache_dir="/proc/nope")
+
+    def tearDown(self):
+        ai_engine.semantic = self._semantic
+
+    def test_index_is_none(self):
+        self.assertIsNone(ai_engine.semantic.index_for(ai_engine.KB.snapshot))
+
+    def test_lookup_falls_through_to_qa_or_fallback(self):
+        answer = ai_engine.find_answer("how do i borrow money for my house")
+        self.assertIn(answer.tier, ("qa", "fallback"))
+        # and keeps doing so without retrying the build on every query
+        answer = ai_engine.find_answer("how do i borrow money for my house")
+        self.assertIn(answer.tier, ("qa", "fallback"))
+
+
+class EncoderOffTest(unittest.TestCase):
+    def test_off_never_loads_an_encoder(self):
+        matcher = SemanticMatcher(encoder="off", cache_dir="")
+        matcher.rebuild(ai_engine.KB.snapshot)
+        self.assertEqual(matcher.match(ai_engine.KB.snapshot, ["what is upi"]), [None])
+        self.assertEqual(matcher.encoder.state, matcher.encoder.IDLE)
+        self.assertIsNone(load_encoder("off"))
+
+
+if __name__ == "__main__":
+    unittest.main()
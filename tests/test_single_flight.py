@@ -0,0 +1,62 @@
+"""
+Cross-process single-flight locks: one per key, exclusive, and cleaned up.
+
+Run from the project root:
+    python -m unittest discover tests
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from utils.single_flight import SingleFlight, fcntl
+
+
+def bump(lock_dir, counter, rounds):
+    """Non-atomic read-modify-write of `counter`, under the lock for one key."""
+    flight = SingleFlight("test", lock_dir=lock_dir)
+    for _ in range(rounds):
+        with flight.process_lock("same question|hi"):
+            with open(counter) as f:
+                value = int(f.read())
+            time.sleep(0.001)
+            with open(counter, "w") as f:
+                f.write(str(value + 1))
+
+
+@unittest.skipIf(fcntl is None, "cross-process locks need fcntl")
+class ProcessLockTest(unittest.TestCase):
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.lock_dir)
+
+    def test_same_key_is_exclusive_across_processes(self):
+        counter = os.path.join(self.lock_dir, "counter")
+        with open(counter, "w") as f:
+            f.write("0")
+        ctx = multiprocessing.get_context("fork")
+        procs = [ctx.Process(target=bump, args=(self.lock_dir, counter, 50)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        with open(counter) as f:
+            self.assertEqual(int(f.read()), 200)
+        # every holder deleted its lock file on release
+        self.assertEqual(os.listdir(self.lock_dir), ["counter"])
+
+    def test_different_keys_dont_wait_for_each_other(self):
+        flight = SingleFlight("test", lock_dir=self.lock_dir)
+        with flight.process_lock("upi|en") as waited:
+            self.assertFalse(waited)
+            other = flight.process_lock("loan|en")
+            self.assertFalse(other.acquire())
+            other.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+The espeak-ng worker pool synthesizes, and replaces workers that die or hang.
+
+The pool logic runs against tests/espeak_stub.py; the real library test is
+skipped where libespeak-ng isn't installed. Run from the project root:
+    python -m unittest discover tests
+"""
+import ctypes.util
+import os
+import signal
+import unittest
+from unittest import mock
+
+from utils.tts_backends import EspeakBackend, TTSDeadlineExceeded
+
+
+class EspeakPoolTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("ctypes.util.find_library", return_value="libespeak-ng.so")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.backend = EspeakBackend(workers=2, timeout=2)
+        self.backend.WORKER_MODULE = "tests.espeak_stub"
+
+    def tearDown(self):
+        while not self.backend._idle.empty():
+            self.backend._idle.get().kill()
+
+    def test_synthesize(self):
+        self.assertEqual(self.backend.synthesize("Never share your OTP.", "en"), b"Never share your OTP.")
+
+    def test_crashed_worker_is_replaced(self):
+        with self.assertRaises(RuntimeError):
+            self.backend.synthesize("crash", "en")
+        self.assertEqual(self.backend.synthesize("again", "en"), b"again")
+        self.assertEqual(self.backend._alive, 2)
+
+    def test_killed_idle_workers_are_replaced(self):
+        self.backend.start()
+        for proc in list(self.backend._idle.queue):
+            os.kill(proc.proc.pid, signal.SIGKILL)
+            proc.proc.wait()
+        self.assertEqual(self.backend.synthesize("again", "en"), b"again")
+
+    def test_hung_worker_is_killed_at_the_deadline(self):
+        with self.assertRaises(TTSDeadlineExceeded):
+            self.backend.synthesize("hang", "en")
+        self.assertEqual(self.backend.synthesize("again", "en"), b"again")
+
+
+@unittest.skipUnless(ctypes.util.find_library("espeak-ng"), "libespeak-ng not installed")
+class EspeakBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = EspeakBackend(workers=2, timeout=20)
+
+    def tearDown(self):
+        while not self.backend._idle.empty():
+            self.backend._idle.get().kill()
+
+    def test_synthesize(self):
+        self.assertGreater(len(self.backend.synthesize("Your UPI PIN is secret.", "en")), 0)
+
+    def test_recovers_from_a_killed_worker(self):
+        self.backend.start()
+        for proc in list(self.backend._idle.queue):
+            os.kill(proc.proc.pid, signal.SIGKILL)
+        self.assertGreater(len(self.backend.synthesize("Never share your OTP.", "en")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
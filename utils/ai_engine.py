@@ -1,12 +1,18 @@
-from transformers import pipeline
-import random
-import re
+import os
+from collections import namedtuple
+import numpy as np
 from rapidfuzz import process, fuzz
+from utils import metrics
+from utils.knowledge_base import KnowledgeBase, normalize
+from utils.model_manager import qa_model, QA_MODEL_WAIT
+from utils.qa_batcher import QABatcher, QABusy
+from utils.semantic_index import SemanticMatcher
 
-# --- Load the QA pipeline (same model you used) ---
-qa_pipeline = pipeline("question-answering", model="deepset/roberta-base-squad2")
+# --- The QA pipeline (deepset/roberta-base-squad2) is loaded by utils.model_manager ---
 
 # --- Your BANKING_CONTEXT (unchanged) ---
+# --- Served as is only with KB_DB_PATH=""; otherwise it seeds the on-disk
+#     knowledge store (utils/kb_store.py), which is what the app serves ---
 # ----- Replace this dictionary in utils/ai_engine.py -----
 BANKING_CONTEXT = {
     "atm": """Automated Teller Machine (ATM).\n
@@ -284,39 +290,71 @@ Keep transaction IDs for disputes.
 }
 
 # ----- end BANKING_CONTEXT -----
-def format_entry(value):
-    """
-    Accepts either:
-      - dict with keys 'title','definition','how_to_use','example','tips'
-      - list of strings (old style)
-    Returns a nicely formatted multi-paragraph string.
-    """
-    if isinstance(value, dict):
-        parts = []
-        if value.get("title"):
-            parts.append(f"{value['title']}.")
-        if value.get("definition"):
-            parts.append(f"{value['definition']}")
-        if value.get("how_to_use"):
-            parts.append(f"How to use / How it works: {value['how_to_use']}")
-        if value.get("example"):
-            parts.append(f"{value['example']}")
-        if value.get("tips"):
-            parts.append(f"Tip: {value['tips']}")
-        # join with two newlines for clear paragraphs
-        return "\n\n".join(parts)
-    elif isinstance(value, (list, tuple)):
-        # old-style: choose the longer string(s) and combine them
-        # prefer longer strings and join up to 2 items
-        sorted_items = sorted(value, key=lambda s: len(s), reverse=True)
-        chosen = sorted_items[:2]  # combine two longest
-        return "\n\n".join(chosen)
-    else:
-        return str(value)
-
-# --- Helper: clean text for matching ---
-def normalize(text: str) -> str:
-    return re.sub(r'\s+', ' ', (text or "").strip().lower())
+
+# --- Paraphrased questions per KB key, embedded by the semantic tier ---
+EXAMPLE_QUESTIONS = {
+    "atm": ["where can I take out cash at any time", "machine to withdraw money without going to the branch"],
+    "debit card": ["card that pays from my own bank balance", "how do I pay in shops with money from my account"],
+    "credit card": ["card to buy now and pay the bank later", "how does borrowing on a card work"],
+    "loan": ["how do I borrow money from the bank", "I need money and will repay in installments"],
+    "types of loans": ["how do I borrow money for my house", "money for buying a car or for my studies",
+                       "borrow against my gold jewellery"],
+    "fixed deposit": ["lock my savings for a fixed time at a higher interest rate", "safe investment with guaranteed returns"],
+    "recurring deposit": ["save a small amount every month with the bank", "monthly savings plan with interest"],
+    "savings account": ["where do I keep my money safely and earn interest", "open a basic account at the bank"],
+    "current account": ["bank account for my shop or business", "account for many daily transactions"],
+    "upi": ["send money instantly with my phone", "pay someone with a QR code scanner app"],
+    "net banking": ["manage my bank account on the website", "transfer funds from my computer"],
+    "mobile banking": ["use my bank from an app on my phone", "check balance on my mobile"],
+    "interest": ["how much extra do I pay when I borrow", "what does the bank pay me for keeping money"],
+    "apply a loan": ["what documents do I need to borrow from the bank", "steps to get a loan approved"],
+    "credit score": ["why was my loan rejected", "how does the bank decide if I can repay"],
+    "insurance": ["protect my family if something happens to me", "cover for hospital bills or crop damage"],
+    "government schemes": ["what help does the government give for bank accounts and pensions",
+                           "jan dhan or pension yojana"],
+    "banking security": ["someone called asking for my OTP", "how do I avoid fraud and scams"],
+    "microfinance": ["small loans for women self help groups", "money to start a small village business"],
+    "financial literacy": ["learn how to manage my money", "how should I plan a budget and save"],
+    "digital payments": ["pay without cash", "ways to pay online"],
+}
+FALLBACK_MESSAGE = (
+    "I'm not sure I have the exact answer for that, but I can tell you about "
+    "banking topics like debit cards, credit cards, UPI, loans, insurance, or fixed deposits. "
+    "Please ask about one of these!"
+)
+
+# --- Versioned KB snapshot: exact-match index, fuzzy choices, formatted
+#     answers and the BM25 passage index, rebuilt only when the KB changes ---
+KB = KnowledgeBase(BANKING_CONTEXT, EXAMPLE_QUESTIONS)
+
+# --- the QA reader only sees the top-k passages ---
+QA_TOP_K = int(os.environ.get("QA_TOP_K", "3"))
+
+# --- concurrent QA calls are grouped into micro-batches (utils/qa_batcher.py),
+#     with a bounded queue and a deadline ---
+qa_batcher = QABatcher(qa_model.get)
+
+# --- when QA is saturated, the best fuzzy key is served if it scores at least this ---
+QA_DEGRADED_MIN_SCORE = float(os.environ.get("QA_DEGRADED_MIN_SCORE", "50"))
+
+# --- embedding search over entries + EXAMPLE_QUESTIONS (utils/semantic_index.py) ---
+semantic = SemanticMatcher()
+
+# --- fuzzy thresholds: accept >= 85 outright; 60-85 may defer to a longer key
+#     within 8 points ---
+FUZZY_HIGH = 85
+FUZZY_MEDIUM = 60
+FUZZY_TIE_MARGIN = 8
+
+# --- find_answers scores queries against keys in chunks of at most this many cells ---
+FUZZY_BATCH_CELLS = int(os.environ.get("FUZZY_BATCH_CELLS", "4000000"))
+
+# --- Result of a lookup: the answer text plus which tier produced it ---
+# tier is one of "empty", "exact", "fuzzy", "semantic", "qa", "fallback",
+# "degraded" (QA was saturated; see _degraded_answer);
+# key is the matched BANKING_CONTEXT key for exact / fuzzy / semantic /
+# degraded hits, else None
+Answer = namedtuple("Answer", ["text", "key", "tier", "score"])
 
 # --- Main improved get_answer ---
 def get_answer(query: str) -> str:
@@ -324,77 +362,172 @@ def get_answer(query: str) -> str:
     Improved keyword matching:
       1) whole-word / phrase exact match (prefers longer phrases)
       2) fuzzy match with RapidFuzz (prefers higher score and longer/specific keys)
-      3) fallback to QA pipeline if no confident match
+      3) semantic match: embedding search over entries and example questions
+      4) retrieve the top-k KB passages (BM25) and run the QA pipeline over them
+         (skipped while the model loads)
 
     Returns formatted KB entry via format_entry(...) when a KB key is selected.
     """
+    return find_answer(query).text
+
+
+def find_answer(query: str) -> Answer:
+    """Same lookup as get_answer, but also reports the matched key, tier and score."""
     if not query or not query.strip():
-        return "Please ask a question about banking or finance."
+        return Answer("Please ask a question about banking or finance.", None, "empty", None)
 
     q = normalize(query)
+    # one snapshot for the whole request, even if the KB is swapped meanwhile
+    kb = KB.snapshot
 
     # 1) Exact whole-word / phrase match (prioritize longest match)
-    exact_matches = []
-    for key in BANKING_CONTEXT.keys():
-        key_norm = normalize(key)
-        # build whole-word/phrase regex (escape meta chars)
-        pattern = r'\b' + re.escape(key_norm) + r'\b'
-        if re.search(pattern, q):
-            exact_matches.append(key)
-
-    if exact_matches:
-        # choose the longest (most specific) exact match
-        best_key = max(exact_matches, key=lambda k: len(k))
-        matched_value = BANKING_CONTEXT[best_key]
-        return format_entry(matched_value)
+    with metrics.timed("exact"):
+        best_key = kb.index.longest_match(q)
+    if best_key is not None:
+        return Answer(kb.formatted[best_key], best_key, "exact", 100.0)
 
     # 2) Fuzzy matching with RapidFuzz
-    choices = list(BANKING_CONTEXT.keys())
-    try:
-        results = process.extract(q, choices, scorer=fuzz.WRatio, limit=3)
-    except Exception:
-        results = []
-
-    if results:
-        # results entries look like: (key, score, idx)
-        best_key, best_score, _ = results[0]
-        second_score = results[1][1] if len(results) > 1 else 0
-        second_key = results[1][0] if len(results) > 1 else None
-
-        # high-confidence match
-        if best_score >= 85:
-            return format_entry(BANKING_CONTEXT[best_key])
-
-        # medium confidence: prefer the longer/more specific neighbor if scores are close
-        if best_score >= 60:
-            if second_key and abs(best_score - second_score) <= 8 and len(second_key) > len(best_key):
-                return format_entry(BANKING_CONTEXT[second_key])
-            return format_entry(BANKING_CONTEXT[best_key])
+    with metrics.timed("fuzzy"):
+        try:
+            results = process.extract(q, kb.choices, scorer=fuzz.WRatio, limit=3)
+        except Exception:
+            results = []
+
+    # results entries look like: (key, score, idx)
+    fuzzy = _pick_fuzzy(kb, [(key, score) for key, score, _ in results[:2]])
+    if fuzzy is not None:
+        return fuzzy
+
+    # 3) Semantic match (skipped while the encoder loads)
+    with metrics.timed("semantic"):
+        hit = semantic.match(kb, [q])[0]
+    if hit is not None:
+        return Answer(kb.formatted[hit[0]], hit[0], "semantic", hit[1])
+
+    return _read_answer(query, kb)
+
+
+def _pick_fuzzy(kb, ranked):
+    """Apply the fuzzy rules to the top two (key, score) pairs, best first."""
+    if not ranked:
+        return None
+    best_key, best_score = ranked[0]
+    second_key, second_score = ranked[1] if len(ranked) > 1 else (None, 0)
+
+    # high-confidence match
+    if best_score >= FUZZY_HIGH:
+        return Answer(kb.formatted[best_key], best_key, "fuzzy", best_score)
+
+    # medium confidence: prefer the longer/more specific neighbor if scores are close
+    if best_score >= FUZZY_MEDIUM:
+        if second_key and abs(best_score - second_score) <= FUZZY_TIE_MARGIN and len(second_key) > len(best_key):
+            return Answer(kb.formatted[second_key], second_key, "fuzzy", second_score)
+        return Answer(kb.formatted[best_key], best_key, "fuzzy", best_score)
+    return None
+
+
+def _read_answer(query, kb):
+    """Tier 4: QA over the top BM25 passages, or the static fallback."""
+    # 4) Retrieve-then-read: QA pipeline over the best matching KB passages
+    if qa_model.get(timeout=QA_MODEL_WAIT) is None:
+        # model still loading (or failed) -> static fallback instead of blocking
+        return Answer(FALLBACK_MESSAGE, None, "fallback", None)
+
+    with metrics.timed("retrieve"):
+        passages = kb.retriever.top_passages(query, k=QA_TOP_K)
+    if not passages:
+        # nothing in the KB shares a term with the question
+        return Answer(FALLBACK_MESSAGE, None, "fallback", None)
 
-    # 3) Fallback to QA pipeline on whole KB (useful if KB doesn't match)
     try:
-        # Flatten the KB into a single context string
-        parts = []
-        for v in BANKING_CONTEXT.values():
-            if isinstance(v, dict):
-                # join dict values (title, definition, how_to_use, example, tips)
-                parts.append(" ".join([str(x) for x in v.values() if x]))
-            elif isinstance(v, (list, tuple)):
-                parts.append(" ".join([str(x) for x in v if x]))
-            else:
-                parts.append(str(v))
-        context_text = " ".join(parts)
-
-        res = qa_pipeline(question=query, context=context_text)
+        context_text = " ".join(passages)
+
+        with metrics.timed("qa"):
+            res = qa_batcher(question=query, context=context_text)
         ans = res.get("answer", "").strip()
         if ans:
-            return ans
+            return Answer(ans, None, "qa", res.get("score"))
+    except QABusy as e:
+        return _degraded_answer(query, kb, e.reason)
     except Exception:
         pass
 
     # final fallback
-    return (
-        "I'm not sure I have the exact answer for that, but I can tell you about "
-        "banking topics like debit cards, credit cards, UPI, loans, insurance, or fixed deposits. "
-        "Please ask about one of these!"
-    )
\ No newline at end of file
+    return Answer(FALLBACK_MESSAGE, None, "fallback", None)
+
+
+def _degraded_answer(query, kb, reason):
+    """QA queue full or too slow: the closest KB entry by fuzzy score, else the static fallback."""
+    metrics.degraded("qa", reason)
+    best = process.extractOne(normalize(query), kb.choices, scorer=fuzz.WRatio, score_cutoff=QA_DEGRADED_MIN_SCORE)
+    if best is None:
+        return Answer(FALLBACK_MESSAGE, None, "degraded", None)
+    return Answer(kb.formatted[best[0]], best[0], "degraded", best[1])
+
+# --- Batch lookup (log replay / offline evaluation) ---
+def get_answers(queries, qa=True):
+    """get_answer for a list of queries; see find_answers."""
+    return [answer.text for answer in find_answers(queries, qa=qa)]
+
+
+def find_answers(queries, qa=True):
+    """
+    find_answer for a list of queries, with the same tiers and rules.
+
+    The fuzzy stage scores the distinct remaining queries against all keys
+    with one rapidfuzz.process.cdist call per chunk (on every core) instead
+    of one process.extract per query. With qa=False, queries that miss the
+    KB get the static fallback without touching the QA model.
+
+    The work is still one WRatio per (distinct query, key): chunking bounds
+    the memory, not the time. On a single core this is only 1.3-1.8x faster
+    than the loop, and about 2 s per 1,000 distinct queries at 2,000 keys
+    (bench_batch_fuzzy); more cores divide that.
+    """
+    kb = KB.snapshot
+    answers = [None] * len(queries)
+    pending = []  # (position, normalized query) left for the fuzzy stage
+    for i, query in enumerate(queries):
+        if not query or not query.strip():
+            answers[i] = Answer("Please ask a question about banking or finance.", None, "empty", None)
+            continue
+        q = normalize(query)
+        best_key = kb.index.longest_match(q)
+        if best_key is not None:
+            answers[i] = Answer(kb.formatted[best_key], best_key, "exact", 100.0)
+        else:
+            pending.append((i, q))
+
+    # logged queries repeat a lot; score each distinct one once
+    distinct = list(dict.fromkeys(q for _, q in pending))
+    matched = dict(zip(distinct, _fuzzy_batch(kb, distinct)))
+    unmatched = [q for q in distinct if matched[q] is None]
+    for q, hit in zip(unmatched, semantic.match(kb, unmatched)):
+        if hit is not None:
+            matched[q] = Answer(kb.formatted[hit[0]], hit[0], "semantic", hit[1])
+    for i, q in pending:
+        answer = matched[q]
+        if answer is None:
+            answer = _read_answer(queries[i], kb) if qa else Answer(FALLBACK_MESSAGE, None, "fallback", None)
+        answers[i] = answer
+    return answers
+
+
+def _fuzzy_batch(kb, queries):
+    """_pick_fuzzy for every query, from one WRatio score matrix per chunk."""
+    if not queries or not kb.choices:
+        return [None] * len(queries)
+    # a key scoring below this can neither match nor win the tie-break
+    floor = FUZZY_MEDIUM - FUZZY_TIE_MARGIN
+    rows = max(1, FUZZY_BATCH_CELLS // len(kb.choices))
+    out = []
+    for start in range(0, len(queries), rows):
+        # scores under the floor come back as 0 and let WRatio bail out early
+        scores = process.cdist(queries[start:start + rows], kb.choices, scorer=fuzz.WRatio,
+                               dtype=np.float64, score_cutoff=floor, workers=-1)
+        for row in scores:
+            idx = np.flatnonzero(row >= floor)
+            # best score first; equal scores keep KB order, as process.extract does
+            idx = idx[np.lexsort((idx, -row[idx]))][:2]
+            out.append(_pick_fuzzy(kb, [(kb.choices[j], float(row[j])) for j in idx]))
+    return out
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Background TTS jobs.
+
+/ask used to wait for gTTS (plus fixed sleeps) before returning any text.
+Now the text goes back immediately together with an audio job id; the MP3 is
+rendered by a small worker pool and the page fetches it through
+/audio/status/<job_id>, which long-polls until the job is done.
+
+The job id is the audio store key of (lang, text), so identical answers
+requested at the same time share one job and one synthesis. It also lets
+any worker answer for a job queued by another one: the job is done once its
+file is in the (shared) audio store.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from utils.audio_store import audio_path, is_audio_name
+
+AUDIO_WORKERS = int(os.environ.get("AUDIO_WORKERS", "4"))
+# finished jobs are forgotten after this many seconds
+AUDIO_JOB_TTL = float(os.environ.get("AUDIO_JOB_TTL", "600"))
+
+
+class AudioJobs:
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, store, render, workers=AUDIO_WORKERS, ttl=AUDIO_JOB_TTL):
+        """`render(text, lang)` produces the audio and returns its URL (or None)."""
+        self.store = store
+        self._render = render
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._jobs = {}  # job_id -> (future, created_at)
+        self._lock = threading.Lock()
+        self.ttl = ttl
+
+    def submit(self, text, lang):
+        """Queue rendering of (text, lang); returns the job id."""
+        job_id = self.store.key_for(text, lang)
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None or self._failed(job[0]):
+                future = self._pool.submit(self._render, text, lang)
+                self._jobs[job_id] = (future, time.time())
+        return job_id
+
+    def status(self, job_id, wait=0.0):
+        """Return {"status", "audio"} for a job, waiting up to `wait` seconds for it to finish."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return self._stored_status(job_id, wait)
+        future = job[0]
+        if wait > 0:
+            try:
+                future.result(timeout=wait)
+            except FutureTimeout:
+                pass
+            except Exception:
+                return {"status": self.FAILED, "audio": None}
+        if not future.done():
+            return {"status": self.PENDING, "audio": None}
+        try:
+            url = future.result()
+        except Exception:
+            url = None
+        return {"status": self.DONE if url else self.FAILED, "audio": url}
+
+    def _stored_status(self, job_id, wait):
+        """
+        A job this process doesn't know, e.g. queued by another worker: pending
+        until its file exists. None for ids that can't be store keys.
+        """
+        filename = f"{job_id}.{self.store.ext}"
+        if not is_audio_name(filename):
+            return None
+        deadline = time.monotonic() + wait
+        while True:
+            if audio_path(self.store.directory, filename):
+                return {"status": self.DONE, "audio": self.store.url_for(filename)}
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return {"status": self.PENDING, "audio": None}
+            time.sleep(min(0.25, remaining))
+
+    @staticmethod
+    def _failed(future):
+        return future.done() and (future.exception() is not None or future.result() is None)
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        stale = [k for k, (f, created) in self._jobs.items() if f.done() and created < cutoff]
+        for k in stale:
+            del self._jobs[k]
+
+    def stats(self):
+        with self._lock:
+            pending = sum(1 for f, _ in self._jobs.values() if not f.done())
+            return {"jobs": len(self._jobs), "pending": pending}
@@ -0,0 +1,293 @@
+"""
+Content-addressed store for TTS audio.
+
+generate_tts_audio used to write a new response_<time>_<uuid>.mp3 for every
+answer, re-synthesizing the same text again and again while static/audio
+grew forever. AudioStore names each file after a hash of (lang, text), so a
+repeated answer reuses the file that already exists. Files are written to a
+temporary name and renamed into place, so readers never see a partial MP3
+and concurrent workers can race safely.
+
+Disk use is bounded: when the directory goes over AUDIO_CACHE_MAX_BYTES the
+least recently used files are deleted (a hit refreshes the file's mtime)
+until it is down to AUDIO_CACHE_LOW_WATER of the budget (default 0.9), so
+the stores that follow don't each pay for another scan of the directory.
+A store built with max_bytes=None (the pre-rendered KB audio) has no budget
+and never evicts.
+A janitor thread periodically enforces the budget and removes orphans:
+abandoned temp files and the legacy per-request response_*.mp3 files.
+
+Because a name always means the same (lang, text), files are served by
+app.py's /audio route as immutable, with a content-hash ETag (etag_for) and
+Range support. Synthesizer output can be re-encoded to a more compact codec
+with pydub (needs ffmpeg) before it is stored:
+
+    AUDIO_CODEC     "" keeps the synthesizer's MP3 (default); "mp3" re-encodes
+                    it as mono MP3 at AUDIO_BITRATE; "opus" stores mono Ogg
+                    Opus (.ogg) at AUDIO_BITRATE, which older Safari can't play
+    AUDIO_BITRATE   target bitrate for re-encoding (default "32k")
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get("AUDIO_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+AUDIO_CACHE_LOW_WATER = float(os.environ.get("AUDIO_CACHE_LOW_WATER", "0.9"))
+AUDIO_JANITOR_INTERVAL = float(os.environ.get("AUDIO_JANITOR_INTERVAL", "600"))
+# temp / legacy files younger than this are left alone (they may still be in use)
+ORPHAN_GRACE_SECONDS = 600
+AUDIO_CODEC = os.environ.get("AUDIO_CODEC", "").lower()
+AUDIO_BITRATE = os.environ.get("AUDIO_BITRATE", "32k")
+
+_HASHED_NAME = re.compile(r"^[0-9a-f]{32}\.(mp3|ogg)$")
+# file extension and pydub export arguments per AUDIO_CODEC
+_CODECS = {
+    "mp3": ("mp3", {"format": "mp3"}),
+    "opus": ("ogg", {"format": "ogg", "codec": "libopus"}),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def is_audio_name(filename):
+    """Whether `filename` has the form of a stored audio file (<key>.<ext>)."""
+    return bool(_HASHED_NAME.match(filename))
+
+
+def audio_path(directory, filename):
+    """Path of a stored audio file, or None if the name isn't one of ours or doesn't exist."""
+    if not is_audio_name(filename):
+        return None
+    path = os.path.join(directory, filename)
+    return path if os.path.isfile(path) else None
+
+
+# (path, inode, size) -> ETag; a stored file is never rewritten in place, so
+# the inode identifies its content. Bounded by simply starting over.
+_etags = {}
+_ETAG_CACHE_SIZE = 10000
+
+
+def etag_for(path):
+    """Strong ETag: hash of the file's bytes, computed once per file."""
+    st = os.stat(path)
+    key = (path, st.st_ino, st.st_size)
+    etag = _etags.get(key)
+    if etag is None:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        etag = digest.hexdigest()
+        if len(_etags) >= _ETAG_CACHE_SIZE:
+            _etags.clear()
+        _etags[key] = etag
+    return etag
+
+
+def transcode(path, codec=AUDIO_CODEC, bitrate=AUDIO_BITRATE):
+    """Re-encode the audio file at `path` in place as mono `codec` at `bitrate`."""
+    from pydub import AudioSegment
+    _, export_args = _CODECS[codec]
+    out = f"{path}.{codec}"
+    try:
+        AudioSegment.from_file(path).set_channels(1).export(out, bitrate=bitrate, **export_args)
+        os.replace(out, path)
+    finally:
+        if os.path.exists(out):
+            os.remove(out)
+
+
+class AudioStore:
+    def __init__(self, directory, url_prefix="/audio", max_bytes=AUDIO_CACHE_MAX_BYTES, codec=AUDIO_CODEC,
+                 low_water=AUDIO_CACHE_LOW_WATER):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        if max_bytes is not None and math.isinf(max_bytes):
+            max_bytes = None
+        self.max_bytes = max_bytes  # None: no budget, nothing is ever evicted
+        self.low_water_bytes = int(max_bytes * low_water) if max_bytes is not None else None
+        if codec and codec not in _CODECS:
+            raise ValueError(f"Unknown AUDIO_CODEC {codec!r}; choose from {', '.join(_CODECS)}")
+        self.codec = codec
+        self.ext = _CODECS[codec][0] if codec else "mp3"
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes = self._scan_bytes()
+        self._evicting = False
+        self._janitor = None
+        self._counts = {"hits": 0, "synthesized": 0, "failures": 0, "evicted_files": 0, "pruned_orphans": 0}
+
+    # ---- naming ----
+    @staticmethod
+    def key_for(text, lang):
+        return hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+    def filename_for(self, text, lang):
+        return f"{self.key_for(text, lang)}.{self.ext}"
+
+    def url_for(self, filename):
+        return f"{self.url_prefix}/{filename}"
+
+    # ---- lookup / create ----
+    def lookup(self, text, lang):
+        """URL of the stored audio for (text, lang), or None if it isn't rendered yet."""
+        filename = self.filename_for(text, lang)
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        self._count("hits")
+        return self.url_for(filename)
+
+    def get_or_create(self, text, lang, synthesize):
+        """
+        Return the URL of the audio for (text, lang), calling
+        `synthesize(output_path) -> bool` only if it isn't stored yet.
+        Returns None if synthesis fails.
+        """
+        url = self.lookup(text, lang)
+        if url:
+            return url
+
+        filename = self.filename_for(text, lang)
+        path = os.path.join(self.directory, filename)
+
+        tmp_path = os.path.join(self.directory, f"{self.key_for(text, lang)}.{uuid.uuid4().hex[:8]}.part")
+        try:
+            ok = synthesize(tmp_path)
+            if not ok or not os.path.exists(tmp_path):
+                self._count("failures")
+                return None
+            if self.codec:
+                try:
+                    transcode(tmp_path, self.codec)
+                except Exception as e:
+                    logger.error("Audio re-encoding error: %s", e)
+                    self._count("failures")
+                    return None
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            self._counts["synthesized"] += 1
+            self._bytes += size
+            over = self.max_bytes is not None and self._bytes > self.max_bytes
+        if over:
+            self.enforce_budget(keep=path)
+        return self.url_for(filename)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    # ---- eviction / janitor ----
+    def _entries(self):
+        """(path, size, mtime) for every content-addressed file in the store."""
+        out = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and _HASHED_NAME.match(entry.name):
+                    st = entry.stat()
+                    out.append((entry.path, st.st_size, st.st_mtime))
+        return out
+
+    def _scan_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def enforce_budget(self, keep=None):
+        """
+        If the store is over max_bytes, delete least recently used files until
+        it is down to low_water_bytes. One eviction runs at a time; a call made
+        while another is running returns 0 at once, as does any call on a store
+        without a budget.
+        """
+        if self.max_bytes is None:
+            return 0
+        with self._lock:
+            if self._evicting:
+                return 0
+            self._evicting = True
+        try:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            if total > self.max_bytes:
+                for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                    if total <= self.low_water_bytes:
+                        break
+                    if path == keep:
+                        continue
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    removed += 1
+            with self._lock:
+                self._bytes = total
+                self._counts["evicted_files"] += removed
+            return removed
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def prune_orphans(self, grace=ORPHAN_GRACE_SECONDS):
+        """Remove abandoned *.part files and legacy response_*.mp3 files."""
+        cutoff = time.time() - grace
+        removed = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                name = entry.name
+                if not entry.is_file():
+                    continue
+                if not (name.endswith(".part") or (name.startswith("response_") and name.endswith(".mp3"))):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except OSError:
+                    continue
+        self._count("pruned_orphans", removed)
+        return removed
+
+    def run_janitor_once(self):
+        self.prune_orphans()
+        self.enforce_budget()
+
+    def start_janitor(self, interval=AUDIO_JANITOR_INTERVAL):
+        """Run the janitor on a daemon thread every `interval` seconds."""
+        if self._janitor is not None or interval <= 0:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.run_janitor_once()
+                except Exception as e:
+                    logger.error("Audio janitor error: %s", e)
+                time.sleep(interval)
+
+        self._janitor = threading.Thread(target=loop, name="audio-janitor", daemon=True)
+        self._janitor.start()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts, bytes=self._bytes, max_bytes=self.max_bytes, codec=self.codec or "as synthesized")
+        return counts
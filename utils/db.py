@@ -0,0 +1,118 @@
+"""
+SQLite access for the users database.
+
+app.py used to open a new connection for every signup / login and close it
+again, with the database in rollback-journal mode, so concurrent logins
+serialized on the write lock. Database switches the file to WAL once (readers
+no longer block on a writer) and keeps a small pool of long-lived
+connections that request threads check out and return. Werkzeug serves each
+request on a new thread, so per-thread connections would be opened afresh
+for every request. Each connection applies a few cheap pragmas once and
+reuses the same SQL strings so sqlite3's statement cache keeps them prepared.
+
+    DB_POOL_SIZE   connections kept open (default 8); a request that finds
+                   them all checked out waits for one
+"""
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+
+# per connection; journal_mode=WAL is stored in the file and set once by init_schema
+PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",   # durable across app crashes; fsync only at checkpoints
+    "PRAGMA busy_timeout=10000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",     # ~8 MB page cache per connection
+    "PRAGMA foreign_keys=ON",
+)
+
+_CREATE_USERS = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE,
+        password_hash TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+_GET_USER_BY_USERNAME = "SELECT id, username, email, password_hash FROM users WHERE username = ?"
+_INSERT_USER = "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)"
+
+
+class Database:
+    def __init__(self, path, timeout=10, pool_size=DB_POOL_SIZE):
+        self.path = path
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = queue.LifoQueue()  # most recently used first: its pages are warm
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # one thread at a time uses a connection, but not always the one that opened it
+        conn = sqlite3.connect(self.path, timeout=self.timeout, cached_statements=64,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Check out a pooled connection for the duration of the block."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                opened = self._opened < self.pool_size
+                if opened:
+                    self._opened += 1
+            if opened:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(f"no database connection free after {self.timeout} s") from None
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        """Close the idle connections (checked-out ones stay open)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+    def init_schema(self):
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_CREATE_USERS)
+            conn.commit()
+
+    # ---- users ----
+    def get_user_by_username(self, username):
+        with self.connection() as conn:
+            return conn.execute(_GET_USER_BY_USERNAME, (username,)).fetchone()
+
+    def create_user(self, username, email, password_hash):
+        """Insert a user; raises sqlite3.IntegrityError if username / email is taken."""
+        with self.connection() as conn, conn:
+            conn.execute(_INSERT_USER, (username, email, password_hash))
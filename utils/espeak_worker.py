@@ -0,0 +1,100 @@
+"""
+espeak-ng worker process for utils.tts_backends.EspeakBackend.
+
+Started as `python -m utils.espeak_worker`, so it imports only this module
+and utils.tts_backends, never the app that started it. It loads
+libespeak-ng and its voice data once, then answers requests on stdin until
+stdin closes:
+
+    request   one JSON line: {"text": ..., "voice": ...}
+    reply     one JSON line {"error": null | message, "size": n}, then n
+              bytes of MP3
+
+The first reply (to no request) says whether initialization worked.
+"""
+import ctypes
+import ctypes.util
+import json
+import os
+import sys
+
+from utils.tts_backends import TTS_ESPEAK_WPM, encode_mp3
+
+_AUDIO_OUTPUT_SYNCHRONOUS = 2
+_POS_CHARACTER = 1
+_ESPEAK_CHARS_UTF8 = 1
+_ESPEAK_RATE = 1
+_SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+_espeak = None  # (library, PCM chunks, sample rate, callback)
+
+
+def _espeak_init():
+    """Load libespeak-ng and its data."""
+    global _espeak
+    path = ctypes.util.find_library("espeak-ng")
+    if path is None:
+        raise RuntimeError("libespeak-ng not found")
+    lib = ctypes.CDLL(path)
+    lib.espeak_Synth.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int, ctypes.c_uint,
+                                 ctypes.c_uint, ctypes.POINTER(ctypes.c_uint), ctypes.c_void_p]
+    lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+    sample_rate = lib.espeak_Initialize(_AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+    if sample_rate <= 0:
+        raise RuntimeError("espeak-ng failed to initialize")
+    chunks = []
+
+    @_SYNTH_CALLBACK
+    def on_audio(wav, count, events):
+        if wav and count > 0:
+            chunks.append(ctypes.string_at(wav, count * 2))
+        return 0
+
+    lib.espeak_SetSynthCallback(on_audio)
+    lib.espeak_SetParameter(_ESPEAK_RATE, TTS_ESPEAK_WPM, 0)
+    # the callback must stay referenced for as long as the library may call it
+    _espeak = (lib, chunks, sample_rate, on_audio)
+
+
+def _espeak_synthesize(text, voice):
+    lib, chunks, sample_rate, _ = _espeak
+    chunks.clear()
+    if lib.espeak_SetVoiceByName(voice.encode("ascii")) != 0:
+        raise RuntimeError(f"espeak-ng has no voice {voice!r}")
+    data = text.encode("utf-8") + b"\0"
+    if lib.espeak_Synth(data, len(data), 0, _POS_CHARACTER, 0, _ESPEAK_CHARS_UTF8, None, None) != 0:
+        raise RuntimeError("espeak-ng synthesis failed")
+    lib.espeak_Synchronize()
+    return encode_mp3(b"".join(chunks), sample_rate)
+
+
+def _reply(out, audio=b"", error=None):
+    out.write(json.dumps({"error": error, "size": len(audio)}).encode("utf-8") + b"\n")
+    out.write(audio)
+    out.flush()
+
+
+def main():
+    # replies go to the original stdout; anything the libraries print goes to stderr
+    out = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        _espeak_init()
+        _espeak_synthesize("ready", "en")
+    except Exception as e:
+        _reply(out, error=str(e))
+        return 1
+    _reply(out)
+    for line in sys.stdin.buffer:
+        request = json.loads(line)
+        try:
+            audio = _espeak_synthesize(request["text"], request["voice"])
+        except Exception as e:
+            _reply(out, error=str(e))
+            continue
+        _reply(out, audio)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
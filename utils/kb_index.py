@@ -0,0 +1,82 @@
+"""
+Keyword index for the exact-match stage of get_answer.
+
+The old loop compiled one `\\b<key>\\b` regex per KB key on every query.
+KeywordIndex builds a character trie over the normalized keys once, then
+walks it from every word boundary of the query. It returns the same key the
+regex loop would: the longest matching key, ties going to the key that comes
+first in the KB.
+"""
+
+
+def _is_word_char(ch: str) -> bool:
+    # same definition of \w that `re` uses for str patterns
+    return ch.isalnum() or ch == "_"
+
+
+def _boundaries(text: str):
+    """Return a list of booleans: True where `\\b` holds at position i (0..len)."""
+    flags = [_is_word_char(c) for c in text]
+    result = []
+    prev = False
+    for cur in flags:
+        result.append(prev != cur)
+        prev = cur
+    result.append(prev)  # end of string is a boundary after a word char
+    return result
+
+
+class KeywordIndex:
+    """Char trie over normalized KB keys with whole-word / phrase lookup."""
+
+    _TERMINAL = "\0key"
+
+    def __init__(self, keys, normalize):
+        self._normalize = normalize
+        self._root = {}
+        self._size = 0
+        for order, key in enumerate(keys):
+            self.add(key, order)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, order=None):
+        """Insert `key`; `order` is its position in the KB (used for tie-breaks)."""
+        if order is None:
+            order = self._size
+        node = self._root
+        for ch in self._normalize(key):
+            node = node.setdefault(ch, {})
+        rank = (len(key), -order)
+        current = node.get(self._TERMINAL)
+        if current is None or rank > current[0]:
+            node[self._TERMINAL] = (rank, key)
+        self._size += 1
+
+    def longest_match(self, text: str):
+        """
+        Return the KB key whose normalized form appears in `text` as a
+        whole word / phrase, preferring the longest original key. `text`
+        must already be normalized. Returns None when nothing matches.
+        """
+        bounds = _boundaries(text)
+        n = len(text)
+        best = None
+        terminal = self._TERMINAL
+        for start in range(n + 1):
+            if not bounds[start]:
+                continue
+            node = self._root
+            pos = start
+            while True:
+                hit = node.get(terminal)
+                if hit is not None and bounds[pos] and (best is None or hit[0] > best[0]):
+                    best = hit
+                if pos >= n:
+                    break
+                node = node.get(text[pos])
+                if node is None:
+                    break
+                pos += 1
+        return best[1] if best else None
@@ -0,0 +1,334 @@
+"""
+On-disk knowledge store: KB entries in SQLite, passages indexed with FTS5.
+
+BANKING_CONTEXT used to be the only copy of the KB, so adding an entry meant
+editing source and restarting every worker (and reloading the QA model).
+KnowledgeStore keeps the entries in KB_DB_PATH (default data/kb.db; set it to
+an empty string to serve the built-in BANKING_CONTEXT only):
+
+    entries        key, body, example questions (one per line)
+    passages       the QA passages of every entry, with an FTS5 index that
+                   replaces the per-worker in-memory BM25 index
+    meta.version   bumped by triggers on every change to entries
+
+Workers poll meta.version (a one-row read) every KB_WATCH_INTERVAL seconds
+and, when it moves, swap a rebuilt KBSnapshot in with KnowledgeBase.update;
+requests in flight finish on the snapshot they started with. The FTS index
+is read through SQLite's memory-mapped I/O (KB_MMAP_BYTES), so it is shared
+by all workers through the page cache instead of copied into each one. The
+entries themselves are not: every worker's snapshot holds the whole KB.
+
+Edits can come from anywhere, including the sqlite3 shell; the triggers
+queue the changed keys and the next sync re-splits their passages.
+
+The store is seeded from BANKING_CONTEXT on first run. The table `seeded`
+keeps a hash of every built-in entry as seeded, so when an entry is later
+edited in source the next startup writes that entry again (the source wins
+over store edits to it) and logs it; entries the source no longer has are
+only logged, never deleted.
+
+    python -m utils.kb_store seed                  # load BANKING_CONTEXT changes
+    python -m utils.kb_store import entries.json   # {key: body | {"body", "questions"}}
+    python -m utils.kb_store export entries.json
+    python -m utils.kb_store stats
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from utils.knowledge_base import text_hash
+from utils.retriever import entry_passages, tokenize
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KB_DB_PATH = os.environ.get("KB_DB_PATH", os.path.join(APP_ROOT, "data", "kb.db"))
+KB_WATCH_INTERVAL = float(os.environ.get("KB_WATCH_INTERVAL", "2"))
+KB_MMAP_BYTES = int(os.environ.get("KB_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        body TEXT NOT NULL,
+        questions TEXT NOT NULL DEFAULT '',
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE IF NOT EXISTS passages (
+        id INTEGER PRIMARY KEY,
+        key TEXT NOT NULL,
+        text TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS passages_key ON passages (key)",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts
+        USING fts5(text, content='passages', content_rowid='id')""",
+    # keep the FTS index in step with the passages table
+    """CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+        INSERT INTO passages_fts (rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+        INSERT INTO passages_fts (passages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta (name, value) VALUES ('version', 0)",
+    # keys whose passages must be re-split (written by the triggers below;
+    # no OR IGNORE there, an upsert's conflict clause would override it)
+    "CREATE TABLE IF NOT EXISTS stale (key TEXT PRIMARY KEY)",
+    # built-in entries as last seeded: key -> hash of body + questions
+    "CREATE TABLE IF NOT EXISTS seeded (key TEXT PRIMARY KEY, hash TEXT NOT NULL)",
+    """CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+        INSERT INTO stale (key) SELECT new.key WHERE new.key NOT IN (SELECT key FROM stale);
+        UPDATE meta SET value = value + 1 WHERE name = 'version';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN
+        INSERT INTO stale (key) SELECT old.key WHERE old.key NOT IN (SELECT key FROM stale);
+        INSERT INTO stale (key) SELECT new.key WHERE new.key NOT IN (SELECT key FROM stale);
+        UPDATE meta SET value = value + 1 WHERE name = 'version';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+        INSERT INTO stale (key) SELECT old.key WHERE old.key NOT IN (SELECT key FROM stale);
+        UPDATE meta SET value = value + 1 WHERE name = 'version';
+    END""",
+)
+
+_UPSERT = """
+    INSERT INTO entries (key, body, questions) VALUES (?, ?, ?)
+    ON CONFLICT (key) DO UPDATE SET body = excluded.body, questions = excluded.questions,
+                                    updated_at = CURRENT_TIMESTAMP
+    WHERE body != excluded.body OR questions != excluded.questions
+"""
+_SEARCH = """
+    SELECT p.text FROM passages_fts JOIN passages p ON p.id = passages_fts.rowid
+    WHERE passages_fts MATCH ? ORDER BY bm25(passages_fts) LIMIT ?
+"""
+
+
+class FTSRetriever:
+    """PassageRetriever's interface, answered by the store's FTS5 index."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def top_passages(self, query, k=3):
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        try:
+            rows = self.store.connection().execute(_SEARCH, (match, k)).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("KB search error: %s", e)
+            return []
+        return [row[0] for row in rows]
+
+
+class KnowledgeStore:
+    def __init__(self, path=KB_DB_PATH, mmap_bytes=KB_MMAP_BYTES):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+        self._watcher = None
+        self.reloads = 0
+        self.loaded_version = None
+
+    def connection(self):
+        """The calling thread's connection (opened and configured on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self.connection()
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    # ---- writes ----
+    def put_many(self, items):
+        """Insert / update entries from (key, body, questions) triples; unchanged ones are skipped."""
+        conn = self.connection()
+        with conn:
+            conn.executemany(_UPSERT, [(key, body, "\n".join(questions or ()))
+                                       for key, body, questions in items])
+        self.refresh_passages()
+
+    def put(self, key, body, questions=()):
+        self.put_many([(key, body, questions)])
+
+    def delete(self, key):
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self.refresh_passages()
+
+    def seed(self, kb, questions=None):
+        """
+        Load `kb` (e.g. BANKING_CONTEXT): every entry into a new store, then
+        only the entries whose built-in text changed since the last seed.
+        Returns the number of entries written.
+        """
+        questions = questions or {}
+        items = [(key, str(body), tuple(questions.get(key, ()))) for key, body in kb.items()]
+        hashes = {key: text_hash("\0".join((body, *qs))) for key, body, qs in items}
+        conn = self.connection()
+        seeded = dict(conn.execute("SELECT key, hash FROM seeded").fetchall())
+        if not seeded and conn.execute("SELECT 1 FROM entries LIMIT 1").fetchone():
+            # seeded before the hashes were kept: take the current source as the baseline
+            logger.info(f"KB store {self.path} has no seed record; built-in KB edits are tracked from now on")
+            changed = []
+        else:
+            changed = [item for item in items if seeded.get(item[0]) != hashes[item[0]]]
+        if changed:
+            self.put_many(changed)
+            if seeded:
+                logger.warning(f"⚠️ Built-in KB changed since {self.path} was seeded; re-seeded "
+                               f"{len(changed)} entries: {', '.join(key for key, _, _ in changed)}")
+        removed = sorted(set(seeded) - set(hashes))
+        if removed:
+            logger.warning(f"⚠️ Entries removed from the built-in KB are still in {self.path}: {', '.join(removed)}")
+        if seeded != hashes:
+            with conn:
+                conn.execute("DELETE FROM seeded")
+                conn.executemany("INSERT INTO seeded (key, hash) VALUES (?, ?)", hashes.items())
+        return len(changed)
+
+    def refresh_passages(self):
+        """Re-split the passages of every entry changed since the last refresh."""
+        conn = self.connection()
+        with conn:
+            # IMMEDIATE: only one worker rebuilds a given batch of stale keys
+            conn.execute("BEGIN IMMEDIATE")
+            keys = [row[0] for row in conn.execute("SELECT key FROM stale")]
+            for key in keys:
+                conn.execute("DELETE FROM passages WHERE key = ?", (key,))
+                row = conn.execute("SELECT body FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.executemany("INSERT INTO passages (key, text) VALUES (?, ?)",
+                                     [(key, text) for text in entry_passages(row[0])])
+            conn.execute("DELETE FROM stale")
+        return len(keys)
+
+    # ---- reads ----
+    def version(self):
+        return self.connection().execute("SELECT value FROM meta WHERE name = 'version'").fetchone()[0]
+
+    def load(self):
+        """Return (kb, questions, version), read in one transaction; entries in insertion order."""
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            version = self.version()
+            kb, questions = {}, {}
+            for key, body, qs in conn.execute("SELECT key, body, questions FROM entries ORDER BY rowid"):
+                kb[key] = body
+                if qs:
+                    questions[key] = qs.split("\n")
+        return kb, questions, version
+
+    def retriever(self):
+        return FTSRetriever(self)
+
+    # ---- keeping a KnowledgeBase in sync ----
+    def sync(self, knowledge_base):
+        """Swap the store's current content into `knowledge_base` if it changed. Returns True if swapped."""
+        version = self.version()
+        if version == self.loaded_version:
+            return False
+        if self.connection().execute("SELECT 1 FROM stale LIMIT 1").fetchone():
+            self.refresh_passages()
+        kb, questions, version = self.load()
+        swapped = knowledge_base.update(kb, questions, retriever=self.retriever())
+        self.loaded_version = version
+        if swapped:
+            self.reloads += 1
+            logger.info(f"✅ KB reloaded from {self.path}: {len(kb)} entries (store version {version})")
+        return swapped
+
+    def start_watcher(self, knowledge_base, interval=KB_WATCH_INTERVAL):
+        """Poll for changes on a daemon thread; no-op if already watching."""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync(knowledge_base)
+                except Exception as e:
+                    logger.error("KB watcher error: %s", e)
+
+        self._watcher = threading.Thread(target=run, name="kb-watcher", daemon=True)
+        self._watcher.start()
+
+    def stats(self):
+        conn = self.connection()
+        return {
+            "path": self.path,
+            "entries": conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+            "passages": conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0],
+            "version": self.version(),
+            "loaded_version": self.loaded_version,
+            "reloads": self.reloads,
+        }
+
+
+def open_store(knowledge_base, seed_kb=None, seed_questions=None, watch=True, path=KB_DB_PATH):
+    """
+    Seed the store at `path` if it is new, load it into `knowledge_base` and
+    (with watch=True) keep following it. Returns the store, or None when
+    KB_DB_PATH is empty and the built-in KB is used as is.
+    """
+    if not path:
+        return None
+    store = KnowledgeStore(path)
+    store.init_schema()
+    if seed_kb is not None:
+        store.seed(seed_kb, seed_questions)
+    store.sync(knowledge_base)
+    if watch:
+        store.start_watcher(knowledge_base)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the on-disk knowledge store.")
+    parser.add_argument("command", choices=("seed", "import", "export", "stats"))
+    parser.add_argument("file", nargs="?", help="JSON file for import / export")
+    args = parser.parse_args()
+
+    store = KnowledgeStore()
+    store.init_schema()
+    if args.command == "seed":
+        from utils.ai_engine import BANKING_CONTEXT, EXAMPLE_QUESTIONS
+        print(f"seeded {store.seed(BANKING_CONTEXT, EXAMPLE_QUESTIONS)} entries")
+    elif args.command == "import":
+        with open(args.file, encoding="utf-8") as f:
+            data = json.load(f)
+        items = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                items.append((key, value["body"], value.get("questions", ())))
+            else:
+                items.append((key, value, ()))
+        store.put_many(items)
+        print(f"imported {len(items)} entries")
+    elif args.command == "export":
+        kb, questions, _ = store.load()
+        data = {k: {"body": body, "questions": questions.get(k, [])} for k, body in kb.items()}
+        with open(args.file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        print(f"exported {len(data)} entries")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Versioned snapshot of the KB and everything derived from it.
+
+get_answer used to rebuild its working data on every request: the fuzzy
+choices list, the flattened QA context, the formatted answers. KBSnapshot
+builds all of it once per KB version; KnowledgeBase holds the current
+snapshot and only rebuilds it when the KB content actually changes.
+"""
+import hashlib
+import json
+import re
+import threading
+from functools import cached_property
+
+from utils.kb_index import KeywordIndex
+from utils.retriever import PassageRetriever, tokenize
+
+
+def format_entry(value):
+    """
+    Accepts either:
+      - dict with keys 'title','definition','how_to_use','example','tips'
+      - list of strings (old style)
+    Returns a nicely formatted multi-paragraph string.
+    """
+    if isinstance(value, dict):
+        parts = []
+        if value.get("title"):
+            parts.append(f"{value['title']}.")
+        if value.get("definition"):
+            parts.append(f"{value['definition']}")
+        if value.get("how_to_use"):
+            parts.append(f"How to use / How it works: {value['how_to_use']}")
+        if value.get("example"):
+            parts.append(f"{value['example']}")
+        if value.get("tips"):
+            parts.append(f"Tip: {value['tips']}")
+        # join with two newlines for clear paragraphs
+        return "\n\n".join(parts)
+    elif isinstance(value, (list, tuple)):
+        # old-style: choose the longer string(s) and combine them
+        # prefer longer strings and join up to 2 items
+        sorted_items = sorted(value, key=lambda s: len(s), reverse=True)
+        chosen = sorted_items[:2]  # combine two longest
+        return "\n\n".join(chosen)
+    else:
+        return str(value)
+
+
+# --- Helper: clean text for matching ---
+def normalize(text: str) -> str:
+    return re.sub(r'\s+', ' ', (text or "").strip().lower())
+
+
+def flatten_entry(value):
+    """One KB value as plain text (what the old QA context was built from)."""
+    if isinstance(value, dict):
+        # join dict values (title, definition, how_to_use, example, tips)
+        return " ".join([str(x) for x in value.values() if x])
+    elif isinstance(value, (list, tuple)):
+        return " ".join([str(x) for x in value if x])
+    return str(value)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def kb_fingerprint(kb, questions=None) -> str:
+    """Content hash of the KB; identical KBs get the same version in every worker."""
+    content = [kb, questions] if questions else kb
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class KBSnapshot:
+    """
+    Immutable view of one KB version with all derived artifacts precomputed.
+
+    `questions` maps keys to example questions (for the semantic tier).
+    `retriever` replaces the in-memory BM25 index, e.g. with the knowledge
+    store's FTS5 index, which lives on disk instead of in every worker.
+    """
+
+    def __init__(self, kb, version=None, questions=None, retriever=None):
+        self.kb = dict(kb)
+        self.questions = dict(questions or {})
+        self.version = version or kb_fingerprint(self.kb, self.questions)
+        # fuzzy stage: rapidfuzz choices in KB order
+        self.choices = list(self.kb.keys())
+        self.normalized_keys = [normalize(k) for k in self.choices]
+        # exact stage: trie over the normalized keys
+        self.index = KeywordIndex(self.choices, normalize)
+        # answers returned for a KB hit, and a hash of each so per-entry
+        # artifacts (pre-rendered audio / translations) can tell what changed
+        self.formatted = {k: format_entry(v) for k, v in self.kb.items()}
+        self.entry_hashes = {k: text_hash(v) for k, v in self.formatted.items()}
+        # QA stage: the passage index
+        self.retriever = retriever or PassageRetriever(self.kb)
+
+    # the whole KB flattened into one QA context; only the benchmarks still
+    # use it, so it isn't built (or held per worker) unless asked for
+    @cached_property
+    def context_text(self):
+        return " ".join(flatten_entry(v) for v in self.kb.values())
+
+    @cached_property
+    def context_tokens(self):
+        return tokenize(self.context_text)
+
+    def __len__(self):
+        return len(self.kb)
+
+
+class KnowledgeBase:
+    """Holds the current KBSnapshot; readers just grab `.snapshot`."""
+
+    def __init__(self, kb, questions=None):
+        self._lock = threading.Lock()
+        self.snapshot = KBSnapshot(kb, questions=questions)
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    def update(self, kb, questions=None, retriever=None):
+        """
+        Rebuild the snapshot if `kb` (or its questions) differs from the
+        current one. The new snapshot is swapped in with a single assignment,
+        so requests in flight keep using the version they started with.
+        Returns True if rebuilt.
+        """
+        version = kb_fingerprint(kb, questions)
+        with self._lock:
+            if version == self.snapshot.version:
+                return False
+            self.snapshot = KBSnapshot(kb, version, questions, retriever)
+        return True
@@ -0,0 +1,39 @@
+"""
+Leveled, non-blocking logging.
+
+The app used to print() progress and errors straight to stdout from request
+and worker threads. Modules now log through logging.getLogger(__name__);
+setup_logging() (called once by app.py) installs a QueueHandler on the root
+logger and a QueueListener thread that does the actual writes, so a request
+thread only appends a record to a queue and never blocks on a slow terminal
+or pipe.
+
+    LOG_LEVEL   DEBUG, INFO (default), WARNING or ERROR
+"""
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener = None
+
+
+def setup_logging(level=LOG_LEVEL):
+    """Route all logging through a background writer thread; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(records)]
+    root.setLevel(level)
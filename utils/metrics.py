@@ -0,0 +1,241 @@
+"""
+Per-stage latency histograms and a Prometheus-style /metrics endpoint.
+
+Each stage of the /ask chain (exact match, fuzzy match, semantic match, QA
+inference, translation, TTS synthesis, audio file write, speech recognition)
+is wrapped in `timed(stage)`, which records its duration in a histogram
+labelled by stage and language. The language is passed explicitly where the
+code knows it (translation, TTS) and otherwise taken from the request being
+served (set_language, called by the routes). Histograms use fixed buckets,
+so an observation is a lock plus a bisect, and p50 / p95 / p99 are
+interpolated from the bucket counts.
+
+render() produces the Prometheus text format: the histograms, their
+quantiles as a separate gauge family, the degradation counter (requests
+served a cheaper result instead of waiting on a saturated or slow stage, see
+degraded()), and numeric counters from the stats() of the caches / pools
+registered with register_stats(). Every worker process keeps its own
+numbers, as with any in-process Prometheus client.
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# seconds; the last bucket is +Inf
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_request_lang = contextvars.ContextVar("request_lang", default="-")
+
+
+def _fmt(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *labelvalues):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0]
+            series[i] += 1
+            series[-1] += seconds
+
+    def _snapshot(self):
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    def quantile(self, q, counts):
+        """Estimate the q-quantile from one series' (non-cumulative) bucket counts."""
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                upper = self.buckets[i]
+                lower = self.buckets[i - 1] if i else 0.0
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-2]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        quantiles = []
+        for labelvalues, series in sorted(self._snapshot().items()):
+            counts, total = series[:-1], series[-1]
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, [('le', _fmt(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {cumulative}")
+            for q in QUANTILES:
+                quantiles.append(f"{self.name}_quantile{_labels(self.labelnames, labelvalues, [('quantile', q)])} "
+                                 f"{self.quantile(q, counts)!r}")
+        if quantiles:
+            lines += [f"# HELP {self.name}_quantile {self.help} Quantiles estimated from the buckets.",
+                      f"# TYPE {self.name}_quantile gauge"] + quantiles
+        return lines
+
+    def summary(self):
+        """{"label/values": {"count", "p50_ms", "p95_ms", "p99_ms"}} for /health."""
+        out = {}
+        for labelvalues, series in sorted(self._snapshot().items()):
+            counts = series[:-1]
+            item = {"count": sum(counts)}
+            for q in QUANTILES:
+                item[f"p{int(q * 100)}_ms"] = round(self.quantile(q, counts) * 1000, 3)
+            out["/".join(labelvalues)] = item
+        return out
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # label values -> count
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues):
+        with self._lock:
+            self._series[labelvalues] = self._series.get(labelvalues, 0) + 1
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"] + [
+            f"{self.name}{_labels(self.labelnames, labelvalues)} {n}" for labelvalues, n in series]
+
+    def summary(self):
+        with self._lock:
+            return {"/".join(labelvalues): n for labelvalues, n in sorted(self._series.items())}
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = []
+        self.counters = []
+        self._stats = []  # (name, stats() callable)
+
+    def histogram(self, name, help_text, labelnames):
+        h = Histogram(name, help_text, labelnames)
+        self.histograms.append(h)
+        return h
+
+    def counter(self, name, help_text, labelnames):
+        c = Counter(name, help_text, labelnames)
+        self.counters.append(c)
+        return c
+
+    def register_stats(self, name, fn):
+        self._stats.append((name, fn))
+
+    def render(self):
+        lines = []
+        for h in self.histograms:
+            lines += h.render()
+        for c in self.counters:
+            lines += c.render()
+        for name, fn in self._stats:
+            try:
+                values = fn()
+            except Exception:
+                continue
+            for key, value in sorted(_flatten(values)):
+                metric = f"gram_{name}_{key}"
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value!r}"]
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(values, prefix=""):
+    """Numeric leaves of a (nested) stats dict as (name, value) pairs."""
+    for key, value in values.items():
+        name = f"{prefix}{key}".replace("-", "_").replace(".", "_").replace(" ", "_")
+        if isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)) and math.isfinite(value):
+            yield name, value
+        elif isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.histogram("gram_stage_seconds", "Time spent in one pipeline stage.", ("stage", "lang"))
+REQUEST_SECONDS = REGISTRY.histogram("gram_request_seconds", "End-to-end request time.",
+                                     ("endpoint", "lang", "tier"))
+DEGRADED = REGISTRY.counter("gram_degraded_total", "Results degraded instead of waiting on a saturated or slow stage.",
+                            ("stage", "reason"))
+
+
+def set_language(lang):
+    """Language of the request being served, for stages that don't know it."""
+    _request_lang.set(lang or "-")
+
+
+def observe(stage, seconds, lang=None):
+    STAGE_SECONDS.observe(seconds, stage, lang or _request_lang.get())
+
+
+@contextmanager
+def timed(stage, lang=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, lang)
+
+
+def degraded(stage, reason):
+    """Count one degradation, e.g. degraded("qa", "queue_full") or degraded("translate", "deadline")."""
+    DEGRADED.inc(stage, reason)
+
+
+def observe_request(trace):
+    """Record a finished RequestTrace (utils/query_log.py)."""
+    tier = "error" if trace.error else (trace.tier or "-")
+    REQUEST_SECONDS.observe(trace.total_ms() / 1000, trace.endpoint, trace.lang or "-", tier)
+
+
+def register_stats(name, fn):
+    REGISTRY.register_stats(name, fn)
+
+
+def render():
+    return REGISTRY.render()
+
+
+def summary():
+    return {"stages": STAGE_SECONDS.summary(), "requests": REQUEST_SECONDS.summary()}
+
+
+def degradations():
+    """{"stage/reason": count} for /health."""
+    return DEGRADED.summary()
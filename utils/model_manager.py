@@ -0,0 +1,131 @@
+"""
+Loads the roberta QA pipeline outside the import path.
+
+Importing utils.ai_engine used to build the transformers pipeline at import
+time, so every Flask worker paid the full model load before serving /login.
+ModelManager loads it on first use (lazy) or on a daemon thread at startup
+(background) and reports its state, so KB exact / fuzzy answers keep being
+served while the model is still loading.
+
+Select the mode with the QA_MODEL_MODE environment variable:
+    background  start loading on a thread when the app starts (default)
+    lazy        start loading the first time a query needs the QA stage
+    eager       load before the app starts serving (old behaviour)
+
+QA_BACKEND picks how the model is run (fp32 torch, int8, ONNX Runtime; see
+utils/qa_backends.py).
+"""
+import logging
+import os
+import threading
+import time
+
+from utils.qa_backends import QA_BACKEND, load_qa_pipeline
+
+QA_MODEL_NAME = os.environ.get("QA_MODEL_NAME", "deepset/roberta-base-squad2")
+QA_MODEL_MODE = os.environ.get("QA_MODEL_MODE", "background").lower()
+# how long a request may wait for a model that is still loading (seconds)
+QA_MODEL_WAIT = float(os.environ.get("QA_MODEL_WAIT", "0"))
+
+logger = logging.getLogger(__name__)
+
+
+class ModelManager:
+    IDLE = "idle"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, loader, name="model"):
+        self.name = name
+        self._loader = loader
+        self._model = None
+        self._state = self.IDLE
+        self._error = None
+        self._load_seconds = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def state(self):
+        return self._state
+
+    def is_ready(self):
+        return self._state == self.READY
+
+    def status(self):
+        """Readiness info for the app's /health endpoint."""
+        return {
+            "name": self.name,
+            "state": self._state,
+            "load_seconds": self._load_seconds,
+            "error": self._error,
+        }
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            model = self._loader()
+        except Exception as e:
+            logger.error(f"❌ Failed to load {self.name}: {e}")
+            with self._lock:
+                self._state = self.FAILED
+                self._error = str(e)
+        else:
+            with self._lock:
+                self._model = model
+                self._state = self.READY
+                self._load_seconds = round(time.perf_counter() - start, 3)
+            logger.info(f"✅ {self.name} ready in {self._load_seconds}s")
+        finally:
+            self._ready.set()
+
+    def _claim(self):
+        """Move IDLE -> LOADING; returns True if the caller should do the load."""
+        with self._lock:
+            if self._state != self.IDLE:
+                return False
+            self._state = self.LOADING
+            return True
+
+    def load(self):
+        """Load synchronously (eager mode) and return the model, or None on failure."""
+        if self._claim():
+            self._load()
+        self._ready.wait()
+        return self._model
+
+    def start_background_load(self):
+        """Start loading on a daemon thread; no-op if already loading or loaded."""
+        if self._claim():
+            logger.info(f"⏳ Loading {self.name} in the background...")
+            threading.Thread(target=self._load, name=f"{self.name}-loader", daemon=True).start()
+
+    def get(self, timeout=0.0):
+        """
+        Return the model if it is ready, else None. Starts a background load
+        when nothing has been loaded yet, and waits up to `timeout` seconds.
+        """
+        if self._state == self.READY:
+            return self._model
+        self.start_background_load()
+        if timeout:
+            self._ready.wait(timeout)
+        return self._model if self._state == self.READY else None
+
+
+def _load_qa_pipeline():
+    # the backends import transformers / torch / onnxruntime only when called
+    return load_qa_pipeline(QA_MODEL_NAME, QA_BACKEND)
+
+
+qa_model = ModelManager(_load_qa_pipeline, name=f"{QA_MODEL_NAME} [{QA_BACKEND}]")
+
+
+def start(mode=QA_MODEL_MODE):
+    """Kick off model loading according to `mode` (called once at app startup)."""
+    if mode == "eager":
+        qa_model.load()
+    elif mode == "background":
+        qa_model.start_background_load()
+    # lazy: nothing to do until the first QA query
@@ -0,0 +1,123 @@
+"""
+Password hashing on a dedicated, bounded worker pool.
+
+werkzeug's generate_password_hash / check_password_hash are deliberately
+expensive key-derivation functions. Run inline, a burst of logins occupied
+the same threads (and cores) that serve /ask. Here they run on a small pool
+of their own:
+
+    PASSWORD_HASH_WORKERS   pool size (default: half the CPU cores)
+    PASSWORD_HASH_POOL      "thread" (default; hashlib releases the GIL) or "process"
+    PASSWORD_HASH_QUEUE     max hashes admitted at once, running + waiting (default 32)
+    PASSWORD_HASH_TIMEOUT   seconds a caller waits for its result (default 10)
+    PASSWORD_HASH_METHOD    werkzeug method string, i.e. the hash cost
+                            (default "scrypt"; e.g. "pbkdf2:sha256:600000")
+
+When the queue is full, callers get HashPoolBusy right away instead of piling
+up behind the pool.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_POOL = os.environ.get("PASSWORD_HASH_POOL", "thread")
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", "32"))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", "10"))
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+
+
+class HashPoolBusy(Exception):
+    """Raised when too many hashes are already queued."""
+
+
+def _timed(fn, *args):
+    # runs in the worker; reports when it actually started
+    started = time.time()
+    return started, fn(*args)
+
+
+class PasswordHasher:
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, pool=PASSWORD_HASH_POOL,
+                 max_queue=PASSWORD_HASH_QUEUE, timeout=PASSWORD_HASH_TIMEOUT,
+                 method=PASSWORD_HASH_METHOD):
+        self.method = method
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self._workers = workers
+        self._pool_kind = pool
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._stats_lock = threading.Lock()
+        self._counts = {"completed": 0, "rejected": 0, "in_flight": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    def _executor(self):
+        # created on first use so importing the app doesn't spawn workers
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self._pool_kind == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self._workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self._workers,
+                                                        thread_name_prefix="pwhash")
+        return self._pool
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._counts["rejected"] += 1
+            raise HashPoolBusy("password hashing queue is full")
+        submitted = time.time()
+        with self._stats_lock:
+            self._counts["in_flight"] += 1
+        try:
+            future = self._executor().submit(_timed, fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # the slot is held until the hash finishes, even if the caller times out
+        future.add_done_callback(lambda _: self._release())
+        try:
+            started, result = future.result(self.timeout)
+        except FutureTimeout:
+            raise HashPoolBusy("password hashing timed out") from None
+        finished = time.time()
+        wait = max(0.0, started - submitted)
+        with self._stats_lock:
+            self._counts["completed"] += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._run_total += finished - started
+        return result
+
+    def _release(self):
+        self._slots.release()
+        with self._stats_lock:
+            self._counts["in_flight"] -= 1
+
+    def hash_password(self, password):
+        return self._submit(generate_password_hash, password, self.method)
+
+    def verify_password(self, password_hash, password):
+        return self._submit(check_password_hash, password_hash, password)
+
+    def stats(self):
+        with self._stats_lock:
+            done = self._counts["completed"]
+            return dict(
+                self._counts,
+                method=self.method,
+                workers=self._workers,
+                max_queue=self.max_queue,
+                mean_queue_wait_ms=round(self._wait_total / done * 1000, 2) if done else 0.0,
+                max_queue_wait_ms=round(self._wait_max * 1000, 2),
+                mean_hash_ms=round(self._run_total / done * 1000, 2) if done else 0.0,
+            )
@@ -0,0 +1,184 @@
+"""
+Pre-rendered translations and audio for every KB entry.
+
+The KB is a fixed set of entries and the app speaks three languages, so an
+exact or fuzzy KB hit can only produce a small number of (answer, language)
+pairs. This module renders all of them ahead of time into a manifest:
+
+    data/prerendered.json       key -> entry hash + per-language text / audio URL
+    static/audio/kb/<hash>.mp3  the MP3s (outside the LRU-evicted audio cache)
+
+At runtime /ask serves KB hits straight from the manifest, with no
+translator or TTS call. Each entry records the hash of the answer text it was
+rendered from, so editing one KB entry only invalidates that entry; the next
+build re-renders just the entries whose hash changed.
+
+Build or refresh it with (from the project root):
+    python -m utils.prerender [--langs en,hi,kn] [--force]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+
+from utils.audio_store import AudioStore
+from utils.knowledge_base import text_hash
+from utils.logging_config import setup_logging
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUPPORTED_LANGUAGES = ("en", "hi", "kn")
+MANIFEST_PATH = os.path.join(APP_ROOT, "data", "prerendered.json")
+PRERENDER_AUDIO_DIR = os.path.join(APP_ROOT, "static", "audio", "kb")
+PRERENDER_AUDIO_URL = "/audio/kb"
+
+logger = logging.getLogger(__name__)
+
+
+def read_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"entries": {}}
+
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+class PrerenderedAnswers:
+    """Runtime view of the manifest: (key, lang) -> (translated text, audio URL)."""
+
+    def __init__(self, manifest_path=MANIFEST_PATH, audio_dir=PRERENDER_AUDIO_DIR):
+        self.manifest_path = manifest_path
+        self.audio_dir = audio_dir
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """(Re)read the manifest; entries whose MP3 is missing are skipped."""
+        entries = {}
+        for key, entry in read_manifest(self.manifest_path).get("entries", {}).items():
+            for lang, rendered in entry.get("langs", {}).items():
+                audio = rendered.get("audio")
+                if not audio or not os.path.exists(os.path.join(self.audio_dir, os.path.basename(audio))):
+                    continue
+                # served by the /audio route, also for manifests written with older URLs
+                audio = f"{PRERENDER_AUDIO_URL}/{os.path.basename(audio)}"
+                entries[(key, lang)] = (entry["hash"], rendered["text"], audio)
+        self._entries = entries
+        return len(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, lang, answer_text):
+        """
+        Return (translated_text, audio_url) if `key` was rendered for `lang`
+        from exactly `answer_text`; None if missing or the entry has changed.
+        """
+        item = self._entries.get((key, lang))
+        if item is None or item[0] != text_hash(answer_text):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item[1], item[2]
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def build(snapshot, translate, synthesize, langs=SUPPORTED_LANGUAGES, force=False,
+          manifest_path=MANIFEST_PATH, audio_dir=PRERENDER_AUDIO_DIR):
+    """
+    Render every (entry, language) of `snapshot` that is missing or stale.
+
+    translate(text, lang) -> str and synthesize(text, lang, output_path) -> bool
+    do the actual work. Returns counts of rendered / reused / failed pairs.
+    """
+    # one file per (entry, language), kept for as long as the entry is: no budget, no eviction
+    store = AudioStore(audio_dir, url_prefix=PRERENDER_AUDIO_URL, max_bytes=None)
+    old = read_manifest(manifest_path).get("entries", {})
+    entries = {}
+    counts = {"rendered": 0, "reused": 0, "failed": 0}
+
+    for key, answer in snapshot.formatted.items():
+        entry_hash = snapshot.entry_hashes[key]
+        previous = old.get(key, {})
+        reusable = previous.get("langs", {}) if previous.get("hash") == entry_hash and not force else {}
+        langs_out = {}
+        for lang in langs:
+            done = reusable.get(lang)
+            if done and store.lookup(done["text"], lang):
+                langs_out[lang] = done
+                counts["reused"] += 1
+                continue
+            try:
+                text = translate(answer, lang) if lang != "en" else answer
+                audio = store.get_or_create(text, lang, lambda path: synthesize(text, lang, path))
+            except Exception as e:
+                logger.error(f"❌ Pre-render failed for '{key}' [{lang}]: {e}")
+                audio = None
+            if not audio:
+                counts["failed"] += 1
+                continue
+            langs_out[lang] = {"text": text, "audio": audio}
+            counts["rendered"] += 1
+            logger.info(f"✅ Pre-rendered '{key}' [{lang}]")
+        entries[key] = {"hash": entry_hash, "langs": langs_out}
+
+    # entries removed from the KB simply drop out of the new manifest
+    write_manifest({"kb_version": snapshot.version, "entries": entries}, manifest_path)
+    return counts
+
+
+def _gtts_synthesize(text, lang, output_path):
+    from utils.tts import speak
+    return speak(text, lang_code=lang, output_path=output_path)
+
+
+def build_default(langs=SUPPORTED_LANGUAGES, force=False):
+    """Build the manifest for the current KB with the translation service + gTTS."""
+    from utils.ai_engine import BANKING_CONTEXT, EXAMPLE_QUESTIONS, KB
+    from utils.kb_store import open_store
+    from utils.translation import TranslationService
+    # render what the app serves: the knowledge store's entries if there is one,
+    # seeded as app.py seeds it so a fresh store isn't rendered as an empty KB
+    open_store(KB, BANKING_CONTEXT, EXAMPLE_QUESTIONS, watch=False)
+    # an offline build waits for slow translations instead of degrading
+    translator = TranslationService(deadline=None)
+    return build(KB.snapshot, lambda text, lang: translator.translate(text, target=lang),
+                 _gtts_synthesize, langs=langs, force=force)
+
+
+def build_in_background(prerendered, langs=SUPPORTED_LANGUAGES):
+    """Build on a daemon thread (app startup) and reload `prerendered` when done."""
+    def run():
+        try:
+            counts = build_default(langs)
+            logger.info(f"✅ Pre-render finished: {counts}")
+        except Exception as e:
+            logger.error("Pre-render error: %s", e)
+        prerendered.load()
+
+    threading.Thread(target=run, name="prerender", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render translations and audio for every KB entry.")
+    parser.add_argument("--langs", default=",".join(SUPPORTED_LANGUAGES))
+    parser.add_argument("--force", action="store_true", help="re-render entries even if unchanged")
+    args = parser.parse_args()
+    setup_logging()
+    counts = build_default(tuple(args.langs.split(",")), force=args.force)
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Inference backends for the QA reader.
+
+The reader used to be the full-precision PyTorch roberta-base-squad2 built by
+transformers.pipeline: a few hundred milliseconds per call on our CPU-only
+hosts and about a gigabyte of RAM per worker. QA_BACKEND selects how the
+same model is run; every backend returns a transformers question-answering
+pipeline, so QABatcher and the benchmarks call it exactly like before
+(pipe(question=..., context=...) -> {"answer", "score", "start", "end"}).
+
+    torch        fp32 PyTorch (default, the old behaviour)
+    torch-int8   torch dynamic quantization: nn.Linear weights stored as
+                 int8, activations quantized on the fly; no export step
+    onnx         ONNX Runtime, exported once with optimum into ONNX_MODEL_DIR
+    onnx-int8    the ONNX export with dynamically int8-quantized weights
+
+The ONNX backends need `optimum[onnxruntime]`, an optional install
+(requirements-onnx.txt). The first load exports the model (and quantizes it
+for onnx-int8) into ONNX_MODEL_DIR/<model>; later
+loads, and every other worker, reuse the files. Compare the backends with
+`python -m benchmarks.bench_qa_backends`.
+"""
+import os
+import shutil
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QA_BACKEND = os.environ.get("QA_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", os.path.join(APP_ROOT, "data", "onnx"))
+# intra-op threads per forward pass; 0 = the runtime's default
+QA_THREADS = int(os.environ.get("QA_THREADS", "0"))
+
+_ONNX_FILE = "model.onnx"
+_ONNX_INT8_FILE = "model_int8.onnx"
+
+
+def _pipeline(model, tokenizer):
+    from transformers import pipeline
+    return pipeline("question-answering", model=model, tokenizer=tokenizer)
+
+
+def load_torch(model_name):
+    from transformers import pipeline
+    if QA_THREADS:
+        import torch
+        torch.set_num_threads(QA_THREADS)
+    return pipeline("question-answering", model=model_name)
+
+
+def load_torch_int8(model_name):
+    import torch
+    from transformers import AutoModelForQuestionAnswering, AutoTokenizer
+    if QA_THREADS:
+        torch.set_num_threads(QA_THREADS)
+    model = AutoModelForQuestionAnswering.from_pretrained(model_name).eval()
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return _pipeline(model, AutoTokenizer.from_pretrained(model_name))
+
+
+def onnx_export_dir(model_name, root=ONNX_MODEL_DIR):
+    return os.path.join(root, model_name.replace("/", "--"))
+
+
+def export_onnx(model_name, quantize=False, root=ONNX_MODEL_DIR):
+    """Export `model_name` (and an int8 copy with quantize=True) unless already done. Returns the directory."""
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForQuestionAnswering
+
+    out = onnx_export_dir(model_name, root)
+    if not os.path.exists(os.path.join(out, _ONNX_FILE)):
+        # export into a temp dir and rename, so a concurrent worker never sees half a model
+        tmp = f"{out}.{os.getpid()}.tmp"
+        ORTModelForQuestionAnswering.from_pretrained(model_name, export=True).save_pretrained(tmp)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp)
+        try:
+            os.rename(tmp, out)
+        except OSError:
+            # another worker finished first; use its export
+            shutil.rmtree(tmp, ignore_errors=True)
+    if quantize and not os.path.exists(os.path.join(out, _ONNX_INT8_FILE)):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        tmp = os.path.join(out, f"{os.getpid()}.tmp.onnx")
+        quantize_dynamic(os.path.join(out, _ONNX_FILE), tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, os.path.join(out, _ONNX_INT8_FILE))
+    return out
+
+
+def load_onnx(model_name, quantize=False):
+    import onnxruntime
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForQuestionAnswering
+
+    path = export_onnx(model_name, quantize=quantize)
+    options = onnxruntime.SessionOptions()
+    if QA_THREADS:
+        options.intra_op_num_threads = QA_THREADS
+    model = ORTModelForQuestionAnswering.from_pretrained(
+        path, file_name=_ONNX_INT8_FILE if quantize else _ONNX_FILE, session_options=options,
+        provider="CPUExecutionProvider",
+    )
+    return _pipeline(model, AutoTokenizer.from_pretrained(path))
+
+
+BACKENDS = {
+    "torch": load_torch,
+    "torch-int8": load_torch_int8,
+    "onnx": load_onnx,
+    "onnx-int8": lambda model_name: load_onnx(model_name, quantize=True),
+}
+
+
+def load_qa_pipeline(model_name, backend=QA_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown QA_BACKEND {backend!r}; choose from {', '.join(BACKENDS)}")
+    return BACKENDS[backend](model_name)
@@ -0,0 +1,206 @@
+"""
+Micro-batching scheduler around the QA pipeline.
+
+Concurrent /ask requests that miss the KB used to call qa_pipeline one by
+one, each running its own CPU forward pass and fighting over threads.
+QABatcher queues the questions, waits up to QA_BATCH_MAX_WAIT_MS for more to
+arrive (or until QA_BATCH_MAX_SIZE are queued), runs them through the
+pipeline as one batch and hands every caller its own answer.
+
+Set QA_BATCH_MAX_SIZE=1 to call the pipeline directly, as before.
+
+Admission control: at most QA_MAX_PENDING questions are admitted at once
+(running + queued; default 32), and a question waits at most QA_DEADLINE_MS
+for its answer (default 2000). Past either limit the caller gets QABusy right
+away (utils.ai_engine then degrades to the best fuzzy KB match or the static
+fallback) instead of queuing behind a flood of off-KB questions. Questions
+whose deadline passed while queued are dropped before they reach the model;
+each turned-away question is counted once, under "queue_full" or "deadline".
+With QA_BATCH_MAX_SIZE=1 the pipeline runs in the caller's thread and can't
+be interrupted, so only the admission limit applies there.
+"""
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+QA_BATCH_MAX_SIZE = int(os.environ.get("QA_BATCH_MAX_SIZE", "8"))
+QA_BATCH_MAX_WAIT_MS = float(os.environ.get("QA_BATCH_MAX_WAIT_MS", "10"))
+QA_MAX_PENDING = int(os.environ.get("QA_MAX_PENDING", "32"))
+QA_DEADLINE_MS = float(os.environ.get("QA_DEADLINE_MS", "2000"))
+
+
+class QABusy(Exception):
+    """The QA stage is saturated ("queue_full") or the answer missed its deadline ("deadline")."""
+
+    def __init__(self, reason):
+        super().__init__(f"QA {reason.replace('_', ' ')}")
+        self.reason = reason
+
+
+class QABatcher:
+    def __init__(self, get_pipeline, max_batch_size=QA_BATCH_MAX_SIZE, max_wait_ms=QA_BATCH_MAX_WAIT_MS,
+                 max_pending=QA_MAX_PENDING, deadline_ms=QA_DEADLINE_MS):
+        """`get_pipeline` returns the loaded transformers pipeline (or None)."""
+        self._get_pipeline = get_pipeline
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_pending = max_pending
+        self.deadline = deadline_ms / 1000.0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        # metrics
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._items = 0
+        self._max_queue_depth = 0
+        self._wait_total = 0.0
+        self._pending = 0
+        self._dropped = 0  # questions skipped by the worker because their caller gave up
+        self._rejected = Counter()  # reason -> questions turned away
+
+    # ---- public API (same shape as qa_pipeline) ----
+    def __call__(self, question, context, timeout=None):
+        """
+        Answer one question; blocks until its batch has run. Returns the
+        pipeline dict. Raises QABusy when the queue is full or no answer came
+        within `timeout` seconds (default: the deadline).
+        """
+        if not self._slots.acquire(blocking=False):
+            self._reject("queue_full")
+        with self._stats_lock:
+            self._pending += 1
+        if self.max_batch_size == 1:
+            try:
+                self._record([time.perf_counter()])
+                return self._run([(question, context)])[0]
+            finally:
+                self._release(None)
+
+        self._ensure_worker()
+        fut = Future()
+        # the slot is held until the question is answered, failed or cancelled while still queued
+        fut.add_done_callback(self._release)
+        timeout = self.deadline if timeout is None else timeout
+        enqueued = time.perf_counter()
+        self._queue.put((question, context, enqueued, fut, enqueued + timeout))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            # still queued: cancelling frees the slot and the worker skips the
+            # question; once its batch is running this is a no-op
+            fut.cancel()
+        except QABusy:
+            pass  # the worker found the deadline passed before running it
+        self._reject("deadline")
+
+    def stats(self):
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / batches, 2) if batches else 0.0,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "mean_queue_wait_ms": round(self._wait_total / self._items * 1000, 3) if self._items else 0.0,
+                "max_pending": self.max_pending,
+                "deadline_ms": self.deadline * 1000,
+                "pending": self._pending,
+                "dropped": self._dropped,
+                "rejected": dict(self._rejected),
+            }
+
+    # ---- internals ----
+    def _reject(self, reason):
+        with self._stats_lock:
+            self._rejected[reason] += 1
+        raise QABusy(reason)
+
+    def _release(self, future):
+        self._slots.release()
+        with self._stats_lock:
+            self._pending -= 1
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._loop, name="qa-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self, items):
+        pipe = self._get_pipeline()
+        if pipe is None:
+            raise RuntimeError("QA model is not loaded")
+        questions = [q for q, _ in items]
+        contexts = [c for _, c in items]
+        if len(items) == 1:
+            return [pipe(question=questions[0], context=contexts[0])]
+        results = pipe(question=questions, context=contexts, batch_size=len(items))
+        # the pipeline returns a bare dict instead of a list for single inputs
+        return results if isinstance(results, list) else [results]
+
+    def _record(self, enqueued_at):
+        now = time.perf_counter()
+        with self._stats_lock:
+            self._batch_sizes[len(enqueued_at)] += 1
+            self._items += len(enqueued_at)
+            self._wait_total += sum(now - t for t in enqueued_at)
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or max_wait passes."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _live(self, batch):
+        """
+        Mark the batch's questions running, dropping those whose caller gave up
+        (cancelled) or whose deadline has passed. The caller counts the drop.
+        """
+        now = time.perf_counter()
+        live = []
+        for item in batch:
+            if not item[3].set_running_or_notify_cancel():
+                with self._stats_lock:
+                    self._dropped += 1
+            elif item[4] <= now:
+                item[3].set_exception(QABusy("deadline"))
+            else:
+                live.append(item)
+        return live
+
+    def _loop(self):
+        while True:
+            batch = self._live(self._collect())
+            if not batch:
+                continue
+            self._record([item[2] for item in batch])
+            try:
+                results = self._run([(q, c) for q, c, _, _, _ in batch])
+            except Exception as e:
+                for item in batch:
+                    item[3].set_exception(e)
+                continue
+            for item, res in zip(batch, results):
+                item[3].set_result(res)
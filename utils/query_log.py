@@ -0,0 +1,254 @@
+"""
+Query analytics log: what was asked, which tier answered it, and how long
+each stage took.
+
+Every /ask, /ask/stream and /speak call fills in a RequestTrace (query,
+language, matched key, tier, score, where the response came from, per-stage
+milliseconds) and hands it to QueryLog.record(), which only puts a tuple on
+an in-memory queue. A background writer drains the queue and inserts rows in
+batched transactions (up to QUERY_LOG_BATCH rows, at least every
+QUERY_LOG_FLUSH_INTERVAL seconds), so a request never waits for the disk.
+If the writer falls behind and the queue fills up (QUERY_LOG_QUEUE), new
+records are dropped and counted instead of blocking requests.
+
+Rows go to the query_log table of QUERY_LOG_DB (default data/queries.db; set
+it to an empty string to disable logging). Report with:
+
+    python -m utils.query_log [--days 7] [--top 20]
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.knowledge_base import normalize
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERY_LOG_DB = os.environ.get("QUERY_LOG_DB", os.path.join(APP_ROOT, "data", "queries.db"))
+QUERY_LOG_QUEUE = int(os.environ.get("QUERY_LOG_QUEUE", "10000"))
+QUERY_LOG_BATCH = int(os.environ.get("QUERY_LOG_BATCH", "500"))
+QUERY_LOG_FLUSH_INTERVAL = float(os.environ.get("QUERY_LOG_FLUSH_INTERVAL", "1.0"))
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS query_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts REAL NOT NULL,
+        endpoint TEXT NOT NULL,
+        query TEXT,
+        lookup TEXT,
+        lang TEXT,
+        key TEXT,
+        tier TEXT,
+        score REAL,
+        source TEXT,
+        total_ms REAL,
+        stages TEXT,
+        error TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS query_log_ts ON query_log (ts)",
+)
+_INSERT = """
+    INSERT INTO query_log (ts, endpoint, query, lookup, lang, key, tier, score, source, total_ms, stages, error)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class RequestTrace:
+    """What one request did; filled in along the way and logged when it finishes."""
+
+    def __init__(self, endpoint, query=None, lang=None):
+        self.endpoint = endpoint
+        self.query = query
+        self.lang = lang
+        self.lookup = None    # normalized English query the KB was searched with
+        self.key = None
+        self.tier = None
+        self.score = None
+        self.source = None    # "cache", "prerendered", "live" or "coalesced"
+        self.error = None
+        self.stages = {}      # stage -> milliseconds
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def set_answer(self, key, tier, score, source):
+        self.key, self.tier, self.score, self.source = key, tier, score, source
+
+    def total_ms(self):
+        return (time.perf_counter() - self._t0) * 1000
+
+    def row(self):
+        return (
+            self.started, self.endpoint, self.query, self.lookup, self.lang, self.key, self.tier,
+            None if self.score is None else float(self.score), self.source, round(self.total_ms(), 3),
+            json.dumps({k: round(v, 3) for k, v in self.stages.items()}), self.error,
+        )
+
+
+class QueryLog:
+    def __init__(self, db_path=QUERY_LOG_DB, max_queue=QUERY_LOG_QUEUE, batch_size=QUERY_LOG_BATCH,
+                 flush_interval=QUERY_LOG_FLUSH_INTERVAL):
+        self.db_path = db_path or None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = None
+        self._lock = threading.Lock()
+        self._counts = {"recorded": 0, "dropped": 0, "written": 0, "batches": 0, "errors": 0}
+
+    def record(self, trace):
+        """Queue `trace` for writing; never blocks."""
+        if not self.db_path:
+            return
+        if self._writer is None:
+            self._start()
+        try:
+            self._queue.put_nowait(trace.row())
+        except queue.Full:
+            with self._lock:
+                self._counts["dropped"] += 1
+            return
+        with self._lock:
+            self._counts["recorded"] += 1
+
+    def flush(self):
+        """Block until everything queued so far is written (CLI / benchmarks)."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, queued=self._queue.qsize(), enabled=bool(self.db_path))
+
+    # ---- background writer ----
+    def _start(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="query-log", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        conn = connect(self.db_path)
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(_INSERT, batch)
+                with self._lock:
+                    self._counts["written"] += len(batch)
+                    self._counts["batches"] += 1
+            except sqlite3.Error as e:
+                logger.error("Query log write error: %s", e)
+                with self._lock:
+                    self._counts["errors"] += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def connect(db_path=QUERY_LOG_DB):
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        for statement in _SCHEMA:
+            conn.execute(statement)
+    return conn
+
+
+# ---- report ----
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))] if values else 0.0
+
+
+def report(conn, days=7, top=20, kb_keys=()):
+    since = time.time() - days * 86400
+    rows = conn.execute(
+        "SELECT lookup, query, lang, key, tier, total_ms, stages FROM query_log WHERE ts >= ? AND error IS NULL",
+        (since,),
+    ).fetchall()
+    print(f"{len(rows)} queries in the last {days} day(s)")
+    if not rows:
+        return
+
+    print("\nTier mix")
+    tiers = {}
+    for _, _, _, _, tier, total_ms, _ in rows:
+        tiers.setdefault(tier or "unknown", []).append(total_ms or 0.0)
+    for tier, times in sorted(tiers.items(), key=lambda kv: -len(kv[1])):
+        print(f"  {tier:<10} {len(times):>7} {len(times) / len(rows):>6.1%}   "
+              f"p50 {_percentile(times, 50):>8.1f} ms   p95 {_percentile(times, 95):>8.1f} ms")
+
+    print("\nMean stage time")
+    stage_totals = {}
+    for *_, stages in rows:
+        for stage, ms in json.loads(stages or "{}").items():
+            stage_totals.setdefault(stage, []).append(ms)
+    for stage, times in sorted(stage_totals.items(), key=lambda kv: -sum(kv[1])):
+        print(f"  {stage:<16} {sum(times) / len(times):>8.2f} ms  ({len(times)} requests)")
+
+    def top_queries(filtered):
+        counts = {}
+        for lookup, query, lang, key, tier, *_ in filtered:
+            q = lookup or normalize(query)
+            item = counts.setdefault(q, [0, key, tier])
+            item[0] += 1
+        return sorted(counts.items(), key=lambda kv: -kv[1][0])[:top]
+
+    print(f"\nTop {top} queries")
+    for q, (n, key, tier) in top_queries(rows):
+        print(f"  {n:>6}  {q[:60]:<60}  {tier} {key or ''}")
+
+    print(f"\nCoverage gaps: top {top} queries the KB did not answer (QA / fallback / degraded)")
+    for q, (n, _, tier) in top_queries([r for r in rows if r[4] in ("qa", "fallback", "degraded")]):
+        print(f"  {n:>6}  {q[:60]:<60}  {tier}")
+
+    if kb_keys:
+        hit = {r[3] for r in rows if r[3]}
+        unused = [k for k in kb_keys if k not in hit]
+        print(f"\nKB entries never matched ({len(unused)} of {len(kb_keys)})")
+        for key in unused[:top]:
+            print(f"  {key}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report on the query analytics log.")
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    if not QUERY_LOG_DB:
+        print("QUERY_LOG_DB is empty: query logging is disabled")
+        return
+
+    from utils.ai_engine import BANKING_CONTEXT, EXAMPLE_QUESTIONS, KB
+    from utils.kb_store import open_store
+    open_store(KB, BANKING_CONTEXT, EXAMPLE_QUESTIONS, watch=False)
+    report(connect(), days=args.days, top=args.top, kb_keys=KB.snapshot.choices)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Speech recognition for clips recorded in the browser.
+
+/speak used to open sr.Microphone() on the server: a second of ambient-noise
+calibration, then the request thread blocked for up to timeout +
+phrase_time_limit seconds, with a fresh Recognizer per call and a single
+microphone shared by every user. Now the browser records the question
+(MediaRecorder: WebM/Ogg Opus, or WAV) and uploads it. decode_audio turns the
+clip into 16 kHz mono PCM with pydub, and RecognitionPool runs decoding and
+recognition on a bounded worker pool:
+
+    STT_BACKEND       "google" (speech_recognition's Google Web Speech API,
+                      default) or "local" (stub for tests / load tests)
+    STT_WORKERS       recognition threads (default 8; the google backend is
+                      network-bound, so threads mostly wait)
+    STT_QUEUE         max clips admitted at once, running + waiting (default 64)
+    STT_TIMEOUT       seconds a request waits for its transcript (default 15)
+    STT_MAX_BYTES     largest accepted upload (default 5 MB)
+    STT_MAX_SECONDS   longer clips are cut to this length (default 30)
+
+When the queue is full callers get RecognizerBusy right away instead of
+piling up behind the pool. WAV decodes in-process; WebM / Ogg / MP3 need
+ffmpeg on the PATH (pydub shells out to it).
+"""
+import io
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from utils import metrics
+
+STT_BACKEND = os.environ.get("STT_BACKEND", "google")
+STT_WORKERS = int(os.environ.get("STT_WORKERS", "8"))
+STT_QUEUE = int(os.environ.get("STT_QUEUE", "64"))
+STT_TIMEOUT = float(os.environ.get("STT_TIMEOUT", "15"))
+STT_MAX_BYTES = int(os.environ.get("STT_MAX_BYTES", str(5 * 1024 * 1024)))
+STT_MAX_SECONDS = float(os.environ.get("STT_MAX_SECONDS", "30"))
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # bytes, i.e. 16-bit PCM
+
+# UI language code -> Google STT language code
+LANGUAGE_CODES = {"en": "en-IN", "hi": "hi-IN", "kn": "kn-IN"}
+
+# mono 16-bit PCM at SAMPLE_RATE
+Clip = namedtuple("Clip", ["pcm", "sample_rate", "sample_width", "seconds"])
+
+
+class RecognizerBusy(Exception):
+    """Raised when too many clips are already queued (or the transcript took too long)."""
+
+
+class AudioRejected(ValueError):
+    """The upload is empty, too large or not audio pydub can decode."""
+
+
+_CONTENT_TYPES = {
+    "audio/wav": "wav", "audio/wave": "wav", "audio/x-wav": "wav", "audio/vnd.wave": "wav",
+    "audio/webm": "webm", "video/webm": "webm", "audio/ogg": "ogg",
+    "audio/mpeg": "mp3", "audio/mp3": "mp3", "audio/mp4": "mp4",
+}
+_MAGIC = ((b"RIFF", "wav"), (b"\x1a\x45\xdf\xa3", "webm"), (b"OggS", "ogg"), (b"ID3", "mp3"))
+
+
+def audio_format(data, content_type=None):
+    """pydub format name for an upload, from its content type or its first bytes."""
+    base = (content_type or "").split(";")[0].strip().lower()
+    if base in _CONTENT_TYPES:
+        return _CONTENT_TYPES[base]
+    for magic, fmt in _MAGIC:
+        if data.startswith(magic):
+            return fmt
+    return None
+
+
+def decode_audio(data, content_type=None, max_seconds=STT_MAX_SECONDS, max_bytes=STT_MAX_BYTES):
+    """Decode an uploaded clip into a Clip (16 kHz mono 16-bit PCM)."""
+    if not data:
+        raise AudioRejected("no audio received")
+    if len(data) > max_bytes:
+        raise AudioRejected(f"audio upload larger than {max_bytes} bytes")
+    # imported here: pydub probes for ffmpeg on import
+    from pydub import AudioSegment
+    try:
+        segment = AudioSegment.from_file(io.BytesIO(data), format=audio_format(data, content_type))
+    except Exception as e:
+        raise AudioRejected(f"could not decode audio: {e}") from None
+    if max_seconds and segment.duration_seconds > max_seconds:
+        segment = segment[:int(max_seconds * 1000)]
+    segment = segment.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(SAMPLE_WIDTH)
+    return Clip(segment.raw_data, SAMPLE_RATE, SAMPLE_WIDTH, segment.duration_seconds)
+
+
+class GoogleRecognizer:
+    """speech_recognition's Google Web Speech API; one sr.Recognizer per worker thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _recognizer(self):
+        recognizer = getattr(self._local, "recognizer", None)
+        if recognizer is None:
+            import speech_recognition as sr
+            recognizer = self._local.recognizer = sr.Recognizer()
+        return recognizer
+
+    def transcribe(self, clip, language):
+        """Transcript of `clip`, or None if no speech was understood."""
+        import speech_recognition as sr
+        audio = sr.AudioData(clip.pcm, clip.sample_rate, clip.sample_width)
+        try:
+            return self._recognizer().recognize_google(audio, language=LANGUAGE_CODES.get(language, "en-IN"))
+        except sr.UnknownValueError:
+            return None
+
+
+class LocalRecognizer:
+    """Offline stand-in: returns a fixed transcript after a simulated round trip."""
+
+    def __init__(self, transcript="what is upi", delay=0.0):
+        self.transcript = transcript
+        self.delay = delay  # seconds per clip
+        self.calls = 0
+
+    def transcribe(self, clip, language):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return self.transcript if clip.seconds > 0 else None
+
+
+RECOGNIZERS = {"google": GoogleRecognizer, "local": LocalRecognizer}
+
+
+class RecognitionPool:
+    def __init__(self, recognizer=None, workers=STT_WORKERS, max_queue=STT_QUEUE, timeout=STT_TIMEOUT):
+        self.recognizer = recognizer or RECOGNIZERS[STT_BACKEND]()
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self._workers = workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._stats_lock = threading.Lock()
+        self._counts = {"completed": 0, "rejected": 0, "failed": 0, "cancelled": 0, "in_flight": 0}
+        self._audio_seconds = 0.0
+
+    def _executor(self):
+        # created on first use so importing the app doesn't spawn workers
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="stt")
+        return self._pool
+
+    def _run(self, data, content_type, language):
+        # runs in a worker; the request's language is passed along for the metrics
+        with metrics.timed("stt_decode", language):
+            clip = decode_audio(data, content_type)
+        with metrics.timed("stt", language):
+            text = self.recognizer.transcribe(clip, language)
+        with self._stats_lock:
+            self._audio_seconds += clip.seconds
+        return text
+
+    def submit(self, data, content_type=None, language="en"):
+        """Queue a clip; returns a Future of its transcript (None if nothing was understood)."""
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._counts["rejected"] += 1
+            raise RecognizerBusy("speech recognition queue is full")
+        with self._stats_lock:
+            self._counts["in_flight"] += 1
+        try:
+            future = self._executor().submit(self._run, data, content_type, language)
+        except Exception:
+            self._release(None)
+            raise
+        # the slot is held until recognition finishes (or the clip is cancelled while
+        # still queued), even if the caller times out
+        future.add_done_callback(self._release)
+        return future
+
+    def transcribe(self, data, content_type=None, language="en"):
+        """Blocking submit: the transcript, or None. Raises AudioRejected / RecognizerBusy."""
+        try:
+            return self.submit(data, content_type, language).result(self.timeout)
+        except FutureTimeout:
+            raise RecognizerBusy("speech recognition timed out") from None
+
+    def _release(self, future):
+        self._slots.release()
+        with self._stats_lock:
+            self._counts["in_flight"] -= 1
+            if future is None:
+                return
+            # cancelled while queued, e.g. by the ASGI handler's wait_for; exception() would raise
+            if future.cancelled():
+                self._counts["cancelled"] += 1
+            else:
+                self._counts["failed" if future.exception() else "completed"] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(
+                self._counts,
+                backend=type(self.recognizer).__name__,
+                workers=self._workers,
+                max_queue=self.max_queue,
+                audio_seconds=round(self._audio_seconds, 1),
+            )
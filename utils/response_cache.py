@@ -0,0 +1,137 @@
+"""
+Response cache for /ask and /speak.
+
+The same FAQ ("what is upi") is asked over and over in the same language,
+and every time we paid for get_answer, the translation and TTS. Responses
+are cached under (normalized query, language, KB version):
+
+    L1  in-process LRU with a TTL (always on)
+    L2  optional SQLite table shared by all workers on the host
+        (set RESPONSE_CACHE_DB to a file path to enable it)
+
+Values are small dicts (answer text, translated text, audio URL). Because
+the KB version is part of the key, editing the KB never serves stale answers.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_DB = os.environ.get("RESPONSE_CACHE_DB", "")
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, db_path=RESPONSE_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path or None
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counts = {"hits": 0, "sqlite_hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+        if self.db_path:
+            self._init_db()
+
+    @staticmethod
+    def make_key(query, language, kb_version):
+        return f"{kb_version}|{language}|{query}"
+
+    # ---- L1: in-process LRU ----
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return item[1]
+                del self._entries[key]
+
+        value = self._db_get(key, now) if self.db_path else None
+        with self._lock:
+            if value is None:
+                self._counts["misses"] += 1
+                return None
+            self._counts["sqlite_hits"] += 1
+            self._store(key, value, now)
+        return value
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._counts["puts"] += 1
+            self._store(key, value, now)
+        if self.db_path:
+            self._db_put(key, value, now)
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counts["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            counts["entries"] = len(self._entries)
+        lookups = counts["hits"] + counts["sqlite_hits"] + counts["misses"]
+        counts["hit_ratio"] = round((counts["hits"] + counts["sqlite_hits"]) / lookups, 3) if lookups else 0.0
+        counts["sqlite"] = bool(self.db_path)
+        return counts
+
+    # ---- L2: SQLite, shared across workers ----
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+
+    def _db_get(self, key, now):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Response cache read error: %s", e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _db_put(self, key, value, now):
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Response cache write error: %s", e)
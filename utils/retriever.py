@@ -0,0 +1,115 @@
+"""
+BM25 passage retrieval for the QA fallback of get_answer.
+
+Running the QA model over the whole flattened KB costs one forward pass per
+tokenizer window, so it grows linearly with the KB. PassageRetriever splits
+every KB entry into paragraph-sized passages and keeps an inverted index, so
+the reader only sees the top-k passages for a question. Scoring walks the
+postings of the query terms only, which keeps lookups cheap as the KB grows.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# very common question words; they would otherwise touch every posting list
+STOPWORDS = frozenset(
+    "a an and are be can do does for from how i in is it me my of on or "
+    "the to what when where which who why with you your".split()
+)
+
+
+def tokenize(text: str):
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def split_passages(value):
+    """Split one KB value (str / dict / list) into paragraph passages."""
+    if isinstance(value, dict):
+        chunks = [str(x) for x in value.values() if x]
+    elif isinstance(value, (list, tuple)):
+        chunks = [str(x) for x in value if x]
+    else:
+        chunks = re.split(r"\n\s*\n", str(value))
+    passages = []
+    for chunk in chunks:
+        chunk = " ".join(chunk.split())
+        if chunk:
+            passages.append(chunk)
+    return passages
+
+
+def entry_title(value):
+    """Short title line of a KB value ("Loan."), or "" if it has none."""
+    if isinstance(value, dict):
+        return str(value.get("title") or "")
+    if isinstance(value, (list, tuple)):
+        return ""
+    first = str(value).strip().split("\n", 1)[0].strip()
+    return first if len(first) < 80 else ""
+
+
+def entry_passages(value):
+    """
+    The passages indexed for one KB value. The title is folded into every
+    passage so "Tip:" / "Example:" paragraphs keep their topic.
+    """
+    title = entry_title(value)
+    for chunk in split_passages(value):
+        if chunk == title:
+            continue
+        yield chunk if not title or chunk.startswith(title) else f"{title} {chunk}"
+
+
+class PassageRetriever:
+    """Okapi BM25 over KB passages. Each passage is prefixed with its entry's title."""
+
+    def __init__(self, kb, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.passages = []   # passage text
+        self.keys = []       # KB key each passage came from
+        self._postings = defaultdict(list)  # token -> [(passage id, tf), ...]
+        self._lengths = []
+        for key, value in kb.items():
+            self._add_entry(key, value)
+        n = len(self.passages)
+        self._avg_len = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            tok: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for tok, plist in self._postings.items()
+        }
+
+    def __len__(self):
+        return len(self.passages)
+
+    def _add_entry(self, key, value):
+        for text in entry_passages(value):
+            pid = len(self.passages)
+            self.passages.append(text)
+            self.keys.append(key)
+            tokens = tokenize(text)
+            self._lengths.append(len(tokens))
+            for tok, tf in Counter(tokens).items():
+                self._postings[tok].append((pid, tf))
+
+    def search(self, query: str, k: int = 3):
+        """Return up to `k` (passage id, score) pairs, best first."""
+        scores = defaultdict(float)
+        k1, b, avg = self.k1, self.b, self._avg_len or 1.0
+        for tok in set(tokenize(query)):
+            idf = self._idf.get(tok)
+            if idf is None:
+                continue
+            for pid, tf in self._postings[tok]:
+                norm = k1 * (1 - b + b * self._lengths[pid] / avg)
+                scores[pid] += idf * tf * (k1 + 1) / (tf + norm)
+        if not scores:
+            return []
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def top_passages(self, query: str, k: int = 3):
+        """Return the text of the top-k passages for `query`."""
+        return [self.passages[pid] for pid, _ in self.search(query, k)]
@@ -0,0 +1,255 @@
+"""
+Semantic matching tier: embedding search over KB entries and example questions.
+
+Paraphrases such as "how do I borrow money for my house" share no phrase with
+a KB key and score low on character-level WRatio, so they used to fall
+through to the roberta QA stage. SemanticMatcher embeds every KB entry
+(title + definition) and its example questions (KBSnapshot.questions) once
+per KB version into a float32 NumPy matrix of unit vectors; a query is
+embedded once and matched by cosine similarity (a single matrix-vector
+product), best row per key.
+
+Encoders (SEMANTIC_ENCODER):
+    auto      sentence-transformers if installed (requirements-semantic.txt),
+              else hashing (default)
+    minilm    sentence-transformers model SEMANTIC_MODEL
+    hashing   hashed word + character-trigram vectors; no model or network,
+              matches wording rather than meaning, so it relies on the
+              example questions for paraphrases
+    off       disable the tier
+
+The encoder loads through a ModelManager, so the tier is simply skipped until
+it is ready. With SEMANTIC_INDEX_DIR set (default data/semantic), the matrix
+is saved as .npy per (encoder, content) and reopened memory-mapped, so
+workers share one copy through the page cache.
+"""
+import logging
+import os
+import threading
+import zlib
+
+import numpy as np
+
+from utils.knowledge_base import text_hash
+from utils.model_manager import ModelManager
+from utils.retriever import entry_title, split_passages, tokenize
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEMANTIC_ENCODER = os.environ.get("SEMANTIC_ENCODER", "auto").lower()
+SEMANTIC_MODEL = os.environ.get("SEMANTIC_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# minimum cosine similarity for a match; empty = the encoder's own default
+SEMANTIC_THRESHOLD = os.environ.get("SEMANTIC_THRESHOLD", "")
+SEMANTIC_INDEX_DIR = os.environ.get("SEMANTIC_INDEX_DIR", os.path.join(APP_ROOT, "data", "semantic"))
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEncoder:
+    """Bag of words + character trigrams, hashed into `dim` signed buckets."""
+
+    name = "hashing"
+    threshold = 0.4
+
+    def __init__(self, dim=1024):
+        self.dim = dim
+
+    def _features(self, text):
+        words = tokenize(text)
+        feats = [(w, 1.0) for w in words]
+        for w in words:
+            padded = f" {w} "
+            feats.extend((padded[i:i + 3], 0.3) for i in range(len(padded) - 2))
+        return feats
+
+    def encode(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat, weight in self._features(text):
+                h = zlib.crc32(feat.encode("utf-8"))
+                out[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        return _unit_rows(out)
+
+
+class SentenceTransformerEncoder:
+    """A sentence-transformers model (MiniLM by default), run on the CPU."""
+
+    threshold = 0.55
+
+    def __init__(self, model_name=SEMANTIC_MODEL):
+        # imported here so that importing this module stays cheap
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name.rsplit("/", 1)[-1]
+        self._model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts):
+        vectors = self._model.encode(list(texts), batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def load_encoder(kind=SEMANTIC_ENCODER):
+    """The encoder for SEMANTIC_ENCODER `kind`; None for "off"."""
+    if kind == "off":
+        return None
+    if kind == "hashing":
+        return HashingEncoder()
+    if kind == "auto":
+        try:
+            return SentenceTransformerEncoder()
+        except ImportError:
+            logger.warning("⚠️ sentence-transformers not installed; semantic tier uses the hashing encoder")
+            return HashingEncoder()
+    return SentenceTransformerEncoder()
+
+
+def entry_documents(snapshot):
+    """(key, text) rows to embed: each entry's title + definition, then its example questions."""
+    rows = []
+    for key, value in snapshot.kb.items():
+        passages = split_passages(value)
+        title = entry_title(value)
+        summary = " ".join(p for p in passages[:2] if p) or key
+        rows.append((key, summary if title else f"{key}. {summary}"))
+        rows.extend((key, q) for q in snapshot.questions.get(key, ()))
+    return rows
+
+
+class SemanticIndex:
+    """Unit-vector matrix for one KB version; rows of the same key are contiguous."""
+
+    def __init__(self, encoder, rows, cache_dir=None):
+        self.keys = []
+        starts = []
+        for i, (key, _) in enumerate(rows):
+            if not self.keys or self.keys[-1] != key:
+                self.keys.append(key)
+                starts.append(i)
+        self._starts = np.array(starts, dtype=np.intp)
+        self.matrix = self._build(encoder, [text for _, text in rows], cache_dir)
+
+    @staticmethod
+    def _build(encoder, texts, cache_dir):
+        if not cache_dir:
+            return encoder.encode(texts)
+        path = os.path.join(cache_dir, f"{encoder.name}-{text_hash(chr(0).join(texts))}.npy")
+        if not os.path.exists(path):
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp.npy"
+            np.save(tmp, encoder.encode(texts))
+            os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
+
+    def nbytes(self):
+        return int(self.matrix.nbytes)
+
+    def best(self, vectors):
+        """For each query vector: (key, cosine) of the best-matching key."""
+        if not len(self._starts):
+            return [None] * len(vectors)
+        sims = vectors @ self.matrix.T                      # (queries, rows)
+        per_key = np.maximum.reduceat(sims, self._starts, axis=1)
+        top = per_key.argmax(axis=1)
+        # rounded: BLAS may differ in the last float32 bits between batch sizes
+        return [(self.keys[j], round(float(per_key[i, j]), 4)) for i, j in enumerate(top)]
+
+
+class SemanticMatcher:
+    """Tier between fuzzy matching and QA: rebuilds its index when the KB version changes."""
+
+    def __init__(self, encoder=SEMANTIC_ENCODER, threshold=SEMANTIC_THRESHOLD,
+                 cache_dir=SEMANTIC_INDEX_DIR):
+        self.enabled = encoder != "off"
+        self.encoder = ModelManager(lambda: load_encoder(encoder), name=f"semantic encoder ({encoder})")
+        self._threshold = float(threshold) if threshold not in ("", None) else None
+        self.cache_dir = cache_dir or None
+        self._index = None     # (kb version, SemanticIndex)
+        self._building = None  # kb version being encoded in the background
+        self._failed = None    # kb version whose first build failed; not retried per query
+        self._lock = threading.Lock()
+        self.matches = 0
+        self.misses = 0
+
+    @property
+    def threshold(self):
+        if self._threshold is not None:
+            return self._threshold
+        encoder = self.encoder.get()
+        return encoder.threshold if encoder is not None else 1.0
+
+    def index_for(self, snapshot):
+        """
+        The index for `snapshot`, or None while the encoder is still loading
+        or if the first build failed. After a KB swap the previous index keeps
+        serving while the new one is encoded on a background thread; only the
+        first build blocks.
+        """
+        current = self._index
+        if current is not None and current[0] == snapshot.version:
+            return current[1]
+        encoder = self.encoder.get()
+        if encoder is None:
+            return None
+        if current is None:
+            with self._lock:
+                if self._index is None and self._failed != snapshot.version:
+                    self._build(encoder, snapshot)
+                    if self._index is None:
+                        self._failed = snapshot.version
+                # a failed build skips the tier, as while the encoder loads
+                return self._index[1] if self._index is not None else None
+        with self._lock:
+            if self._building != snapshot.version:
+                self._building = snapshot.version
+                threading.Thread(target=self._build, args=(encoder, snapshot),
+                                 name="semantic-index", daemon=True).start()
+        return current[1]
+
+    def rebuild(self, snapshot):
+        """Load the encoder and build the index for `snapshot` right away (scripts, benchmarks)."""
+        if not self.enabled:
+            return
+        encoder = self.encoder.load()
+        if encoder is None:
+            return  # the load failure is logged by the ModelManager
+        self._build(encoder, snapshot)
+
+    def _build(self, encoder, snapshot):
+        try:
+            index = SemanticIndex(encoder, entry_documents(snapshot), self.cache_dir)
+        except Exception as e:
+            logger.error("Semantic index build error: %s", e)
+            return
+        self._index = (snapshot.version, index)
+
+    def match(self, snapshot, queries):
+        """(key, score) for each query that clears the threshold, else None."""
+        if not self.enabled or not queries:
+            return [None] * len(queries)
+        index = self.index_for(snapshot)
+        if index is None:
+            return [None] * len(queries)
+        threshold = self.threshold
+        # keys missing from `snapshot` can only come from an index still being rebuilt
+        results = [hit if hit and hit[1] >= threshold and hit[0] in snapshot.formatted else None
+                   for hit in index.best(self.encoder.get().encode(queries))]
+        hits = sum(1 for r in results if r)
+        self.matches += hits
+        self.misses += len(results) - hits
+        return results
+
+    def stats(self):
+        current = self._index
+        return {
+            "enabled": self.enabled,
+            "encoder": self.encoder.status(),
+            "threshold": self.threshold if self.encoder.is_ready() else self._threshold,
+            "rows": int(current[1].matrix.shape[0]) if current else 0,
+            "matrix_bytes": current[1].nbytes() if current else 0,
+            "matches": self.matches,
+            "misses": self.misses,
+        }
@@ -0,0 +1,187 @@
+"""
+Single-flight coalescing of identical work in flight.
+
+When a question spikes (say right after a UPI notification) many users send
+it at once, and every request used to run the answer lookup, the
+translation and the TTS job on its own. SingleFlight lets the first request
+for a key (the leader) do the work while identical requests that arrive
+before it finishes (followers) wait for its result:
+
+  * in-process: followers wait on the leader's Future;
+  * across worker processes: leaders of the same key take turns through a
+    lock file named after the key. A leader that had to wait for another
+    process first calls `recheck()`, which looks for that process's result
+    in a shared cache (response cache SQLite tier, translation cache, audio
+    store) before computing anything. Without such a cache waiting gains
+    nothing, so give that flight lock_dir="" instead.
+
+    SINGLE_FLIGHT_LOCK_DIR   lock files (default data/locks; empty = coalesce
+                             within a process only). Needs fcntl (POSIX); on
+                             other systems only in-process coalescing applies.
+                             A lock's holder deletes the file on release.
+    SINGLE_FLIGHT_TIMEOUT    seconds a follower or a waiting leader gives up
+                             after and computes the result itself (default 30)
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SINGLE_FLIGHT_LOCK_DIR = os.environ.get("SINGLE_FLIGHT_LOCK_DIR", os.path.join(APP_ROOT, "data", "locks"))
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", "30"))
+
+
+class ProcessLock:
+    """
+    Exclusive lock on one lock file, shared by every worker on the host.
+
+    The holder deletes the file before unlocking it, so there is no file per
+    key ever seen; a process that got the lock on a file deleted in the
+    meantime tries again on the current one.
+    """
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def _try_lock(self):
+        """Lock the file now at `path` without blocking; False if another process holds it."""
+        while True:
+            f = open(self.path, "a+b")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.close()
+                return False
+            try:
+                current = os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                self._file = f
+                return True
+            # released and deleted by its previous holder after we opened it
+            f.close()
+
+    def acquire(self):
+        """Take the lock; returns True if another process held it first (or it timed out)."""
+        if self.path is None:
+            return False
+        if self._try_lock():
+            return False
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.005)
+            if self._try_lock():
+                return True
+        # the other process is stuck; go ahead without the lock
+        return True
+
+    def release(self):
+        if self._file is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SingleFlight:
+    def __init__(self, name, lock_dir=SINGLE_FLIGHT_LOCK_DIR, timeout=SINGLE_FLIGHT_TIMEOUT):
+        self.name = name
+        self.lock_dir = lock_dir if lock_dir and fcntl is not None else None
+        self.timeout = timeout
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        self._calls = {}  # key -> Future of the leader's result
+        self._lock = threading.Lock()
+        self._counts = {"leaders": 0, "followers": 0, "lock_waits": 0, "recheck_hits": 0, "timeouts": 0}
+
+    # ---- building blocks (asgi.py drives these from async code) ----
+    def begin(self, key):
+        """Return (future, leader). The leader must call finish(); followers wait on the future."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                # running futures can't be cancelled, so a follower giving up can't take the result from the rest
+                future.set_running_or_notify_cancel()
+                self._counts["leaders"] += 1
+                return future, True
+            self._counts["followers"] += 1
+            return future, False
+
+    def finish(self, key, future, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def process_lock(self, key):
+        """The cross-process lock for `key` (a no-op lock without a lock dir)."""
+        if not self.lock_dir:
+            return ProcessLock(None, self.timeout)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return ProcessLock(os.path.join(self.lock_dir, f"{self.name}-{digest}.lock"), self.timeout)
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    # ---- blocking API ----
+    def do(self, key, fn, recheck=None):
+        """
+        Return (result, shared): fn()'s result, computed once for all callers
+        with the same key at the same time. shared is True for followers.
+        """
+        future, leader = self.begin(key)
+        if not leader:
+            try:
+                return future.result(self.timeout), True
+            except FutureTimeout:
+                self.count("timeouts")
+                return fn(), False
+        try:
+            with self.process_lock(key) as waited:
+                result = None
+                if waited:
+                    self.count("lock_waits")
+                    result = recheck() if recheck is not None else None
+                    if result is not None:
+                        self.count("recheck_hits")
+                if result is None:
+                    result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            calls = self._counts["leaders"] + self._counts["followers"]
+            return dict(
+                self._counts,
+                in_flight=len(self._calls),
+                cross_process=bool(self.lock_dir),
+                coalescing_ratio=round(self._counts["followers"] / calls, 4) if calls else 0.0,
+            )
@@ -1,5 +1,11 @@
+import logging
+
 import speech_recognition as sr
 
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
 def listen(language: str = "en", timeout: int = 6, phrase_time_limit: int = 6):
     """
     Captures audio from the user's microphone and converts it to text using Google's STT.
@@ -14,9 +20,9 @@ def listen(language: str = "en", timeout: int = 6, phrase_time_limit: int = 6):
 
     try:
         with sr.Microphone() as source:
-            print(f"🎙️ Listening for {language} input...")
+            logger.debug(f"🎙️ Listening for {language} input...")
             recognizer.adjust_for_ambient_noise(source, duration=1)
-            print("🎤 Listening... Speak now!")
+            logger.debug("🎤 Listening... Speak now!")
 
             audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
 
@@ -29,19 +35,20 @@ def listen(language: str = "en", timeout: int = 6, phrase_time_limit: int = 6):
         lang_code = lang_map.get(language, "en-IN")
 
         # Perform recognition
-        text = recognizer.recognize_google(audio, language=lang_code)
-        print(f"🗣️ You said: {text}")
+        with metrics.timed("stt", language):
+            text = recognizer.recognize_google(audio, language=lang_code)
+        logger.debug(f"🗣️ You said: {text}")
         return text
 
     except sr.UnknownValueError:
-        print("❌ Could not understand the audio.")
+        logger.info("❌ Could not understand the audio.")
         return "Error: Could not capture speech."
     except sr.RequestError as e:
-        print(f"⚠️ Could not request results from Google STT service: {e}")
+        logger.warning(f"⚠️ Could not request results from Google STT service: {e}")
         return "Error: Speech recognition request failed."
     except sr.WaitTimeoutError:
-        print("⌛ Listening timed out.")
+        logger.info("⌛ Listening timed out.")
         return "Error: Listening timed out."
     except Exception as e:
-        print(f"Microphone error: {e}")
+        logger.error(f"Microphone error: {e}")
         return "Error: Microphone access failed."
@@ -0,0 +1,294 @@
+"""
+Translation service with a persistent cache and batched backend calls.
+
+app.py used to build a new GoogleTranslator per call and translate whole
+answers with no reuse (/speak did it twice per request). TranslationService:
+
+  * splits text into line segments, so the headings every KB answer shares
+    ("How to use / How it works:", "Example:", "Tip:") are translated once
+    and then always come from the cache;
+  * caches every segment under (sha256(text), source, target) in memory and
+    in SQLite (TRANSLATION_CACHE_DB, default data/translations.db; set it to
+    an empty string to keep the cache in memory only), except segments the
+    backend returned empty, which are shown untranslated and asked for again;
+  * sends the uncached segments of a text to the backend in as few requests
+    as possible.
+
+Backends are pluggable (TRANSLATOR_BACKEND): "google" wraps deep_translator,
+"local" is a stand-in that needs no network, for tests and benchmarks.
+
+Backend calls run on a small pool (TRANSLATION_WORKERS, default 16) and a
+caller waits at most TRANSLATION_DEADLINE seconds for one (default 4; None
+waits as long as it takes); past that it gets TranslationTimeout and the app
+serves the English text. A late result is still cached when it arrives, but
+a call whose caller gave up before it left the queue is dropped. At most
+TRANSLATION_MAX_PENDING calls (running + queued, default 64) are admitted at
+once; beyond that callers get TranslationBusy right away, so a slow backend
+can't pile up work without bound.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from utils import metrics
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSLATOR_BACKEND = os.environ.get("TRANSLATOR_BACKEND", "google")
+TRANSLATION_CACHE_DB = os.environ.get("TRANSLATION_CACHE_DB", os.path.join(APP_ROOT, "data", "translations.db"))
+TRANSLATION_MEMORY_SIZE = int(os.environ.get("TRANSLATION_MEMORY_SIZE", "10000"))
+TRANSLATION_WORKERS = int(os.environ.get("TRANSLATION_WORKERS", "16"))
+TRANSLATION_DEADLINE = float(os.environ.get("TRANSLATION_DEADLINE", "4"))
+TRANSLATION_MAX_PENDING = int(os.environ.get("TRANSLATION_MAX_PENDING", "64"))
+
+logger = logging.getLogger(__name__)
+
+# keep the newline runs so the translated text has the same layout
+_SEGMENT_RE = re.compile(r"(\n+)")
+
+
+class TranslationTimeout(Exception):
+    """The backend didn't answer within the deadline."""
+    reason = "deadline"
+
+
+class TranslationBusy(TranslationTimeout):
+    """Too many backend calls are already pending; raised without waiting."""
+    reason = "busy"
+
+
+class GoogleBackend:
+    """deep_translator's GoogleTranslator; packs several segments into one request."""
+
+    # Google's web endpoint rejects requests over 5000 characters
+    MAX_CHARS = 4500
+    SEPARATOR = "\n\n"
+
+    def translate_batch(self, texts, source, target):
+        from deep_translator import GoogleTranslator
+        translator = GoogleTranslator(source=source, target=target)
+        out = []
+        for chunk in self._chunks(texts):
+            if len(chunk) == 1:
+                out.append(translator.translate(chunk[0]))
+                continue
+            joined = translator.translate(self.SEPARATOR.join(chunk))
+            parts = [p.strip() for p in re.split(r"\n\s*\n", joined or "")]
+            if len(parts) != len(chunk):
+                # the separator didn't survive the round trip; go one by one
+                parts = [translator.translate(t) for t in chunk]
+            out.extend(parts)
+        return out
+
+    def _chunks(self, texts):
+        chunk, size = [], 0
+        for t in texts:
+            if chunk and size + len(t) + len(self.SEPARATOR) > self.MAX_CHARS:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(t)
+            size += len(t) + len(self.SEPARATOR)
+        if chunk:
+            yield chunk
+
+
+class LocalBackend:
+    """Offline stand-in: tags each segment with the target language."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay  # simulated round trip per request, in seconds
+        self.requests = 0
+
+    def translate_batch(self, texts, source, target):
+        self.requests += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return [f"[{target}] {t}" for t in texts]
+
+
+BACKENDS = {"google": GoogleBackend, "local": LocalBackend}
+
+
+def _text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationService:
+    def __init__(self, backend=None, db_path=TRANSLATION_CACHE_DB, memory_size=TRANSLATION_MEMORY_SIZE,
+                 workers=TRANSLATION_WORKERS, deadline=TRANSLATION_DEADLINE, max_pending=TRANSLATION_MAX_PENDING):
+        self.backend = backend or BACKENDS[TRANSLATOR_BACKEND]()
+        self.db_path = db_path or None
+        self.memory_size = memory_size
+        self.deadline = deadline
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._memory = OrderedDict()  # (text hash, src, tgt) -> translation
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counts = {"segments": 0, "memory_hits": 0, "sqlite_hits": 0, "misses": 0,
+                        "backend_calls": 0, "errors": 0, "timeouts": 0, "rejected": 0, "dropped": 0,
+                        "empty": 0}
+        if self.db_path:
+            self._init_db()
+
+    # ---- public API ----
+    def translate(self, text, target, source="auto"):
+        """Translate `text` into `target`, reusing cached segments."""
+        if not text or not text.strip() or target == source:
+            return text
+        pieces = _SEGMENT_RE.split(text)
+        # odd indexes are the newline separators
+        segments = {p.strip() for i, p in enumerate(pieces) if i % 2 == 0 and p.strip()}
+        with metrics.timed("translate", target):
+            translated = self.translate_segments(sorted(segments), target, source)
+        out = []
+        for i, piece in enumerate(pieces):
+            stripped = piece.strip()
+            if i % 2 == 1 or not stripped:
+                out.append(piece)
+            else:
+                lead = piece[:len(piece) - len(piece.lstrip())]
+                trail = piece[len(piece.rstrip()):]
+                out.append(f"{lead}{translated[stripped]}{trail}")
+        return "".join(out)
+
+    def translate_segments(self, segments, target, source="auto"):
+        """
+        Return {segment: translation}, calling the backend once for all misses.
+        Raises TranslationTimeout if that call takes longer than the deadline,
+        TranslationBusy if too many calls are pending already.
+        """
+        result, missing = {}, []
+        for seg in segments:
+            key = (_text_key(seg), source, target)
+            hit = self._cache_get(key)
+            if hit is None:
+                missing.append(seg)
+            else:
+                result[seg] = hit
+        with self._lock:
+            self._counts["segments"] += len(segments)
+            self._counts["misses"] += len(missing)
+        if missing:
+            if not self._slots.acquire(blocking=False):
+                with self._lock:
+                    self._counts["rejected"] += 1
+                raise TranslationBusy("too many translations pending")
+            given_up = threading.Event()
+            try:
+                future = self._pool.submit(self._fetch, missing, source, target, given_up)
+            except Exception:
+                self._slots.release()
+                raise
+            # the slot is held until the call finishes (or is dropped), even if the caller gave up
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                result.update(future.result(self.deadline))
+            except FutureTimeout:
+                given_up.set()
+                with self._lock:
+                    self._counts["timeouts"] += 1
+                raise TranslationTimeout(f"translation took longer than {self.deadline:g} s") from None
+        return result
+
+    def _fetch(self, missing, source, target, given_up):
+        """Backend call for the uncached segments (on the pool); caches what it gets back."""
+        if given_up.is_set():
+            # the caller timed out while this was queued; nobody is waiting for it
+            with self._lock:
+                self._counts["dropped"] += 1
+            return {}
+        with self._lock:
+            self._counts["backend_calls"] += 1
+        try:
+            translations = self.backend.translate_batch(missing, source, target)
+        except Exception:
+            with self._lock:
+                self._counts["errors"] += 1
+            raise
+        translated = {seg: tr for seg, tr in zip(missing, translations) if tr}
+        if len(translated) < len(missing):
+            with self._lock:
+                self._counts["empty"] += len(missing) - len(translated)
+        # an empty result shows the source segment this time but isn't cached
+        # as its translation, so the next request asks the backend again
+        self._cache_put_many([((_text_key(seg), source, target), tr) for seg, tr in translated.items()])
+        return {seg: translated.get(seg, seg) for seg in missing}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, memory_entries=len(self._memory), sqlite=bool(self.db_path))
+
+    # ---- cache ----
+    def _cache_get(self, key):
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                self._memory.move_to_end(key)
+                self._counts["memory_hits"] += 1
+                return hit
+        if not self.db_path:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT translation FROM translations WHERE text_hash = ? AND src = ? AND tgt = ?", key
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Translation cache read error: %s", e)
+            return None
+        if row is None:
+            return None
+        with self._lock:
+            self._counts["sqlite_hits"] += 1
+            self._remember(key, row[0])
+        return row[0]
+
+    def _cache_put_many(self, rows):
+        with self._lock:
+            for key, tr in rows:
+                self._remember(key, tr)
+        if not self.db_path or not rows:
+            return
+        try:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translations (text_hash, src, tgt, translation) VALUES (?, ?, ?, ?)",
+                    [key + (tr,) for key, tr in rows],
+                )
+        except sqlite3.Error as e:
+            logger.warning("Translation cache write error: %s", e)
+
+    def _remember(self, key, translation):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                src TEXT NOT NULL,
+                tgt TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                PRIMARY KEY (text_hash, src, tgt)
+            )
+        """)
+        conn.commit()
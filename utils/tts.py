@@ -1,5 +1,63 @@
-from gtts import gTTS
-import os, time
+import logging, os, re, threading
+
+from utils import metrics
+from utils.tts_backends import TTSDeadlineExceeded, backend_for, get_backend, start_backends
+
+logger = logging.getLogger(__name__)
+
+# sentence ends (incl. the Devanagari danda) and line breaks
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+def split_for_tts(text, min_chars=40, max_chars=300):
+    """
+    Split text into sentence-sized chunks so audio can be synthesized (and
+    played) piece by piece. Short pieces such as titles are merged with the
+    next sentence; a chunk only grows past max_chars if one sentence does.
+    """
+    chunks, current = [], ""
+    for part in _SENTENCE_BREAK.split(text or ""):
+        part = part.strip()
+        if not part:
+            continue
+        if current and len(current) + 1 + len(part) > max_chars:
+            chunks.append(current)
+            current = part
+        else:
+            current = f"{current} {part}".strip()
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        if chunks and len(chunks[-1]) + 1 + len(current) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {current}"
+        else:
+            chunks.append(current)
+    return chunks
+
+# calls per backend, and local failures that fell back to gTTS
+_counts = {"fallbacks": 0}
+_counts_lock = threading.Lock()
+
+def tts_stats():
+    with _counts_lock:
+        return dict(_counts)
+
+def _synthesize(text, lang):
+    """MP3 bytes from the language's backend, or from gTTS if that fails."""
+    backend = backend_for(lang)
+    try:
+        audio = backend.synthesize(text, lang)
+    except Exception as e:
+        if backend.name == "gtts":
+            raise
+        logger.warning(f"⚠️ {backend.name} TTS failed ({e}); falling back to gTTS")
+        backend = get_backend("gtts")
+        audio = backend.synthesize(text, lang)
+        with _counts_lock:
+            _counts["fallbacks"] += 1
+    with _counts_lock:
+        _counts[backend.name] = _counts.get(backend.name, 0) + 1
+    return audio
 
 def speak(text, lang_code='en', output_path=None):
 
@@ -14,23 +72,27 @@ def speak(text, lang_code='en', output_path=None):
         lang_map = {"en": "en", "hi": "hi", "kn": "kn"}
         lang = lang_map.get(lang_code, "en")
 
-        print(f"🔊 Generating TTS for '{lang}' language...")
-
-        # Create TTS and save
-        tts = gTTS(text=text, lang=lang)
-        tts.save(output_path)
+        logger.debug(f"🔊 Generating TTS for '{lang}' language...")
 
-        # Give a short pause for Windows file handling
-        time.sleep(0.3)
+        # Synthesize into memory (backend chosen per language, see
+        # utils/tts_backends.py), then write the file (timed separately)
+        with metrics.timed("tts_synthesis", lang):
+            audio = _synthesize(text, lang)
+        with metrics.timed("tts_write", lang):
+            with open(output_path, "wb") as f:
+                f.write(audio)
 
         # Confirm file exists
         if os.path.exists(output_path):
-            print(f"✅ TTS file created at: {output_path}")
+            logger.debug(f"✅ TTS file created at: {output_path}")
             return True
         else:
-            print(f"⚠️ File not found after saving: {output_path}")
+            logger.warning(f"⚠️ File not found after saving: {output_path}")
             return False
 
     except Exception as e:
-        print(f"❌ TTS Error: {e}")
+        if isinstance(e, TTSDeadlineExceeded):
+            # the job fails and the client keeps the text answer without audio
+            metrics.degraded("tts", "deadline")
+        logger.error(f"❌ TTS Error: {e}")
         return False
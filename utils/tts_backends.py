@@ -0,0 +1,294 @@
+"""
+Text-to-speech backends behind utils.tts.speak.
+
+speak() always went to gTTS, a network round trip whose latency and failures
+are outside our control. Every backend here turns (text, lang) into MP3
+bytes; speak() picks one per language and falls back to gTTS when it fails:
+
+    gtts     Google Translate's TTS over the network (default)
+    espeak   espeak-ng, local and offline, run in a pool of pre-started
+             worker processes (TTS_LOCAL_WORKERS). Each worker loads
+             libespeak-ng and its voice data once, so a call costs one
+             synthesis, not a process spawn plus initialization.
+             libespeak-ng keeps global state, hence processes rather than
+             threads. A worker is a fresh `python -m utils.espeak_worker`
+             interpreter, not a fork of the app and its running threads;
+             one that dies or overruns its deadline is replaced.
+
+    TTS_BACKEND          backend for every language (default "gtts")
+    TTS_LANG_BACKENDS    per-language overrides, e.g. "en=espeak,hi=espeak"
+    TTS_LOCAL_WORKERS    espeak worker processes (default 2)
+    TTS_LOCAL_TIMEOUT    seconds to wait for one local synthesis (default 20)
+    TTS_DEADLINE         seconds one gTTS synthesis may take, across all of
+                         its HTTP requests (default 15)
+    TTS_ESPEAK_WPM       speaking rate (default 160 words per minute)
+
+espeak-ng's PCM is encoded to MP3 with lameenc when it is installed
+(in-process), else with pydub, which needs ffmpeg.
+
+A synthesis past its deadline raises TTSDeadlineExceeded; the audio job
+fails and the client keeps the text answer without audio.
+"""
+import ctypes.util
+import io
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TTS_BACKEND = os.environ.get("TTS_BACKEND", "gtts")
+TTS_LANG_BACKENDS = os.environ.get("TTS_LANG_BACKENDS", "")
+TTS_LOCAL_WORKERS = int(os.environ.get("TTS_LOCAL_WORKERS", "2"))
+TTS_LOCAL_TIMEOUT = float(os.environ.get("TTS_LOCAL_TIMEOUT", "20"))
+TTS_ESPEAK_WPM = int(os.environ.get("TTS_ESPEAK_WPM", "160"))
+TTS_DEADLINE = float(os.environ.get("TTS_DEADLINE", "15"))
+
+logger = logging.getLogger(__name__)
+
+
+class TTSDeadlineExceeded(TimeoutError):
+    """A synthesis took longer than its backend's deadline."""
+
+
+class GTTSBackend:
+    name = "gtts"
+
+    def __init__(self, deadline=TTS_DEADLINE):
+        self.deadline = deadline
+
+    def start(self):
+        pass
+
+    def synthesize(self, text, lang):
+        from gtts import gTTS
+        from gtts.tts import gTTSError
+        # gTTS sends one request per ~100 characters; each one may only use
+        # what is left of the deadline
+        deadline = time.monotonic() + self.deadline
+        tts = gTTS(text=text, lang=lang, timeout=self.deadline)
+        parts = tts.stream()
+        buf = io.BytesIO()
+        try:
+            for part in parts:
+                buf.write(part)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TTSDeadlineExceeded(f"gTTS took longer than {self.deadline:g} s")
+                tts.timeout = remaining
+        except gTTSError:
+            if time.monotonic() >= deadline:
+                raise TTSDeadlineExceeded(f"gTTS took longer than {self.deadline:g} s") from None
+            raise
+        return buf.getvalue()
+
+
+def encode_mp3(pcm, sample_rate):
+    """16-bit mono PCM -> MP3 bytes."""
+    try:
+        import lameenc
+    except ImportError:
+        lameenc = None
+    if lameenc is not None:
+        encoder = lameenc.Encoder()
+        encoder.set_bit_rate(64)
+        encoder.set_in_sample_rate(sample_rate)
+        encoder.set_channels(1)
+        encoder.set_quality(5)
+        return bytes(encoder.encode(pcm) + encoder.flush())
+    from pydub import AudioSegment
+    buf = io.BytesIO()
+    AudioSegment(pcm, sample_width=2, frame_rate=sample_rate, channels=1).export(buf, format="mp3", bitrate="64k")
+    return buf.getvalue()
+
+
+# ---- espeak-ng, in worker processes (utils/espeak_worker.py) ----
+class _WorkerDied(RuntimeError):
+    """The worker process exited or stopped answering in protocol."""
+
+
+class _EspeakProcess:
+    """One `python -m utils.espeak_worker` process, spoken to over its stdin / stdout."""
+
+    def __init__(self, module):
+        # a fresh interpreter: no fork of the app and its threads, no re-import of app.py
+        self.proc = subprocess.Popen([sys.executable, "-m", module], stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, cwd=APP_ROOT)
+        self.expired = False
+
+    def _expire(self):
+        self.expired = True
+        self.kill()
+
+    def _exchange(self, request, timeout):
+        """Send `request` (None: just read the start-up reply) and return the reply's audio."""
+        # a stuck worker is killed, which ends the blocking read below
+        timer = threading.Timer(timeout, self._expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            if request is not None:
+                self.proc.stdin.write(json.dumps(request).encode("utf-8") + b"\n")
+                self.proc.stdin.flush()
+            header = self.proc.stdout.readline()
+            reply = json.loads(header) if header else None
+            audio = self.proc.stdout.read(reply["size"]) if reply and reply["size"] else b""
+        except (OSError, ValueError) as e:
+            raise _WorkerDied(str(e)) from None
+        finally:
+            timer.cancel()
+        if self.expired:
+            raise TTSDeadlineExceeded(f"espeak-ng took longer than {timeout:g} s")
+        if reply is None or len(audio) != reply["size"]:
+            try:
+                status = self.proc.wait(1)
+            except subprocess.TimeoutExpired:
+                status = None
+            raise _WorkerDied(f"exit status {status}")
+        if reply["error"]:
+            raise RuntimeError(reply["error"])
+        return audio
+
+    def wait_ready(self, timeout):
+        self._exchange(None, timeout)
+
+    def synthesize(self, text, voice, timeout):
+        return self._exchange({"text": text, "voice": voice}, timeout)
+
+    def kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class EspeakBackend:
+    name = "espeak"
+    VOICES = {"en": "en", "hi": "hi", "kn": "kn"}
+    WORKER_MODULE = "utils.espeak_worker"
+
+    def __init__(self, workers=TTS_LOCAL_WORKERS, timeout=TTS_LOCAL_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._idle = queue.Queue()  # worker processes not busy with a synthesis
+        self._alive = 0
+        self._started = False
+        self._error = None  # why the backend can't run, once known
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start worker processes until there are `workers` of them, each with
+        espeak-ng initialized, so that work happens now, not on a request.
+        """
+        if self._alive >= self.workers and not self._error:
+            return
+        with self._lock:
+            if self._error:
+                raise RuntimeError(self._error)
+            missing = self.workers - self._alive
+            if missing <= 0:
+                return
+            if ctypes.util.find_library("espeak-ng") is None:
+                self._error = "libespeak-ng not found"
+                raise RuntimeError(self._error)
+            # started together, so they initialize in parallel
+            procs = [_EspeakProcess(self.WORKER_MODULE) for _ in range(missing)]
+            try:
+                for proc in procs:
+                    proc.wait_ready(self.timeout)
+            except Exception as e:
+                for proc in procs:
+                    proc.kill()
+                if not self._started:
+                    # workers that can't even initialize won't do better on a retry
+                    self._error = f"espeak-ng workers failed to start: {e}"
+                    raise RuntimeError(self._error) from None
+                raise RuntimeError(f"espeak-ng worker failed to restart: {e}") from None
+            self._alive += missing
+            self._started = True
+        for proc in procs:
+            self._idle.put(proc)
+
+    def _retire(self, proc):
+        proc.kill()
+        with self._lock:
+            self._alive -= 1
+
+    def _checkout(self):
+        """An idle worker that is still running; dead ones found on the way are replaced."""
+        while True:
+            self.start()
+            try:
+                proc = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TTSDeadlineExceeded(f"no espeak-ng worker free within {self.timeout:g} s") from None
+            if proc.proc.poll() is None:
+                return proc
+            logger.warning(f"⚠️ idle espeak-ng worker exited (status {proc.proc.returncode}); restarting it")
+            self._retire(proc)
+
+    def synthesize(self, text, lang):
+        voice = self.VOICES.get(lang, lang)
+        for attempt in (1, 2):
+            proc = self._checkout()
+            try:
+                audio = proc.synthesize(text, voice, self.timeout)
+            except TTSDeadlineExceeded:
+                self._retire(proc)  # killed mid-synthesis; start() replaces it
+                raise
+            except _WorkerDied as e:
+                # killed, or crashed inside libespeak-ng: replace it and retry once
+                logger.warning(f"⚠️ espeak-ng worker died ({e}); restarting it (attempt {attempt})")
+                self._retire(proc)
+                continue
+            except Exception:
+                self._idle.put(proc)  # espeak-ng reported an error; the worker is fine
+                raise
+            self._idle.put(proc)
+            return audio
+        raise RuntimeError("espeak-ng workers keep dying")
+
+
+BACKENDS = {"gtts": GTTSBackend, "espeak": EspeakBackend}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name):
+    with _instances_lock:
+        if name not in _instances:
+            if name not in BACKENDS:
+                raise ValueError(f"Unknown TTS backend {name!r}; choose from {', '.join(BACKENDS)}")
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
+
+
+def _lang_overrides(spec=TTS_LANG_BACKENDS):
+    pairs = (item.split("=", 1) for item in spec.split(",") if "=" in item)
+    return {lang.strip(): name.strip() for lang, name in pairs}
+
+
+LANG_BACKENDS = _lang_overrides()
+
+
+def backend_for(lang):
+    return get_backend(LANG_BACKENDS.get(lang, TTS_BACKEND))
+
+
+def start_backends():
+    """Pre-start every configured local backend (app startup); failures leave gTTS in charge."""
+    for name in {TTS_BACKEND, *LANG_BACKENDS.values()}:
+        try:
+            get_backend(name).start()
+        except Exception as e:
+            logger.warning(f"⚠️ TTS backend {name} unavailable ({e}); gTTS will be used instead")